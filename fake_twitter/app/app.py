@@ -12,17 +12,28 @@ from fastapi.staticfiles import StaticFiles
 
 from .config import media_path, static_request_path
 from .controllers import (
+    api_admin_export_router,
     api_admin_router,
+    api_admin_stats_router,
     api_follows_router,
     api_likes_router,
     api_media_router,
+    api_metrics_router,
+    api_tags_router,
     api_tweets_router,
     api_users_router,
 )
+from .instrumentation import QueryCountMiddleware
 from .lifespan import basic_lifespan
+from .metrics import MetricsMiddleware
+from .routing import ReadYourWritesMiddleware
 from .schemas import BadResultSchema
 
 app = FastAPI(lifespan=basic_lifespan)
+app.add_middleware(ReadYourWritesMiddleware)
+app.add_middleware(QueryCountMiddleware)
+# outermost, so latency includes all other middlewares
+app.add_middleware(MetricsMiddleware)
 
 static = StaticFiles(directory=media_path, check_dir=False)
 
@@ -68,7 +79,11 @@ app.include_router(api_tweets_router, prefix="/api")
 # app.include_router(api_reposts_router, prefix="/api")
 app.include_router(api_follows_router, prefix="/api")
 app.include_router(api_admin_router, prefix="/api")
+app.include_router(api_admin_stats_router, prefix="/api")
+app.include_router(api_admin_export_router, prefix="/api")
 app.include_router(api_media_router, prefix="/api")
+app.include_router(api_tags_router, prefix="/api")
+app.include_router(api_metrics_router)
 
 # Creating static directory if not exists
 
@@ -7,25 +7,30 @@ from functools import wraps
 
 from fastapi import Request
 from fastapi.responses import JSONResponse
+from fastapi.security import HTTPBasicCredentials
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from fake_twitter.db import Admin, User
+from fake_twitter.db import Admin
 
 from .config import api_key_keyword, logger_name
-from .schemas import AdminSchema, UnAuthenticatedErrorResponse
+from .identity import identity_cache
+from .schemas import AdminCredentialsSchema, UnAuthenticatedErrorResponse
 
 logger = logging.getLogger(logger_name)
 
 
 def auth_required_header(func):
     """
-    Decorator to wrap endpoint function
+    Decorator to wrap endpoint function, endpoint has to depend on request session
     """
     logger.debug("Checking authentication header")
 
     @wraps(func)
-    async def wrapper(request: Request, *args, **kwargs):
+    async def wrapper(request: Request, *args, session: AsyncSession, **kwargs):
         f"""
-        Wrapper to check if there is {api_key_keyword} header with valid value
+        Wrapper to check if there is {api_key_keyword} header with valid value.
+
+        Puts identity of user to request.state.user
         """
         api_key = request.headers.get(api_key_keyword)
         if not api_key:
@@ -35,7 +40,14 @@ def auth_required_header(func):
                 content=UnAuthenticatedErrorResponse("missing valid api-key").to_json(),
             )
         logger.debug("Header found")
-        user = await User.get_user_by_api_token(api_key)
+        if hasattr(request.state, "user"):
+            # resolved on primary before replica session was opened
+            user = request.state.user
+        else:
+            async with session.begin():
+                user = identity_cache.get(api_key) or await identity_cache.load(
+                    session, api_key
+                )
         if not user:
             logger.debug("User with header not found")
             return JSONResponse(
@@ -45,7 +57,8 @@ def auth_required_header(func):
                 ).to_json(),
             )
         logger.debug("User found")
-        return await func(request, *args, **kwargs)
+        request.state.user = user
+        return await func(request, *args, session=session, **kwargs)
 
     logger.debug("Check complete")
     return wrapper
@@ -53,24 +66,73 @@ def auth_required_header(func):
 
 def check_is_admin(func):
     """
-    Decorator to wrap endpoint function
+    Decorator to wrap endpoint function, endpoint has to depend on request session
     """
     logger.debug("Checking is this admin")
 
     @wraps(func)
-    async def wrapper(request: Request, admin_schema: AdminSchema, *args, **kwargs):
+    async def wrapper(
+        request: Request,
+        admin_schema: AdminCredentialsSchema,
+        *args,
+        session: AsyncSession,
+        **kwargs,
+    ):
         """
         Wrapper to check if there are valid admin credentials in request body
         """
         admin_data = admin_schema.model_dump(exclude={"user_data"})
-        if not await Admin.is_admin(**admin_data):
+        async with session.begin():
+            is_admin = await Admin.is_admin(session, **admin_data)
+        if not is_admin:
+            logger.debug("Admin credentials not found")
+            return JSONResponse(
+                status_code=401,
+                content=UnAuthenticatedErrorResponse("Bad credentials").to_json(),
+            )
+        logger.debug("It is admin")
+        return await func(request, admin_schema, *args, session=session, **kwargs)
+
+    logger.debug("Check complete")
+    return wrapper
+
+
+def check_is_admin_basic(func):
+    """
+    Decorator to wrap endpoint function requested with admin credentials
+    in Authorization: Basic header (by clients which do not send body, like scrapers),
+    endpoint has to depend on request session and basic credentials
+    """
+    logger.debug("Checking is this admin")
+
+    @wraps(func)
+    async def wrapper(
+        request: Request,
+        *args,
+        session: AsyncSession,
+        credentials: HTTPBasicCredentials | None,
+        **kwargs,
+    ):
+        """
+        Wrapper to check if there are valid admin credentials in request header
+        """
+        is_admin = False
+        if credentials is not None:
+            async with session.begin():
+                is_admin = await Admin.is_admin(
+                    session, login=credentials.username, password=credentials.password
+                )
+        if not is_admin:
             logger.debug("Admin credentials not found")
             return JSONResponse(
                 status_code=401,
                 content=UnAuthenticatedErrorResponse("Bad credentials").to_json(),
+                headers={"WWW-Authenticate": "Basic"},
             )
         logger.debug("It is admin")
-        return await func(request, admin_schema, *args, **kwargs)
+        return await func(
+            request, *args, session=session, credentials=credentials, **kwargs
+        )
 
     logger.debug("Check complete")
     return wrapper
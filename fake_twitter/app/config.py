@@ -1,6 +1,7 @@
 """Config module"""
 
 from os import path, getenv
+from tempfile import gettempdir
 
 # Static files directory (currently only for downloaded media)
 main_static_path = "app_static"
@@ -10,11 +11,47 @@ media_dir_name = "media"
 
 media_path = path.join(main_static_path, media_dir_name)
 
-# Postgres URL
+# Postgres URL (host and port may point to pgbouncer)
 
-POSTGRES_URL = (
-    f"//{getenv('POSTGRES_USER') or 'admin'}:{getenv('POSTGRES_PASSWORD') or 'admin'}@postgres:5432"
+postgres_credentials = (
+    f"{getenv('POSTGRES_USER') or 'admin'}:{getenv('POSTGRES_PASSWORD') or 'admin'}"
 )
+postgres_host = getenv("POSTGRES_HOST") or "postgres"
+postgres_port = getenv("POSTGRES_PORT") or "5432"
+
+POSTGRES_URL = f"//{postgres_credentials}@{postgres_host}:{postgres_port}"
+
+# URL of postgres itself for LISTEN connections of live feed
+# (LISTEN does not work through pgbouncer in transaction pooling mode)
+POSTGRES_DIRECT_URL = (
+    f"//{postgres_credentials}@{getenv('POSTGRES_DIRECT_HOST') or postgres_host}"
+    f":{getenv('POSTGRES_DIRECT_PORT') or postgres_port}"
+)
+
+# URL of streaming replica of postgres for GET requests, if there is one
+POSTGRES_REPLICA_URL = (
+    f"//{postgres_credentials}@{getenv('POSTGRES_REPLICA_HOST')}"
+    f":{getenv('POSTGRES_REPLICA_PORT') or postgres_port}"
+    if getenv("POSTGRES_REPLICA_HOST")
+    else None
+)
+
+# Seconds after client's own write when his GET requests still go to primary
+# (replica may not have received the write yet), carried by cookie
+read_your_writes_seconds = float(getenv("READ_YOUR_WRITES_SECONDS") or 5)
+
+# Connection pool of every worker (and of replica): connections kept open, extra connections
+# opened under load, seconds to wait for free connection, seconds after which
+# connection is reopened (-1 - never), check of connection before checkout
+db_pool_size = int(getenv("DB_POOL_SIZE") or 5)
+db_max_overflow = int(getenv("DB_MAX_OVERFLOW") or 10)
+db_pool_timeout = float(getenv("DB_POOL_TIMEOUT") or 30)
+db_pool_recycle = int(getenv("DB_POOL_RECYCLE") or -1)
+db_pool_pre_ping = (getenv("DB_POOL_PRE_PING") or "false").lower() == "true"
+
+# Connecting through pgbouncer in transaction pooling mode:
+# prepared statements of asyncpg are not cached between transactions
+pgbouncer_mode = (getenv("PGBOUNCER_MODE") or "false").lower() == "true"
 
 # Api keyword for header
 api_key_keyword = getenv("API_KEYWORD") or "api-key"
@@ -22,9 +59,68 @@ api_key_keyword = getenv("API_KEYWORD") or "api-key"
 # Logger name
 logger_name = "uvicorn"
 
+# Same statement (up to bound parameters) executed this many times by one request
+# is logged as N+1 queries
+n_plus_one_threshold = int(getenv("N_PLUS_ONE_THRESHOLD") or 10)
+
 
 # Max media file size
 max_megabytes_file_size = 10
 
 # Allowed meda extensions
 allowed_extensions = [".jpeg", ".jpg", ".png"]
+
+# Feed pagination
+default_feed_page_size = 20
+max_feed_page_size = 100
+
+# Pagination of followers and followed users (profile carries first page)
+default_follows_page_size = 100
+max_follows_page_size = 1000
+
+# Max amount of tweets requested at once by POST /api/tweets/batch
+max_tweets_batch_size = 100
+
+# If enabled - GET /api/tweets without limit and cursor returns all tweets at once
+# (bundled frontend does not know about pagination yet)
+legacy_full_feed = (getenv("LEGACY_FULL_FEED") or "true").lower() == "true"
+
+# Max total size of cached global feed pages
+feed_cache_max_bytes = int(getenv("FEED_CACHE_MAX_BYTES") or 32 * 1024 * 1024)
+
+# Interval of writing buffered tweet views to database
+views_flush_seconds = 5
+
+# Amount of latest tweets of followed user added to follower's timeline on follow
+timeline_backfill_size = 200
+
+# Hot feed ranking: popularity of every event halves each hot_half_life_hours.
+# Not configurable: stored scores and default of tweets.hot_score are computed
+# with it, changing it needs migration rescoring all tweets
+hot_half_life_hours = 12
+hot_weights = {"tweet": 10.0, "view": 1.0, "like": 10.0, "repost": 20.0}
+
+# Text search configuration of tweets search (tweets are in different languages)
+search_config = "simple"
+
+# Rows fetched from server-side cursor at once by streaming exports
+export_batch_size = 1000
+
+# Live feed (server-sent events): events buffered per client before it is dropped
+# as too slow, interval of keepalive comments and of reconnecting to database
+live_feed_queue_size = 100
+live_feed_keepalive_seconds = 15
+live_feed_reconnect_seconds = 5
+
+# Cache of api-key -> user identity: time to live (also delay of user deletion
+# being noticed by other workers) and max amount of cached api-keys per worker
+identity_cache_ttl_seconds = 30
+identity_cache_max_size = 10000
+
+# Prometheus metrics: directory where every worker writes snapshot of its metrics
+# (merged by GET /metrics), interval of writing snapshot, request latency buckets (seconds),
+# age of snapshot (of stopped worker) after which it is folded into compacted one
+metrics_dir = getenv("METRICS_DIR") or path.join(gettempdir(), "fake_twitter_metrics")
+metrics_flush_seconds = 5
+metrics_retention_seconds = 3600
+latency_buckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
@@ -1,9 +1,13 @@
 from .api import (
+    api_admin_export_router,
     api_admin_router,
+    api_admin_stats_router,
     api_follows_router,
     api_likes_router,
     api_media_router,
+    api_metrics_router,
     api_reposts_router,
+    api_tags_router,
     api_tweets_router,
     api_users_router,
 )
@@ -13,7 +17,11 @@ __all__ = [
     "api_users_router",
     "api_likes_router",
     "api_admin_router",
+    "api_admin_stats_router",
+    "api_admin_export_router",
     "api_reposts_router",
     "api_follows_router",
     "api_media_router",
+    "api_metrics_router",
+    "api_tags_router",
 ]
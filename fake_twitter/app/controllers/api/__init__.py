@@ -1,8 +1,12 @@
+from .api_admin_export import api_admin_export_router
+from .api_admin_stats import api_admin_stats_router
 from .api_admin_user import api_admin_router
 from .api_follow import api_follows_router
 from .api_like import api_likes_router
 from .api_media import api_media_router
+from .api_metrics import api_metrics_router
 from .api_repost import api_reposts_router
+from .api_tag import api_tags_router
 from .api_tweet import api_tweets_router
 from .api_user import api_users_router
 
@@ -13,5 +17,9 @@ __all__ = [
     "api_reposts_router",
     "api_follows_router",
     "api_admin_router",
+    "api_admin_stats_router",
+    "api_admin_export_router",
     "api_media_router",
+    "api_metrics_router",
+    "api_tags_router",
 ]
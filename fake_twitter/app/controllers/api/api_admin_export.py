@@ -0,0 +1,78 @@
+"""
+Endpoints for streaming export of data via admin credentials
+"""
+
+import logging
+from typing import AsyncIterator
+
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+from pydantic_core import to_json
+
+from fake_twitter.app.auth_wrappers import check_is_admin
+from fake_twitter.app.config import export_batch_size, logger_name
+from fake_twitter.app.dependencies import RequestSession
+from fake_twitter.app.schemas import AdminCredentialsSchema, BadResultSchema
+from fake_twitter.app.views_buffer import views_buffer
+from fake_twitter.db import Tweet, async_session
+from fake_twitter.db.read_models import tweets_select
+
+api_admin_export_router = APIRouter(prefix="/admin/export", include_in_schema=False)
+
+logger = logging.getLogger(logger_name)
+
+
+async def tweets_ndjson() -> AsyncIterator[bytes]:
+    """
+    All tweets as NDJSON, read from server-side cursor by export_batch_size rows.
+
+    Next batch is fetched only after previous one was sent to client,
+    so memory use does not depend on amount of tweets
+    """
+    exported = 0
+    async with async_session() as session:
+        async with session.begin():
+            result = await session.stream(
+                tweets_select()
+                .add_columns(Tweet.views, Tweet.created_at)
+                .order_by(Tweet.id)
+                .execution_options(yield_per=export_batch_size)
+            )
+            async for rows in result.partitions():
+                yield b"".join(
+                    to_json(
+                        {
+                            **row.tweet,
+                            "views": row.views + views_buffer.pending(row.tweet["id"]),
+                            "created_at": row.created_at,
+                        }
+                    )
+                    + b"\n"
+                    for row in rows
+                )
+                exported += len(rows)
+    logger.warning(f"Exported {exported} tweets")
+
+
+@api_admin_export_router.post(
+    "/tweets",
+    responses={
+        200: {"content": {"application/x-ndjson": {}}},
+        401: {"model": BadResultSchema},
+    },
+)
+@check_is_admin
+async def export_tweets_handler(
+    request: Request, session: RequestSession, admin_schema: AdminCredentialsSchema
+):
+    """
+    Endpoint to export all tweets, one TweetOutSchema json (with views and
+    created_at) per line.
+
+    Response is streamed: sending waits for slow client
+    and export stops when client disconnects
+
+    Requires admin credentials
+    """
+    logger.warning("Exporting tweets")
+    return StreamingResponse(tweets_ndjson(), media_type="application/x-ndjson")
@@ -0,0 +1,51 @@
+"""
+Endpoint for getting service statistics via admin credentials
+"""
+
+import logging
+
+from fastapi import APIRouter, Request
+
+from fake_twitter.app.auth_wrappers import check_is_admin
+from fake_twitter.app.config import logger_name
+from fake_twitter.app.dependencies import RequestSession
+from fake_twitter.app.identity import identity_cache
+from fake_twitter.app.live_feed import live_feed
+from fake_twitter.app.response_cache import feed_cache
+from fake_twitter.app.schemas import (
+    AdminCredentialsSchema,
+    BadResultSchema,
+    StatsResultSchema,
+)
+from fake_twitter.db import engine, replica_engine
+from fake_twitter.db.pool import pool_stats
+
+api_admin_stats_router = APIRouter(prefix="/admin/stats", include_in_schema=False)
+
+logger = logging.getLogger(logger_name)
+
+
+@api_admin_stats_router.post(
+    "", responses={200: {"model": StatsResultSchema}, 401: {"model": BadResultSchema}}
+)
+@check_is_admin
+async def get_stats_handler(
+    request: Request, session: RequestSession, admin_schema: AdminCredentialsSchema
+):
+    """
+    Endpoint to get statistics of caches, live feed and database pool of worker which served the request.
+
+    Requires admin credentials
+    """
+    logger.debug("Requesting stats")
+    return StatsResultSchema(
+        feed_cache=feed_cache.stats(),  # type: ignore[arg-type]
+        live_feed=live_feed.stats(),  # type: ignore[arg-type]
+        identity_cache=identity_cache.stats(),  # type: ignore[arg-type]
+        db_pool=pool_stats(engine),  # type: ignore[arg-type]
+        db_replica_pool=(
+            pool_stats(replica_engine)  # type: ignore[arg-type]
+            if replica_engine is not engine
+            else None
+        ),
+    )
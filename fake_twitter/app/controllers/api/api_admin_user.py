@@ -6,12 +6,14 @@ import logging
 
 from fastapi import APIRouter, Request
 from fastapi.responses import JSONResponse
-from sqlalchemy import select
+from sqlalchemy import case, select, update
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import selectinload
 
 from fake_twitter.app.auth_wrappers import check_is_admin
-from fake_twitter.app.config import logger_name
+from fake_twitter.app.config import hot_weights, logger_name
+from fake_twitter.app.dependencies import RequestSession
+from fake_twitter.app.identity import identity_cache
 from fake_twitter.app.schemas import (
     AdminSchema,
     BadResultSchema,
@@ -19,7 +21,16 @@ from fake_twitter.app.schemas import (
     DefaultPositiveResult,
     IntegrityErrorResponse,
 )
-from fake_twitter.db import Like, Tweet, User, async_session
+from fake_twitter.db import (
+    Follow,
+    Like,
+    Repost,
+    Tweet,
+    User,
+    feed_version,
+)
+from fake_twitter.db.notifications import notify_user_deleted
+from fake_twitter.db.ranking import creation_score, event_score, remove_event
 
 api_admin_router = APIRouter(prefix="/admin/user", include_in_schema=False)
 
@@ -30,32 +41,35 @@ logger = logging.getLogger(logger_name)
     "", responses={200: {"model": CreatedUserSchema}, 409: {"model": BadResultSchema}}
 )
 @check_is_admin
-async def create_new_user(request: Request, admin_schema: AdminSchema):
+async def create_new_user(
+    request: Request, session: RequestSession, admin_schema: AdminSchema
+):
     """
     Endpoint to create new User in database.
 
     Requires admin credentials
     """
     logger.warning("Request for new user creation")
-    async with async_session() as session:
-        async with session.begin():
-            try:
-                new_user = User(**admin_schema.user_data.model_dump())
-                session.add(new_user)
-                await session.commit()
-            except IntegrityError as e:
-                if e.orig.__getattribute__("pgcode") == "23505":
-                    logger.warning("User already exists")
-                    return JSONResponse(
-                        status_code=409,
-                        content=IntegrityErrorResponse(
-                            "User with this data (name OR api-key) already exists"
-                        ).to_json(),
-                    )
-                else:
-                    raise
-            logger.warning(f"New user {await new_user.to_safe_json()} created")
-            return CreatedUserSchema(created_user_data=new_user.to_json())  # type: ignore[arg-type]
+    async with session.begin():
+        try:
+            new_user = User(**admin_schema.user_data.model_dump())
+            session.add(new_user)
+            await session.commit()
+        except IntegrityError as e:
+            if e.orig.__getattribute__("pgcode") == "23505":
+                logger.warning("User already exists")
+                return JSONResponse(
+                    status_code=409,
+                    content=IntegrityErrorResponse(
+                        "User with this data (name OR api-key) already exists"
+                    ).to_json(),
+                )
+            else:
+                raise
+        # api-key may still point to previously deleted user
+        identity_cache.invalidate(new_user.api_key)
+        logger.warning(f"New user {await new_user.to_safe_json()} created")
+        return CreatedUserSchema(created_user_data=new_user.to_json())  # type: ignore[arg-type]
 
 
 @api_admin_router.delete(
@@ -66,7 +80,9 @@ async def create_new_user(request: Request, admin_schema: AdminSchema):
     },
 )
 @check_is_admin
-async def delete_user(request: Request, admin_schema: AdminSchema):
+async def delete_user(
+    request: Request, session: RequestSession, admin_schema: AdminSchema
+):
     """
     Endpoint to delete User from database.
 
@@ -76,31 +92,78 @@ async def delete_user(request: Request, admin_schema: AdminSchema):
     Requires admin credentials.
     """
     logger.warning(f"Attempting user delete. User: {admin_schema.user_data.name}")
-    async with async_session() as session:
-        async with session.begin():
-            query = await session.execute(
-                select(User)
-                .options(selectinload(User.user_tweet_repost))
+    async with session.begin():
+        query = await session.execute(
+            select(User)
+            .options(selectinload(User.user_tweet_repost))
+            .options(
+                selectinload(User.tweets)
+                .options(selectinload(Tweet.user_tweet_repost))
                 .options(
-                    selectinload(User.tweets)
-                    .options(selectinload(Tweet.user_tweet_repost))
-                    .options(
-                        selectinload(Tweet.tweet_likes).options(selectinload(Like.user))
-                    )
+                    selectinload(Tweet.tweet_likes).options(selectinload(Like.user))
                 )
-                .options(selectinload(User.followed))
-                .options(selectinload(User.followers))
-                .options(selectinload(User.user_likes))
-                .filter_by(**admin_schema.user_data.model_dump())
             )
-            deleted_user = query.unique().scalar_one_or_none()
-            if not deleted_user:
-                logger.warning(f"User {admin_schema.user_data.model_dump()} not found")
-                return JSONResponse(
-                    status_code=404,
-                    content=IntegrityErrorResponse("User not found").to_json(),
-                )
-            logger.warning(f"User {await deleted_user.to_safe_json()} deleted")
-            await session.delete(deleted_user)
-            await session.commit()
+            .options(selectinload(User.followed))
+            .options(selectinload(User.followers))
+            .options(selectinload(User.user_likes))
+            .filter_by(**admin_schema.user_data.model_dump())
+        )
+        deleted_user = query.unique().scalar_one_or_none()
+        if not deleted_user:
+            logger.warning(f"User {admin_schema.user_data.model_dump()} not found")
+            return JSONResponse(
+                status_code=404,
+                content=IntegrityErrorResponse("User not found").to_json(),
+            )
+        logger.warning(f"User {await deleted_user.to_safe_json()} deleted")
+        # likes and reposts of deleted user are removed with him
+        await session.execute(
+            update(Tweet)
+            .where(Tweet.id == Like.tweet_id, Like.user_id == deleted_user.id)
+            .values(
+                likes_count=Tweet.likes_count - 1,
+                version=Tweet.version + 1,
+                hot_score=remove_event(
+                    Tweet.hot_score,
+                    event_score(hot_weights["like"], Like.created_at),
+                    creation_score(Tweet.created_at),
+                ),
+            )
+        )
+        # as well as his follows
+        followed_by_deleted = select(Follow.followed_user).filter_by(
+            follower_user=deleted_user.id
+        )
+        following_deleted = select(Follow.follower_user).filter_by(
+            followed_user=deleted_user.id
+        )
+        await session.execute(
+            update(User)
+            .where(User.id.in_(followed_by_deleted) | User.id.in_(following_deleted))
+            .values(
+                version=User.version + 1,
+                followers_count=User.followers_count
+                - case((User.id.in_(followed_by_deleted), 1), else_=0),
+                following_count=User.following_count
+                - case((User.id.in_(following_deleted), 1), else_=0),
+            )
+        )
+        await session.execute(
+            update(Tweet)
+            .where(Tweet.id == Repost.tweet_id, Repost.user_id == deleted_user.id)
+            .values(
+                reposts_count=Tweet.reposts_count - 1,
+                hot_score=remove_event(
+                    Tweet.hot_score,
+                    event_score(hot_weights["repost"], Repost.created_at),
+                    creation_score(Tweet.created_at),
+                ),
+            )
+        )
+        api_key = deleted_user.api_key
+        await notify_user_deleted(session, deleted_user.id)
+        await session.delete(deleted_user)
+        await session.commit()
+    identity_cache.invalidate(api_key)
+    await feed_version.bump(session)
     return DefaultPositiveResult()
@@ -4,20 +4,20 @@ Endpoints for Follow CRUD
 
 import logging
 
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, BackgroundTasks, Request
 from fastapi.responses import JSONResponse
 from sqlalchemy import delete
 from sqlalchemy.exc import IntegrityError
 
 from fake_twitter.app.auth_wrappers import auth_required_header
-from fake_twitter.app.config import api_key_keyword, logger_name
+from fake_twitter.app.config import logger_name
+from fake_twitter.app.dependencies import RequestSession
 from fake_twitter.app.schemas import (
     BadResultSchema,
     DefaultPositiveResult,
     IntegrityErrorResponse,
 )
-from fake_twitter.db import Follow, User, async_session
-
+from fake_twitter.db import Follow, TimelineEntry, User
 
 api_follows_router = APIRouter(
     prefix="/users/{followed_id:int}/follow", tags=["follows"]
@@ -36,7 +36,12 @@ logger = logging.getLogger(logger_name)
     },
 )
 @auth_required_header
-async def post_follow_handler(request: Request, followed_id: int):
+async def post_follow_handler(
+    request: Request,
+    session: RequestSession,
+    followed_id: int,
+    background_tasks: BackgroundTasks,
+):
     """
     Endpoint to follow user by id.
 
@@ -44,60 +49,58 @@ async def post_follow_handler(request: Request, followed_id: int):
 
     User can follow another user only once
 
+    Latest tweets of followed user are added to follower's timeline after response is sent
+
     <h3>Requires api-key header with valid api key</h3>
     """
-    async with async_session() as session:
-        async with session.begin():
-            user_id = (
-                await User.get_user_by_api_token(request.headers.get(api_key_keyword))
-            ).id
+    async with session.begin():
+        user_id = request.state.user.id
+        logger.debug(
+            f"Attempting Follow: Follower-User.id={user_id} Followed-User.id={followed_id}"
+        )
+        if user_id == followed_id:
             logger.debug(
-                f"Attempting Follow: Follower-User.id={user_id} Followed-User.id={followed_id}"
+                f"Follow: Follower-User.id={user_id} Followed-User.id={followed_id} - can't follow self"
             )
-            if user_id == followed_id:
+            return JSONResponse(
+                status_code=409,
+                content=IntegrityErrorResponse("You can't follow yourself").to_json(),
+            )
+        try:
+            new_follow = Follow(follower_user=user_id, followed_user=followed_id)
+            session.add(new_follow)
+            await session.flush()
+            await session.execute(User.follow_update(user_id, followed_id, 1))
+            await session.commit()
+        except IntegrityError as e:
+            pgcode = e.orig.__getattribute__("pgcode")
+            if pgcode == "23503":
                 logger.debug(
-                    f"Follow: Follower-User.id={user_id} Followed-User.id={followed_id} - can't follow self"
+                    f"Follow: Follower-User.id={user_id} Followed-User.id={followed_id}"
+                    " - followed user not found"
+                )
+                return JSONResponse(
+                    status_code=404,
+                    content=IntegrityErrorResponse("Followed user not found").to_json(),
+                )
+            elif pgcode == "23505":
+                logger.debug(
+                    f"Follow: Follower-User.id={user_id} Followed-User.id={followed_id}"
+                    " - user is already followed"
                 )
                 return JSONResponse(
                     status_code=409,
                     content=IntegrityErrorResponse(
-                        "You can't follow yourself"
+                        "You are already following this user"
                     ).to_json(),
                 )
-            try:
-                new_follow = Follow(follower_user=user_id, followed_user=followed_id)
-                session.add(new_follow)
-                await session.commit()
-            except IntegrityError as e:
-                pgcode = e.orig.__getattribute__("pgcode")
-                if pgcode == "23503":
-                    logger.debug(
-                        f"Follow: Follower-User.id={user_id} Followed-User.id={followed_id}"
-                        " - followed user not found"
-                    )
-                    return JSONResponse(
-                        status_code=404,
-                        content=IntegrityErrorResponse(
-                            "Followed user not found"
-                        ).to_json(),
-                    )
-                elif pgcode == "23505":
-                    logger.debug(
-                        f"Follow: Follower-User.id={user_id} Followed-User.id={followed_id}"
-                        " - user is already followed"
-                    )
-                    return JSONResponse(
-                        status_code=409,
-                        content=IntegrityErrorResponse(
-                            "You are already following this user"
-                        ).to_json(),
-                    )
-                else:
-                    raise
+            else:
+                raise
 
     logger.debug(
         f"Follow: Follower-User.id={user_id} Followed-User.id={followed_id} - success"
     )
+    background_tasks.add_task(TimelineEntry.backfill, user_id, followed_id)
 
     return DefaultPositiveResult()
 
@@ -110,7 +113,12 @@ async def post_follow_handler(request: Request, followed_id: int):
     },
 )
 @auth_required_header
-async def delete_follow_handler(request: Request, followed_id: int):
+async def delete_follow_handler(
+    request: Request,
+    session: RequestSession,
+    followed_id: int,
+    background_tasks: BackgroundTasks,
+):
     """
     Endpoint to stop following user by id.
 
@@ -118,20 +126,22 @@ async def delete_follow_handler(request: Request, followed_id: int):
 
     User can stop following only user he follows
 
+    Tweets of unfollowed user are removed from follower's timeline after response is sent
+
     <h3>Requires api-key header with valid api key</h3>
     """
-    async with async_session() as session:
-        async with session.begin():
-            user_id = (
-                await User.get_user_by_api_token(request.headers.get(api_key_keyword))
-            ).id
-            like_q = delete(Follow).filter_by(
-                follower_user=user_id, followed_user=followed_id
-            )
-            logger.debug(
-                f"delete Follow: Follower-User.id={user_id} Followed-User.id={followed_id}"
-            )
-            await session.execute(like_q)
-            await session.commit()
+    async with session.begin():
+        user_id = request.state.user.id
+        like_q = delete(Follow).filter_by(
+            follower_user=user_id, followed_user=followed_id
+        )
+        logger.debug(
+            f"delete Follow: Follower-User.id={user_id} Followed-User.id={followed_id}"
+        )
+        deleted = await session.execute(like_q)
+        if deleted.rowcount:
+            await session.execute(User.follow_update(user_id, followed_id, -1))
+        await session.commit()
+    background_tasks.add_task(TimelineEntry.prune, user_id, followed_id)
 
     return DefaultPositiveResult()
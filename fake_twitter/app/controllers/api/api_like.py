@@ -6,17 +6,20 @@ import logging
 
 from fastapi import APIRouter, Request
 from fastapi.responses import JSONResponse
-from sqlalchemy import delete
+from sqlalchemy import delete, update
 from sqlalchemy.exc import IntegrityError
 
 from fake_twitter.app.auth_wrappers import auth_required_header
-from fake_twitter.app.config import api_key_keyword, logger_name
+from fake_twitter.app.config import hot_weights, logger_name
+from fake_twitter.app.dependencies import RequestSession
 from fake_twitter.app.schemas import (
     BadResultSchema,
     DefaultPositiveResult,
     IntegrityErrorResponse,
 )
-from fake_twitter.db import Like, User, async_session
+from fake_twitter.db import Like, Tweet, feed_version
+from fake_twitter.db.notifications import notify_feed_event
+from fake_twitter.db.ranking import add_event, creation_score, event_score, remove_event
 
 api_likes_router = APIRouter(prefix="/tweets/{tweet_id:int}/likes", tags=["likes"])
 
@@ -32,7 +35,7 @@ logger = logging.getLogger(logger_name)
     },
 )
 @auth_required_header
-async def post_like_handler(request: Request, tweet_id: int):
+async def post_like_handler(request: Request, session: RequestSession, tweet_id: int):
     """
     Endpoint to post like tweet by id.
 
@@ -42,39 +45,50 @@ async def post_like_handler(request: Request, tweet_id: int):
 
     <h3>Requires api-key header with valid api key</h3>
     """
-    async with async_session() as session:
-        async with session.begin():
-            user_id = (
-                await User.get_user_by_api_token(request.headers.get(api_key_keyword))
-            ).id
-            logger.debug(f"Attempting Like: User.id={user_id} Tweet.id={tweet_id}")
-            try:
-                new_like = Like(user_id=user_id, tweet_id=tweet_id)
-                session.add(new_like)
-                await session.commit()
-            except IntegrityError as e:
-                pgcode = e.orig.__getattribute__("pgcode")
-                if pgcode == "23503":
-                    logger.debug(
-                        f"Like: User.id={user_id} Tweet.id={tweet_id} fail - tweet does not exist"
-                    )
-                    return JSONResponse(
-                        status_code=404,
-                        content=IntegrityErrorResponse("Tweet not found").to_json(),
-                    )
-                elif pgcode == "23505":
-                    logger.debug(
-                        f"Like: User.id={user_id} Tweet.id={tweet_id} fail - like already exists"
-                    )
-                    return JSONResponse(
-                        status_code=409,
-                        content=IntegrityErrorResponse(
-                            "You already liked this tweet"
-                        ).to_json(),
-                    )
-                else:
-                    raise
+    async with session.begin():
+        user_id = request.state.user.id
+        logger.debug(f"Attempting Like: User.id={user_id} Tweet.id={tweet_id}")
+        try:
+            new_like = Like(user_id=user_id, tweet_id=tweet_id)
+            session.add(new_like)
+            await session.flush()
+            await session.execute(
+                update(Tweet)
+                .where(Tweet.id == tweet_id)
+                .values(
+                    likes_count=Tweet.likes_count + 1,
+                    version=Tweet.version + 1,
+                    hot_score=add_event(
+                        Tweet.hot_score, event_score(hot_weights["like"])
+                    ),
+                )
+            )
+            await notify_feed_event(session, "like", tweet_id=tweet_id, user_id=user_id)
+            await session.commit()
+        except IntegrityError as e:
+            pgcode = e.orig.__getattribute__("pgcode")
+            if pgcode == "23503":
+                logger.debug(
+                    f"Like: User.id={user_id} Tweet.id={tweet_id} fail - tweet does not exist"
+                )
+                return JSONResponse(
+                    status_code=404,
+                    content=IntegrityErrorResponse("Tweet not found").to_json(),
+                )
+            elif pgcode == "23505":
+                logger.debug(
+                    f"Like: User.id={user_id} Tweet.id={tweet_id} fail - like already exists"
+                )
+                return JSONResponse(
+                    status_code=409,
+                    content=IntegrityErrorResponse(
+                        "You already liked this tweet"
+                    ).to_json(),
+                )
+            else:
+                raise
     logger.debug(f"Like: User.id={user_id} Tweet.id={tweet_id} success")
+    await feed_version.bump(session)
     return DefaultPositiveResult()
 
 
@@ -86,7 +100,7 @@ async def post_like_handler(request: Request, tweet_id: int):
     },
 )
 @auth_required_header
-async def delete_like_handler(request: Request, tweet_id: int):
+async def delete_like_handler(request: Request, session: RequestSession, tweet_id: int):
     """
     Endpoint to delete tweet like by tweet id.
 
@@ -96,13 +110,33 @@ async def delete_like_handler(request: Request, tweet_id: int):
 
     <h3>Requires api-key header with valid api key</h3>
     """
-    async with async_session() as session:
-        async with session.begin():
-            user_id = (
-                await User.get_user_by_api_token(request.headers.get(api_key_keyword))
-            ).id
-            like_q = delete(Like).filter_by(user_id=user_id, tweet_id=tweet_id)
-            logger.debug(f"delete Like: User.id={user_id} Tweet.id={tweet_id}")
-            await session.execute(like_q)
+    async with session.begin():
+        user_id = request.state.user.id
+        like_q = (
+            delete(Like)
+            .filter_by(user_id=user_id, tweet_id=tweet_id)
+            .returning(Like.created_at)
+        )
+        logger.debug(f"delete Like: User.id={user_id} Tweet.id={tweet_id}")
+        liked_at = (await session.execute(like_q)).scalar_one_or_none()
+        if liked_at:
+            await session.execute(
+                update(Tweet)
+                .where(Tweet.id == tweet_id)
+                .values(
+                    likes_count=Tweet.likes_count - 1,
+                    version=Tweet.version + 1,
+                    hot_score=remove_event(
+                        Tweet.hot_score,
+                        event_score(hot_weights["like"], liked_at),
+                        creation_score(Tweet.created_at),
+                    ),
+                )
+            )
+            await notify_feed_event(
+                session, "unlike", tweet_id=tweet_id, user_id=user_id
+            )
+    if liked_at:
+        await feed_version.bump(session)
 
     return DefaultPositiveResult()
@@ -14,15 +14,15 @@ from fake_twitter.app.config import (
     media_path,
     max_megabytes_file_size,
     allowed_extensions,
-    api_key_keyword,
 )
+from fake_twitter.app.dependencies import RequestSession
 from fake_twitter.app.schemas import (
     BadResultSchema,
     FileExtensionValidator,
     FileSizeValidator,
     ResultMediaSchema,
 )
-from fake_twitter.db import Image, async_session
+from fake_twitter.db import Image
 
 api_media_router = APIRouter(prefix="/medias", tags=["media"])
 
@@ -43,7 +43,9 @@ logger = logging.getLogger(logger_name)
     },
 )
 @auth_required_header
-async def post_media_handler(request: Request, file: UploadFile = File(...)):
+async def post_media_handler(
+    request: Request, session: RequestSession, file: UploadFile = File(...)
+):
     """
     Endpoint to download media file.
 
@@ -51,12 +53,11 @@ async def post_media_handler(request: Request, file: UploadFile = File(...)):
     """
     logger.debug("Attempting file download")
     file_extension = Path(file.filename).suffix.lower()  # type: ignore[arg-type]
-    async with async_session() as session:
-        async with session.begin():
-            new_image = Image(file_extension=file_extension)
-            session.add(new_image)
-            await session.commit()
-        logger.debug(f"Added new Image instance to database with id={new_image.id}")
+    async with session.begin():
+        new_image = Image(file_extension=file_extension)
+        session.add(new_image)
+        await session.commit()
+    logger.debug(f"Added new Image instance to database with id={new_image.id}")
     file_path = path.join(media_path, f"{new_image.id}{file_extension}")
     with open(file_path, "wb") as new_file:
         logger.debug(f"Writing file to: {file_path}")
@@ -0,0 +1,36 @@
+"""
+Endpoint for scraping Prometheus metrics via admin credentials
+"""
+
+import logging
+
+from fastapi import APIRouter, Request
+from fastapi.responses import PlainTextResponse
+
+from fake_twitter.app.auth_wrappers import check_is_admin_basic
+from fake_twitter.app.config import logger_name
+from fake_twitter.app.dependencies import BasicCredentials, RequestSession
+from fake_twitter.app.metrics import metrics_exporter
+
+api_metrics_router = APIRouter(prefix="/metrics", include_in_schema=False)
+
+logger = logging.getLogger(logger_name)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@api_metrics_router.get("", response_class=PlainTextResponse)
+@check_is_admin_basic
+async def get_metrics_handler(
+    request: Request, session: RequestSession, credentials: BasicCredentials
+):
+    """
+    Endpoint to get metrics of requests, database pools and caches of all workers
+    in Prometheus text format.
+
+    Requires admin credentials in Authorization: Basic header
+    """
+    logger.debug("Requesting metrics")
+    return PlainTextResponse(
+        await metrics_exporter.collect(), media_type=PROMETHEUS_CONTENT_TYPE
+    )
@@ -8,17 +8,19 @@ import logging
 
 from fastapi import APIRouter, Request
 from fastapi.responses import JSONResponse
-from sqlalchemy import delete
+from sqlalchemy import delete, update
 from sqlalchemy.exc import IntegrityError
 
 from fake_twitter.app.auth_wrappers import auth_required_header
-from fake_twitter.app.config import api_key_keyword, logger_name
+from fake_twitter.app.config import hot_weights, logger_name
+from fake_twitter.app.dependencies import RequestSession
 from fake_twitter.app.schemas import (
     BadResultSchema,
     DefaultPositiveResult,
     IntegrityErrorResponse,
 )
-from fake_twitter.db import Repost, User, async_session
+from fake_twitter.db import Repost, Tweet
+from fake_twitter.db.ranking import add_event, creation_score, event_score, remove_event
 
 
 api_reposts_router = APIRouter(prefix="/tweets/{tweet_id:int}/repost", tags=["reposts"])
@@ -35,7 +37,7 @@ logger = logging.getLogger(logger_name)
     },
 )
 @auth_required_header
-async def post_repost_handler(request: Request, tweet_id: int):
+async def post_repost_handler(request: Request, session: RequestSession, tweet_id: int):
     """
     Endpoint to repost tweet id.
 
@@ -45,39 +47,47 @@ async def post_repost_handler(request: Request, tweet_id: int):
 
     <h3>Requires api-key header with valid api key</h3>
     """
-    async with async_session() as session:
-        async with session.begin():
-            user_id = (
-                await User.get_user_by_api_token(request.headers.get(api_key_keyword))
-            ).id
-            logger.debug(f"Attempting Repost: User.id={user_id} Tweet.id={tweet_id}")
-            try:
-                new_repost = Repost(user_id=user_id, tweet_id=tweet_id)
-                session.add(new_repost)
-                await session.commit()
-            except IntegrityError as e:
-                pgcode = e.orig.__getattribute__("pgcode")
-                if pgcode == "23503":
-                    logger.debug(
-                        f"Repost: User.id={user_id} Tweet.id={tweet_id} - fail - tweet not found"
-                    )
-                    return JSONResponse(
-                        status_code=404,
-                        content=IntegrityErrorResponse("Tweet not found").to_json(),
-                    )
-                elif pgcode == "23505":
-                    logger.debug(
-                        f"Repost: User.id={user_id} Tweet.id={tweet_id} - fail - already reposted"
-                    )
-
-                    return JSONResponse(
-                        status_code=409,
-                        content=IntegrityErrorResponse(
-                            "You already reposted this tweet"
-                        ).to_json(),
-                    )
-                else:
-                    raise
+    async with session.begin():
+        user_id = request.state.user.id
+        logger.debug(f"Attempting Repost: User.id={user_id} Tweet.id={tweet_id}")
+        try:
+            new_repost = Repost(user_id=user_id, tweet_id=tweet_id)
+            session.add(new_repost)
+            await session.flush()
+            await session.execute(
+                update(Tweet)
+                .where(Tweet.id == tweet_id)
+                .values(
+                    reposts_count=Tweet.reposts_count + 1,
+                    hot_score=add_event(
+                        Tweet.hot_score, event_score(hot_weights["repost"])
+                    ),
+                )
+            )
+            await session.commit()
+        except IntegrityError as e:
+            pgcode = e.orig.__getattribute__("pgcode")
+            if pgcode == "23503":
+                logger.debug(
+                    f"Repost: User.id={user_id} Tweet.id={tweet_id} - fail - tweet not found"
+                )
+                return JSONResponse(
+                    status_code=404,
+                    content=IntegrityErrorResponse("Tweet not found").to_json(),
+                )
+            elif pgcode == "23505":
+                logger.debug(
+                    f"Repost: User.id={user_id} Tweet.id={tweet_id} - fail - already reposted"
+                )
+
+                return JSONResponse(
+                    status_code=409,
+                    content=IntegrityErrorResponse(
+                        "You already reposted this tweet"
+                    ).to_json(),
+                )
+            else:
+                raise
     logger.debug(f"Repost: User.id={user_id} Tweet.id={tweet_id} - success")
     return DefaultPositiveResult()
 
@@ -90,7 +100,9 @@ async def post_repost_handler(request: Request, tweet_id: int):
     },
 )
 @auth_required_header
-async def delete_repost_handler(request: Request, tweet_id: int):
+async def delete_repost_handler(
+    request: Request, session: RequestSession, tweet_id: int
+):
     """
     Endpoint to delete repost by tweet id.
 
@@ -98,12 +110,26 @@ async def delete_repost_handler(request: Request, tweet_id: int):
 
     <h3>Requires api-key header with valid api key</h3>
     """
-    async with async_session() as session:
-        async with session.begin():
-            user_id = (
-                await User.get_user_by_api_token(request.headers.get(api_key_keyword))
-            ).id
-            repost_q = delete(Repost).filter_by(user_id=user_id, tweet_id=tweet_id)
-            await session.execute(repost_q)
+    async with session.begin():
+        user_id = request.state.user.id
+        repost_q = (
+            delete(Repost)
+            .filter_by(user_id=user_id, tweet_id=tweet_id)
+            .returning(Repost.created_at)
+        )
+        reposted_at = (await session.execute(repost_q)).scalar_one_or_none()
+        if reposted_at:
+            await session.execute(
+                update(Tweet)
+                .where(Tweet.id == tweet_id)
+                .values(
+                    reposts_count=Tweet.reposts_count - 1,
+                    hot_score=remove_event(
+                        Tweet.hot_score,
+                        event_score(hot_weights["repost"], reposted_at),
+                        creation_score(Tweet.created_at),
+                    ),
+                )
+            )
     logger.debug(f"delete Repost: User.id={user_id} Tweet.id={tweet_id}")
     return DefaultPositiveResult()
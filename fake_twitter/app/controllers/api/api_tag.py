@@ -0,0 +1,81 @@
+"""
+Endpoints for tweets by hashtag
+"""
+
+import logging
+from typing import Optional
+
+from fastapi import APIRouter, Query, Request
+from sqlalchemy import select
+
+from fake_twitter.app.auth_wrappers import auth_required_header
+from fake_twitter.app.config import (
+    default_feed_page_size,
+    logger_name,
+    max_feed_page_size,
+)
+from fake_twitter.app.dependencies import RequestSession
+from fake_twitter.app.pagination import decode_cursor, encode_cursor, keyset_before
+from fake_twitter.app.responses import TrustedJSONResponse
+from fake_twitter.app.schemas import BadResultSchema, ResultFeedPageSchema
+from fake_twitter.db import Hashtag, TweetHashtag
+from fake_twitter.db.read_models import tweets_by_id_select
+
+api_tags_router = APIRouter(prefix="/tags", tags=["tags"])
+
+logger = logging.getLogger(logger_name)
+
+
+@api_tags_router.get(
+    "/{tag}",
+    responses={
+        200: {"model": ResultFeedPageSchema},
+        400: {"model": BadResultSchema},
+        401: {"model": BadResultSchema},
+        422: {"model": BadResultSchema},
+    },
+)
+@auth_required_header
+async def get_tag_tweets_handler(
+    request: Request,
+    session: RequestSession,
+    tag: str,
+    limit: int = Query(default=default_feed_page_size, ge=1, le=max_feed_page_size),
+    cursor: Optional[str] = Query(default=None),
+):
+    """
+    Endpoint to get tweets with #tag (case-insensitive, # may be omitted)
+
+    Sorted by creation date (latest > earliest).
+    Paginated by limit and cursor: pass next_cursor from previous page to get next one.
+
+    <h3>Requires api-key header with valid api key</h3>
+    """
+    tag = tag.removeprefix("#").casefold()
+    hashtag_id = select(Hashtag.id).where(Hashtag.name == tag).scalar_subquery()
+    ids = (
+        select(TweetHashtag.tweet_id)
+        .where(TweetHashtag.hashtag_id == hashtag_id)
+        .order_by(TweetHashtag.tweet_id.desc())
+        .limit(limit + 1)
+    )
+    if cursor:
+        ids = ids.where(
+            keyset_before((TweetHashtag.tweet_id,), decode_cursor(cursor, int))
+        )
+    async with session.begin():
+        q = await session.execute(tweets_by_id_select(ids))
+        rows = q.all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][1:])
+    logger.debug(f"Getting tweets of #{tag}: limit={limit} cursor={cursor}")
+    # ResultFeedPageSchema
+    return TrustedJSONResponse(
+        {
+            "result": True,
+            "tweets": [row.tweet for row in rows],
+            "next_cursor": next_cursor,
+        }
+    )
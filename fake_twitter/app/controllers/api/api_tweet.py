@@ -2,101 +2,336 @@
 Endpoints for Tweet CRUD
 """
 
+import asyncio
 import logging
+from datetime import datetime
 from os import path as os_path
 from os import remove as os_remove
+from typing import Literal, Optional
 
-from fastapi import APIRouter, Request
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, BackgroundTasks, Query, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy import select, update
+from sqlalchemy.orm import selectinload
 
 from fake_twitter.app.auth_wrappers import auth_required_header
-from fake_twitter.app.config import api_key_keyword, logger_name, media_path
+from fake_twitter.app.config import (
+    default_feed_page_size,
+    legacy_full_feed,
+    live_feed_keepalive_seconds,
+    logger_name,
+    max_feed_page_size,
+    media_path,
+)
+from fake_twitter.app.dependencies import RequestSession
+from fake_twitter.app.etags import etag_headers, make_etag, not_modified
+from fake_twitter.app.live_feed import Subscription, live_feed
+from fake_twitter.app.pagination import decode_cursor, encode_cursor, keyset_before
+from fake_twitter.app.response_cache import feed_cache
+from fake_twitter.app.responses import TrustedJSONResponse
 from fake_twitter.app.schemas import (
     BadResultSchema,
     DefaultPositiveResult,
     FeedOutSchema,
     NewTweetSchema,
     NotFoundErrorResponse,
-    ResultFeedSchema,
+    ResultFeedPageSchema,
     ResultTweetCreationSchema,
     ResultTweetSchema,
+    ResultTweetsBatchSchema,
+    TweetsBatchSchema,
     UnAuthorizedErrorResponse,
     TweetOutSchema,
 )
-from fake_twitter.db import Follow, Image, Tweet, User, async_session
+from fake_twitter.app.views_buffer import views_buffer
+from fake_twitter.db import (
+    Image,
+    TimelineEntry,
+    Tweet,
+    feed_version,
+    views_version,
+)
+from fake_twitter.db.extraction import index_tweet
+from fake_twitter.db.notifications import notify_feed_event
+from fake_twitter.db.read_models import tweets_search_select, tweets_select
 
 
 api_tweets_router = APIRouter(prefix="/tweets", tags=["tweets"])
 
 logger = logging.getLogger(logger_name)
 
+# feed sort mode: keyset columns (all DESC) and converters of cursor values
+FEED_SORTS = {
+    "views": (
+        (Tweet.views, Tweet.created_at, Tweet.id),
+        (int, datetime.fromisoformat, int),
+    ),
+    "hot": ((Tweet.hot_score, Tweet.id), (float, int)),
+}
+
 
 @api_tweets_router.get(
     "",
     responses={
-        200: {"model": ResultFeedSchema},
+        200: {"model": ResultFeedPageSchema},
+        400: {"model": BadResultSchema},
         401: {"model": BadResultSchema},
         422: {"model": BadResultSchema},
     },
 )
 @auth_required_header
-async def get_feed_handler(request: Request):
+async def get_feed_handler(
+    request: Request,
+    session: RequestSession,
+    limit: Optional[int] = Query(default=None, ge=1),
+    cursor: Optional[str] = Query(default=None),
+    offset: Optional[int] = Query(default=None, include_in_schema=False),
+    sort: Literal["views", "hot"] = Query(default="views"),
+):
     """
-    Endpoint to get all existing tweets, sorted by creation date (latest > earliest).
+    Endpoint to get existing tweets, sorted by views and creation date (latest > earliest).
+
+    sort=hot sorts by time-decayed popularity (views, likes, reposts) instead
+
+    Paginated by limit and cursor: pass next_cursor from previous page to get next one.
+
+    Without limit and cursor returns all tweets at once (if LEGACY_FULL_FEED is enabled,
+    only for default sort)
+
+    Pages are cached until tweets or likes change, sort=views pages also until views
+    are flushed (sort=hot pages pick up new views with next change of tweets or likes).
+    Responses carry weak ETag, matching If-None-Match gets 304
 
     <h3>Requires api-key header with valid api key</h3>
     """
-    async with async_session() as session:
-        async with session.begin():
+    # bundled frontend asks for ?offset={page}&limit={size} and expects all tweets
+    legacy_request = (
+        legacy_full_feed
+        and sort == "views"
+        and cursor is None
+        and (limit is None or offset is not None)
+    )
+    limit = None if legacy_request else limit or default_feed_page_size
+    # checked here, not in Query, so frontend page sizes above it still get legacy feed
+    if limit is not None and limit > max_feed_page_size:
+        raise RequestValidationError(
+            [
+                {
+                    "type": "less_than_equal",
+                    "loc": ("query", "limit"),
+                    "msg": f"Input should be less than or equal to {max_feed_page_size}",
+                    "input": limit,
+                    "ctx": {"le": max_feed_page_size},
+                }
+            ]
+        )
+    cache_key = (sort, limit, cursor)
+    async with session.begin():
+        version: tuple[int, ...] = (await feed_version.current(session),)
+        if sort == "views":
+            version += (await views_version.current(session),)
+        etag = make_etag("feed", *version)
+        if response := not_modified(request, etag):
+            return response
+        body = feed_cache.get(cache_key, version)
+        if body is not None:
+            logger.debug(f"Feed page from cache: limit={limit} cursor={cursor}")
+            return TrustedJSONResponse(
+                body, headers={"X-Cache": "HIT", **etag_headers(etag)}
+            )
+        if limit is None:
             q = await session.execute(
-                select(Tweet)
+                tweets_select()
                 .order_by(Tweet.views.desc())
                 .order_by(Tweet.created_at.desc())
             )
-            tweets = q.scalars().unique().all()
-            tweet_list = [await tweet.to_safe_json() for tweet in tweets]
             logger.debug("Getting all existing tweets")
-            return ResultFeedSchema(tweets=tweet_list)  # type: ignore[arg-type]
-
-
-# @api_tweets_router.get(
-#     "/feed",
-#     responses={
-#         200: {"model": ResultFeedSchema},
-#         401: {"model": BadResultSchema},
-#         422: {"model": BadResultSchema},
-#     },
-# )
-# @auth_required_header
-# async def get_personal_feed_handler(request: Request):
-#     """
-#     Endpoint to get tweets of users, followed by User
-#
-#     Sorted by: likes amount, views amount, creation date -> e.g. most popular
-#
-#     User is recognized by api-key header value
-#
-#     <h3>Requires api-key header with valid api key</h3>
-#     """
-#     async with async_session() as session:
-#         async with session.begin():
-#             user = await User.get_user_by_api_token(
-#                 request.headers.get(api_key_keyword)
-#             )
-#             q = await session.execute(
-#                 select(Tweet)
-#                 .join(User)
-#                 .join(Follow, User.id == Follow.followed_user)
-#                 .filter_by(follower_user=user.id)
-#                 .order_by(Tweet.views.desc())
-#                 .order_by(Tweet.created_at.desc())
-#             )
-#             tweets = q.scalars().unique().all()
-#             tweet_list = [await t.to_safe_json() for t in tweets]
-#             tweet_list.sort(key=lambda x: len(x["likes"]), reverse=True)
-#             logger.debug("Getting all tweets of followed users")
-#             return ResultFeedSchema(tweets=tweet_list)
+            # ResultFeedSchema
+            result = {"result": True, "tweets": q.scalars().all()}
+        else:
+            key_columns, converters = FEED_SORTS[sort]
+            query = (
+                tweets_select()
+                .add_columns(*key_columns)
+                .order_by(*(column.desc() for column in key_columns))
+                .limit(limit + 1)
+            )
+            if cursor:
+                query = query.where(
+                    keyset_before(key_columns, decode_cursor(cursor, *converters))
+                )
+            q = await session.execute(query)
+            rows = q.all()
+            next_cursor = None
+            if len(rows) > limit:
+                rows = rows[:limit]
+                next_cursor = encode_cursor(rows[-1][1:])
+            logger.debug(
+                f"Getting feed page: sort={sort} limit={limit} cursor={cursor}"
+            )
+            # ResultFeedPageSchema
+            result = {
+                "result": True,
+                "tweets": [row.tweet for row in rows],
+                "next_cursor": next_cursor,
+            }
+    response = TrustedJSONResponse(
+        result, headers={"X-Cache": "MISS", **etag_headers(etag)}
+    )
+    feed_cache.set(cache_key, version, response.body)
+    return response
+
+
+@api_tweets_router.get(
+    "/feed",
+    responses={
+        200: {"model": ResultFeedPageSchema},
+        400: {"model": BadResultSchema},
+        401: {"model": BadResultSchema},
+        422: {"model": BadResultSchema},
+    },
+)
+@auth_required_header
+async def get_personal_feed_handler(
+    request: Request,
+    session: RequestSession,
+    limit: int = Query(default=default_feed_page_size, ge=1, le=max_feed_page_size),
+    cursor: Optional[str] = Query(default=None),
+):
+    """
+    Endpoint to get tweets of users, followed by User
+
+    Sorted by creation date (latest > earliest).
+    Paginated by limit and cursor: pass next_cursor from previous page to get next one.
+
+    User is recognized by api-key header value
+
+    <h3>Requires api-key header with valid api key</h3>
+    """
+    async with session.begin():
+        user = request.state.user
+        query = (
+            tweets_select()
+            .add_columns(TimelineEntry.created_at, TimelineEntry.tweet_id)
+            .join(TimelineEntry, TimelineEntry.tweet_id == Tweet.id)
+            .where(TimelineEntry.user_id == user.id)
+            .order_by(TimelineEntry.created_at.desc(), TimelineEntry.tweet_id.desc())
+            .limit(limit + 1)
+        )
+        if cursor:
+            query = query.where(
+                keyset_before(
+                    (TimelineEntry.created_at, TimelineEntry.tweet_id),
+                    decode_cursor(cursor, datetime.fromisoformat, int),
+                )
+            )
+        q = await session.execute(query)
+        rows = q.all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1][1:])
+        tweet_list = [row.tweet for row in rows]
+        logger.debug(f"Getting timeline of User.id={user.id}: limit={limit}")
+        # ResultFeedPageSchema
+        return TrustedJSONResponse(
+            {"result": True, "tweets": tweet_list, "next_cursor": next_cursor}
+        )
+
+
+async def live_feed_events(subscription: Subscription):
+    """
+    Server-sent events of subscription with keepalive comments while idle
+    """
+    try:
+        while not subscription.closed:
+            try:
+                message = await asyncio.wait_for(
+                    subscription.queue.get(), live_feed_keepalive_seconds
+                )
+            except asyncio.TimeoutError:
+                yield b": keepalive\n\n"
+                continue
+            if message is None:
+                break
+            yield message
+    finally:
+        live_feed.unsubscribe(subscription)
+
+
+@api_tweets_router.get(
+    "/stream",
+    responses={
+        200: {"content": {"text/event-stream": {}}},
+        401: {"model": BadResultSchema},
+    },
+)
+@auth_required_header
+async def stream_feed_events_handler(request: Request, session: RequestSession):
+    """
+    Endpoint to receive feed changes as server-sent events:
+    tweet (new tweet), delete (deleted tweet), like and unlike,
+    data is json with tweet_id and user_id.
+
+    Connection is closed if client does not keep up with events,
+    then feed should be re-read after reconnecting
+
+    <h3>Requires api-key header with valid api key</h3>
+    """
+    subscription = live_feed.subscribe()
+    logger.debug("Live feed subscriber connected")
+    return StreamingResponse(
+        live_feed_events(subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@api_tweets_router.get(
+    "/search",
+    responses={
+        200: {"model": ResultFeedPageSchema},
+        400: {"model": BadResultSchema},
+        401: {"model": BadResultSchema},
+        422: {"model": BadResultSchema},
+    },
+)
+@auth_required_header
+async def search_tweets_handler(
+    request: Request,
+    session: RequestSession,
+    q: str = Query(min_length=1, max_length=280),
+    limit: int = Query(default=default_feed_page_size, ge=1, le=max_feed_page_size),
+    cursor: Optional[str] = Query(default=None),
+):
+    """
+    Endpoint to search tweets by content.
+
+    Query supports web search syntax: "quoted phrase", or, -excluded word.
+    Sorted by relevance (best > worst).
+    Paginated by limit and cursor: pass next_cursor from previous page to get next one.
+
+    <h3>Requires api-key header with valid api key</h3>
+    """
+    after = decode_cursor(cursor, float, int) if cursor else None
+    query = tweets_search_select(q, limit + 1, after)
+    async with session.begin():
+        q_result = await session.execute(query)
+        rows = q_result.all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][1:])
+    logger.debug(f"Searching tweets: q={q} limit={limit} cursor={cursor}")
+    # ResultFeedPageSchema
+    return TrustedJSONResponse(
+        {
+            "result": True,
+            "tweets": [row.tweet for row in rows],
+            "next_cursor": next_cursor,
+        }
+    )
 
 
 @api_tweets_router.get(
@@ -108,10 +343,15 @@ async def get_feed_handler(request: Request):
     },
 )
 @auth_required_header
-async def get_tweet_handler(request: Request, tweet_id: int):
+async def get_tweet_handler(request: Request, session: RequestSession, tweet_id: int):
     """
     Endpoint to get tweet by id
 
+    Views are counted in buffer and written to database in batches,
+    returned views include ones buffered by worker
+
+    Responses carry weak ETag (not changed by views), matching If-None-Match gets 304
+
     Requires api-key header with valid api key
     """
     if tweet_id > 2**31 - 1:
@@ -119,22 +359,91 @@ async def get_tweet_handler(request: Request, tweet_id: int):
             status_code=404,
             content=NotFoundErrorResponse("Jokes on you").to_json(),
         )
-    async with async_session() as session:
-        async with session.begin():
-            await session.execute(
-                update(Tweet).where(Tweet.id == tweet_id).values(views=Tweet.views + 1)
-            )
-            logger.debug("Updating tweet views")
-            tweet_q = await session.execute(
-                select(Tweet).filter_by(id=tweet_id).join(User)
+    async with session.begin():
+        version = await session.scalar(
+            select(Tweet.version).where(Tweet.id == tweet_id)
+        )
+        if version is None:
+            return JSONResponse(
+                status_code=404,
+                content=NotFoundErrorResponse("Tweet not found").to_json(),
             )
-            tweet = tweet_q.unique().scalar_one_or_none()
-            if not tweet:
-                return JSONResponse(
-                    status_code=404,
-                    content=NotFoundErrorResponse("Tweet not found").to_json(),
-                )
-            return ResultTweetSchema(tweet=await tweet.to_safe_json())  # type: ignore[arg-type]
+        logger.debug("Updating tweet views")
+        views_buffer.add(tweet_id)
+        etag = make_etag("tweet", tweet_id, version)
+        if response := not_modified(request, etag):
+            return response
+        tweet_q = await session.execute(
+            tweets_select().add_columns(Tweet.views).where(Tweet.id == tweet_id)
+        )
+        row = tweet_q.one()
+        # ResultTweetSchema
+        return TrustedJSONResponse(
+            {
+                "result": True,
+                "tweet": {
+                    **row.tweet,
+                    "views": row.views + views_buffer.pending(tweet_id),
+                },
+            },
+            headers=etag_headers(etag),
+        )
+
+
+@api_tweets_router.post(
+    "/batch",
+    responses={
+        200: {"model": ResultTweetsBatchSchema},
+        401: {"model": BadResultSchema},
+        422: {"model": BadResultSchema},
+    },
+)
+@auth_required_header
+async def get_tweets_batch_handler(
+    request: Request, session: RequestSession, batch: TweetsBatchSchema
+):
+    """
+    Endpoint to get several tweets by ids at once.
+
+    Items are returned in order of requested ids, not existing tweets have found: false.
+
+    Views are counted like for GET /api/tweets/{tweet_id}
+
+    <h3>Requires api-key header with valid api key</h3>
+    """
+    requested_ids = set(batch.ids)
+    async with session.begin():
+        q = await session.execute(
+            tweets_select()
+            .add_columns(Tweet.id, Tweet.views)
+            .where(Tweet.id.in_(requested_ids))
+        )
+        flushed_views = {}
+        tweets = {}
+        for row in q:
+            flushed_views[row.id] = row.views
+            tweets[row.id] = row.tweet
+    logger.debug(f"Found {len(tweets)} of {len(requested_ids)} requested tweets")
+    for tweet_id, tweet in tweets.items():
+        views_buffer.add(tweet_id)
+        tweets[tweet_id] = {
+            **tweet,
+            "views": flushed_views[tweet_id] + views_buffer.pending(tweet_id),
+        }
+    # ResultTweetsBatchSchema
+    return TrustedJSONResponse(
+        {
+            "result": True,
+            "items": [
+                {
+                    "id": tweet_id,
+                    "found": tweet_id in tweets,
+                    "tweet": tweets.get(tweet_id),
+                }
+                for tweet_id in batch.ids
+            ],
+        }
+    )
 
 
 @api_tweets_router.post(
@@ -146,50 +455,60 @@ async def get_tweet_handler(request: Request, tweet_id: int):
     },
 )
 @auth_required_header
-async def post_tweet_handler(request: Request, new_tweet_data: NewTweetSchema):
+async def post_tweet_handler(
+    request: Request,
+    session: RequestSession,
+    new_tweet_data: NewTweetSchema,
+    background_tasks: BackgroundTasks,
+):
     """
     Endpoint to post new tweet.
 
     User is recognized by api-key header value
 
+    New tweet is added to followers' timelines and its #hashtags and @mentions
+    are indexed after response is sent
+
     <h3>Requires api-key header with valid api key</h3>
     """
-    async with async_session() as session:
-        async with session.begin():
-            user_id = (
-                await User.get_user_by_api_token(request.headers.get(api_key_keyword))
-            ).id
-            new_tweet = Tweet(content=new_tweet_data.tweet_data, user_id=user_id)
-            logger.debug("Attempting to create new Tweet")
-            session.add(new_tweet)
-            if new_tweet_data.tweet_media_ids:
-                logger.debug(f"Found Tweet.media_ids={new_tweet_data.tweet_media_ids}")
-                for image_id in new_tweet_data.tweet_media_ids:
-                    logger.debug(f"Searching for Image.id={image_id} in db")
-                    image = await session.execute(select(Image).filter_by(id=image_id))
-                    if not image.scalar_one_or_none():
-                        logger.debug(
-                            f"Updating Image: Image.id={image_id} - fail - not found image data in db"
-                        )
-                        await session.rollback()
-                        await session.close()
-                        return JSONResponse(
-                            status_code=422,
-                            content=NotFoundErrorResponse(
-                                f"Image id={image_id} is not downloaded yet"
-                            ).to_json(),
-                        )
-                    logger.debug("Found image data in db")
-                    await session.execute(
-                        update(Image)
-                        .filter_by(id=image_id)
-                        .values(tweet_id=new_tweet.id)
-                    )
+    async with session.begin():
+        user_id = request.state.user.id
+        new_tweet = Tweet(content=new_tweet_data.tweet_data, user_id=user_id)
+        logger.debug("Attempting to create new Tweet")
+        session.add(new_tweet)
+        if new_tweet_data.tweet_media_ids:
+            logger.debug(f"Found Tweet.media_ids={new_tweet_data.tweet_media_ids}")
+            for image_id in new_tweet_data.tweet_media_ids:
+                logger.debug(f"Searching for Image.id={image_id} in db")
+                image = await session.execute(select(Image).filter_by(id=image_id))
+                if not image.scalar_one_or_none():
                     logger.debug(
-                        f"Updated Image: Image.id={image_id} Tweet.id{new_tweet.id}"
+                        f"Updating Image: Image.id={image_id} - fail - not found image data in db"
+                    )
+                    await session.rollback()
+                    await session.close()
+                    return JSONResponse(
+                        status_code=422,
+                        content=NotFoundErrorResponse(
+                            f"Image id={image_id} is not downloaded yet"
+                        ).to_json(),
                     )
-            await session.commit()
+                logger.debug("Found image data in db")
+                await session.execute(
+                    update(Image).filter_by(id=image_id).values(tweet_id=new_tweet.id)
+                )
+                logger.debug(
+                    f"Updated Image: Image.id={image_id} Tweet.id{new_tweet.id}"
+                )
+        await session.flush()
+        await notify_feed_event(
+            session, "tweet", tweet_id=new_tweet.id, user_id=user_id
+        )
+        await session.commit()
     logger.debug("Tweet creation - success")
+    await feed_version.bump(session)
+    background_tasks.add_task(TimelineEntry.fan_out_tweet, new_tweet.id)
+    background_tasks.add_task(index_tweet, new_tweet.id)
 
     return ResultTweetCreationSchema(tweet_id=new_tweet.id)  # type: ignore[arg-type]
 
@@ -204,7 +523,9 @@ async def post_tweet_handler(request: Request, new_tweet_data: NewTweetSchema):
     },
 )
 @auth_required_header
-async def delete_tweet_handler(request: Request, tweet_id: int):
+async def delete_tweet_handler(
+    request: Request, session: RequestSession, tweet_id: int
+):
     """
     Endpoint delete tweet by id.
 
@@ -214,44 +535,41 @@ async def delete_tweet_handler(request: Request, tweet_id: int):
 
     <h3>Requires api-key header with valid api key</h3>
     """
-    async with async_session() as session:
-        async with session.begin():
-            user_id = (
-                await User.get_user_by_api_token(request.headers.get(api_key_keyword))
-            ).id
-            deleted_tweet = (
-                (await session.execute(select(Tweet).filter_by(id=tweet_id)))
-                .unique()
-                .scalar_one_or_none()
+    async with session.begin():
+        user_id = request.state.user.id
+        deleted_tweet = (
+            await session.execute(
+                select(Tweet)
+                .options(selectinload(Tweet.images_objects))
+                .filter_by(id=tweet_id)
             )
+        ).scalar_one_or_none()
+        logger.debug(f"Attempting delete Tweet: Tweet.id={tweet_id} User.id={user_id}")
+        if not deleted_tweet:
             logger.debug(
-                f"Attempting delete Tweet: Tweet.id={tweet_id} User.id={user_id}"
+                f"delete Tweet: Tweet.id={tweet_id} User.id={user_id} - fail - tweet not found"
             )
-            if not deleted_tweet:
-                logger.debug(
-                    f"delete Tweet: Tweet.id={tweet_id} User.id={user_id} - fail - tweet not found"
-                )
-                return JSONResponse(
-                    status_code=404,
-                    content=NotFoundErrorResponse("Tweet not found").to_json(),
-                )
-            elif deleted_tweet.tweet_author.id != user_id:
-                logger.debug(
-                    f"Attempting delete Tweet: Tweet.id={tweet_id} User.id={user_id} - fail - not authorized"
-                )
-                return JSONResponse(
-                    status_code=403,
-                    content=UnAuthorizedErrorResponse(
-                        "This is not your tweet"
-                    ).to_json(),
-                )
-            for image in deleted_tweet.images_objects:
-                logger.debug("Deleting tweet media from file system")
-                removed_image_path = os_path.join(
-                    media_path, f"{image.id}{image.file_extension}"
-                )
-                os_remove(removed_image_path)
-            await session.delete(deleted_tweet)
-            await session.commit()
+            return JSONResponse(
+                status_code=404,
+                content=NotFoundErrorResponse("Tweet not found").to_json(),
+            )
+        elif deleted_tweet.user_id != user_id:
+            logger.debug(
+                f"Attempting delete Tweet: Tweet.id={tweet_id} User.id={user_id} - fail - not authorized"
+            )
+            return JSONResponse(
+                status_code=403,
+                content=UnAuthorizedErrorResponse("This is not your tweet").to_json(),
+            )
+        for image in deleted_tweet.images_objects:
+            logger.debug("Deleting tweet media from file system")
+            removed_image_path = os_path.join(
+                media_path, f"{image.id}{image.file_extension}"
+            )
+            os_remove(removed_image_path)
+        await session.delete(deleted_tweet)
+        await notify_feed_event(session, "delete", tweet_id=tweet_id, user_id=user_id)
+        await session.commit()
     logger.debug("Tweet deleted")
+    await feed_version.bump(session)
     return DefaultPositiveResult()
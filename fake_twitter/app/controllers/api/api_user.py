@@ -3,26 +3,88 @@ Endpoints for getting user's info
 """
 
 import logging
-from typing import Optional
+from datetime import datetime
+from typing import Any, Optional
 
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, Query, Request
 from fastapi.responses import JSONResponse
-from sqlalchemy import Result, select
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from fake_twitter.app.auth_wrappers import auth_required_header
-from fake_twitter.app.config import api_key_keyword, logger_name
+from fake_twitter.app.config import (
+    default_feed_page_size,
+    default_follows_page_size,
+    logger_name,
+    max_feed_page_size,
+    max_follows_page_size,
+)
+from fake_twitter.app.dependencies import RequestSession
+from fake_twitter.app.etags import etag_headers, make_etag, not_modified
+from fake_twitter.app.pagination import decode_cursor, encode_cursor, keyset_before
+from fake_twitter.app.responses import TrustedJSONResponse
 from fake_twitter.app.schemas import (
     BadResultSchema,
     ProfileResultSchema,
+    ResultFeedPageSchema,
+    ResultUsersPageSchema,
+)
+from fake_twitter.db import Mention, Tweet, User, feed_version
+from fake_twitter.db.read_models import (
+    FOLLOW_LISTS,
+    follow_users_select,
+    profile_select,
+    tweets_by_id_select,
+    tweets_select,
 )
-from fake_twitter.db import Like, Tweet, User, async_session, Repost
 
 api_users_router = APIRouter(prefix="/users", tags=["users"])
 
 logger = logging.getLogger(logger_name)
 
 
+async def user_tweets_page(
+    session: AsyncSession, user_id: int, limit: int, cursor: Optional[str] = None
+) -> tuple[list[Any], Optional[str]]:
+    """
+    Page of user's tweets (TweetOutSchema shaped) newest first and cursor of the next page.
+
+    Page is read from tweets_user_created_index (user_id, created_at, id)
+    """
+    query = (
+        tweets_select()
+        .add_columns(Tweet.created_at, Tweet.id)
+        .where(Tweet.user_id == user_id)
+        .order_by(Tweet.created_at.desc(), Tweet.id.desc())
+        .limit(limit + 1)
+    )
+    if cursor:
+        query = query.where(
+            keyset_before(
+                (Tweet.created_at, Tweet.id),
+                decode_cursor(cursor, datetime.fromisoformat, int),
+            )
+        )
+    q = await session.execute(query)
+    rows = q.all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][1:])
+    return [row.tweet for row in rows], next_cursor
+
+
+def follows_page(users: list[Any], limit: int) -> tuple[list[Any], Optional[str]]:
+    """
+    First limit users (UserBaseOutSchema shaped, ordered by id DESC)
+    of limit + 1 fetched ones and cursor of the next page
+    """
+    if len(users) <= limit:
+        return users, None
+    users = users[:limit]
+    return users, encode_cursor([users[-1]["id"]])
+
+
 @api_users_router.get(
     "/{user_id:int}",
     responses={
@@ -39,7 +101,9 @@ logger = logging.getLogger(logger_name)
     },
 )
 @auth_required_header
-async def get_my_info_handler(request: Request, user_id: Optional[int] = None):
+async def get_my_info_handler(
+    request: Request, session: RequestSession, user_id: Optional[int] = None
+):
     """
     Endpoint to get user's info.
 
@@ -47,71 +111,223 @@ async def get_my_info_handler(request: Request, user_id: Optional[int] = None):
 
     /{user_id} user is recognized by id
 
+    Profile carries first page of user's tweets, next pages are at /{user_id}/tweets
+
+    Responses carry weak ETag, matching If-None-Match gets 304
+
     <h3>Requires api-key header with valid api key</h3>
     """
     if user_id:
         logger.debug(f"Requesting User: User.id={user_id}")
-        key = User.id == user_id
     else:
         logger.debug("Self info request")
-        key = User.api_key.ilike(request.headers.get(api_key_keyword))
-    async with async_session() as session:
-        async with session.begin():
-            query: Result[tuple[User]] = await session.execute(
-                select(User)
-                # .options(
-                #     selectinload(User.user_tweet_repost)
-                #     .options(
-                #         selectinload(Repost.reposted_tweet)
-                #         .options(
-                #             selectinload(Tweet.tweet_likes)
-                #             .options(selectinload(Like.user))
-                #         )
-                #         .options(selectinload(Tweet.user_tweet_repost))
-                #         .options(selectinload(Tweet.tweet_author))
-                #     )
-                # )
-                .options(
-                    selectinload(User.tweets)
-                    .options(
-                        selectinload(Tweet.tweet_likes).options(selectinload(Like.user))
-                    )
-                    .options(selectinload(Tweet.user_tweet_repost))
-                    .options(selectinload(Tweet.tweet_author))
-                )
-                .options(selectinload(User.followed))
-                .options(selectinload(User.followers))
-                .filter(key)
+        # already resolved by exact api-key lookup of auth wrapper
+        user_id = request.state.user.id
+    async with session.begin():
+        versions = await session.execute(
+            select(User.id, User.version).filter(User.id == user_id)
+        )
+        user_version = versions.one_or_none()
+        if not user_version:
+            logger.debug(f"User.id={user_id} not found")
+            return JSONResponse(
+                status_code=404,
+                content={
+                    "result": False,
+                    "error_type": "Not found",
+                    "error_msg": "User is not found",
+                },
             )
-            user: User | None = query.unique().scalar_one_or_none()
-            if not user:
-                logger.debug(f"User.id={user_id} not found")
-                return JSONResponse(
-                    status_code=404,
-                    content={
-                        "result": False,
-                        "error_type": "Not found",
-                        "error_msg": "User is not found",
-                    },
-                )
-
-            # my_reposts = [
-            #     await repost.to_safe_json() for repost in user.user_tweet_repost
-            # ]
-            tweets = [await tweet.to_safe_json() for tweet in user.tweets]
-            my_followed = [await user.to_safe_json() for user in user.followed]
-            my_followers = [await user.to_safe_json() for user in user.followers]
-
-            result = await user.to_safe_json()
-
-            # tweets.extend(my_reposts)
-            tweets.sort(key=lambda x: x.get("created_at"), reverse=True)
-            result.update(
-                {
-                    "tweets": tweets,
-                    "following": my_followed,
-                    "followers": my_followers,
-                }
+        # tweets of profile change with feed (new tweets, likes)
+        etag = make_etag("user", *user_version, await feed_version.current(session))
+        if response := not_modified(request, etag):
+            return response
+        query = await session.execute(
+            profile_select(default_follows_page_size + 1).filter(
+                User.id == user_version.id
             )
-            logger.debug("Requesting User info: success")
-            return ProfileResultSchema(user=result)
+        )
+        profile = query.scalar_one()
+        for follow_list in FOLLOW_LISTS:
+            profile[follow_list], profile[f"{follow_list}_next_cursor"] = follows_page(
+                profile[follow_list], default_follows_page_size
+            )
+        profile["tweets"], profile["tweets_next_cursor"] = await user_tweets_page(
+            session, user_version.id, default_feed_page_size
+        )
+        logger.debug("Requesting User info: success")
+        # ProfileResultSchema
+        return TrustedJSONResponse(
+            {"result": True, "user": profile}, headers=etag_headers(etag)
+        )
+
+
+async def get_follow_users_page(
+    session: AsyncSession,
+    follow_list: str,
+    user_id: int,
+    limit: int,
+    cursor: Optional[str],
+) -> TrustedJSONResponse:
+    """
+    Response with page of followers or followed users of user
+    """
+    after = decode_cursor(cursor, int)[0] if cursor else None
+    async with session.begin():
+        q = await session.execute(
+            follow_users_select(follow_list, user_id, limit + 1, after)
+        )
+        users, next_cursor = follows_page([row.user for row in q], limit)
+    logger.debug(f"Getting {follow_list} of User.id={user_id}: limit={limit}")
+    # ResultUsersPageSchema
+    return TrustedJSONResponse(
+        {"result": True, "users": users, "next_cursor": next_cursor}
+    )
+
+
+@api_users_router.get(
+    "/{user_id:int}/followers",
+    responses={
+        200: {"model": ResultUsersPageSchema},
+        400: {"model": BadResultSchema},
+        401: {"model": BadResultSchema},
+        422: {"model": BadResultSchema},
+    },
+)
+@auth_required_header
+async def get_followers_handler(
+    request: Request,
+    session: RequestSession,
+    user_id: int,
+    limit: int = Query(
+        default=default_follows_page_size, ge=1, le=max_follows_page_size
+    ),
+    cursor: Optional[str] = Query(default=None),
+):
+    """
+    Endpoint to get followers of user by id
+
+    Sorted by id of follower (newest users first).
+    Paginated by limit and cursor: pass next_cursor from previous page
+    (or followers_next_cursor of profile) to get next one.
+
+    <h3>Requires api-key header with valid api key</h3>
+    """
+    return await get_follow_users_page(session, "followers", user_id, limit, cursor)
+
+
+@api_users_router.get(
+    "/{user_id:int}/following",
+    responses={
+        200: {"model": ResultUsersPageSchema},
+        400: {"model": BadResultSchema},
+        401: {"model": BadResultSchema},
+        422: {"model": BadResultSchema},
+    },
+)
+@auth_required_header
+async def get_following_handler(
+    request: Request,
+    session: RequestSession,
+    user_id: int,
+    limit: int = Query(
+        default=default_follows_page_size, ge=1, le=max_follows_page_size
+    ),
+    cursor: Optional[str] = Query(default=None),
+):
+    """
+    Endpoint to get users followed by user by id
+
+    Sorted by id of followed user (newest users first).
+    Paginated by limit and cursor: pass next_cursor from previous page
+    (or following_next_cursor of profile) to get next one.
+
+    <h3>Requires api-key header with valid api key</h3>
+    """
+    return await get_follow_users_page(session, "following", user_id, limit, cursor)
+
+
+@api_users_router.get(
+    "/{user_id:int}/tweets",
+    responses={
+        200: {"model": ResultFeedPageSchema},
+        400: {"model": BadResultSchema},
+        401: {"model": BadResultSchema},
+        422: {"model": BadResultSchema},
+    },
+)
+@auth_required_header
+async def get_user_tweets_handler(
+    request: Request,
+    session: RequestSession,
+    user_id: int,
+    limit: int = Query(default=default_feed_page_size, ge=1, le=max_feed_page_size),
+    cursor: Optional[str] = Query(default=None),
+):
+    """
+    Endpoint to get tweets of user by id
+
+    Sorted by creation date (latest > earliest).
+    Paginated by limit and cursor: pass next_cursor from previous page
+    (or tweets_next_cursor of profile) to get next one.
+
+    <h3>Requires api-key header with valid api key</h3>
+    """
+    async with session.begin():
+        tweets, next_cursor = await user_tweets_page(session, user_id, limit, cursor)
+    logger.debug(f"Getting tweets of User.id={user_id}: limit={limit}")
+    # ResultFeedPageSchema
+    return TrustedJSONResponse(
+        {"result": True, "tweets": tweets, "next_cursor": next_cursor}
+    )
+
+
+@api_users_router.get(
+    "/{user_id:int}/mentions",
+    responses={
+        200: {"model": ResultFeedPageSchema},
+        400: {"model": BadResultSchema},
+        401: {"model": BadResultSchema},
+        422: {"model": BadResultSchema},
+    },
+)
+@auth_required_header
+async def get_user_mentions_handler(
+    request: Request,
+    session: RequestSession,
+    user_id: int,
+    limit: int = Query(default=default_feed_page_size, ge=1, le=max_feed_page_size),
+    cursor: Optional[str] = Query(default=None),
+):
+    """
+    Endpoint to get tweets mentioning user by id (@name)
+
+    Sorted by creation date (latest > earliest).
+    Paginated by limit and cursor: pass next_cursor from previous page to get next one.
+
+    <h3>Requires api-key header with valid api key</h3>
+    """
+    ids = (
+        select(Mention.tweet_id)
+        .where(Mention.user_id == user_id)
+        .order_by(Mention.tweet_id.desc())
+        .limit(limit + 1)
+    )
+    if cursor:
+        ids = ids.where(keyset_before((Mention.tweet_id,), decode_cursor(cursor, int)))
+    async with session.begin():
+        q = await session.execute(tweets_by_id_select(ids))
+        rows = q.all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][1:])
+    logger.debug(f"Getting mentions of User.id={user_id}: limit={limit}")
+    # ResultFeedPageSchema
+    return TrustedJSONResponse(
+        {
+            "result": True,
+            "tweets": [row.tweet for row in rows],
+            "next_cursor": next_cursor,
+        }
+    )
@@ -0,0 +1,43 @@
+"""
+FastAPI dependencies shared by endpoints
+"""
+
+from typing import Annotated, AsyncIterator
+
+from fastapi import Depends, Request
+from fastapi.security import HTTPBasic, HTTPBasicCredentials
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from fake_twitter.db import async_session, engine
+from fake_twitter.db.pool import pooled_connection
+
+from .identity import prefetch_identity
+from .routing import engine_for
+
+
+async def get_session(request: Request) -> AsyncIterator[AsyncSession]:
+    """
+    Session of request, used by auth wrappers and endpoint alike.
+
+    Session is bound to one pooled connection, so committing (and bumping versions
+    after commit) does not check out another one. Connection is returned to pool
+    as soon as endpoint function returns, before response is sent.
+
+    Connection is taken from read replica or primary, see routing module.
+    Api-key of request served by replica is resolved on primary first,
+    on connection returned to pool before replica one is checked out
+    """
+    from_engine = engine_for(request)
+    if from_engine is not engine:
+        await prefetch_identity(request)
+    async with pooled_connection(from_engine) as connection:
+        async with async_session(bind=connection) as session:
+            yield session
+
+
+RequestSession = Annotated[AsyncSession, Depends(get_session, scope="function")]
+
+# Credentials of Authorization: Basic header, None if there is no header
+BasicCredentials = Annotated[
+    HTTPBasicCredentials | None, Depends(HTTPBasic(auto_error=False))
+]
@@ -0,0 +1,37 @@
+"""
+Weak ETags built from cheap version data (row versions, data versions)
+
+Lets polling clients revalidate responses with If-None-Match and get 304
+before any heavy query is done
+"""
+
+from typing import Any
+
+from fastapi import Request
+from fastapi.responses import Response
+
+# responses depend on api-key, so only client may store them, revalidating every time
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts: Any) -> str:
+    return 'W/"' + "-".join(str(part) for part in parts) + '"'
+
+
+def etag_headers(etag: str) -> dict[str, str]:
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+
+def not_modified(request: Request, etag: str) -> Response | None:
+    """
+    304 response if If-None-Match header matches etag (weak comparison)
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return None
+    opaque_tag = etag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == opaque_tag:
+            return Response(status_code=304, headers=etag_headers(etag))
+    return None
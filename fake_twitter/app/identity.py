@@ -0,0 +1,128 @@
+"""
+Identity of authenticated user
+
+auth_required_header resolves api-key once per request and puts Identity
+to request.state.user, so handlers do not query user again.
+Resolved api-keys are cached in process for limited time.
+Cache misses are resolved on primary database, so created and deleted users
+are recognized at once despite replication lag: requests served by replica
+resolve api-key (prefetch_identity) before replica connection is checked out,
+so request never holds two connections at once
+"""
+
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from time import monotonic
+
+from fastapi import Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from fake_twitter.db import User, async_session, engine
+from fake_twitter.db.pool import pooled_connection
+
+from .config import (
+    api_key_keyword,
+    identity_cache_max_size,
+    identity_cache_ttl_seconds,
+    logger_name,
+)
+
+logger = logging.getLogger(logger_name)
+
+
+@dataclass(frozen=True, slots=True)
+class Identity:
+    """
+    Authenticated user of request
+    """
+
+    id: int
+    name: str
+
+
+class IdentityCache:
+    """
+    LRU cache of api-key -> Identity with time to live.
+
+    Only existing users are cached, so new users are recognized at once.
+    Deleted users are dropped from caches of all workers: admin endpoint publishes
+    their ids to IDENTITY_EVENTS_CHANNEL on commit, every worker receives them on
+    its live feed LISTEN connection. Only notifications missed while that connection
+    is being re-established leave deleted user valid, for up to ttl
+    """
+
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, tuple[float, Identity]] = OrderedDict()
+
+    def get(self, api_key: str) -> Identity | None:
+        """
+        Cached identity of api-key, None if it is not cached
+        """
+        entry = self._entries.get(api_key)
+        if entry is not None and entry[0] > monotonic():
+            self._entries.move_to_end(api_key)
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        return None
+
+    async def load(self, session: AsyncSession, api_key: str) -> Identity | None:
+        """
+        Identity of active user with api-key from database, None if there is no such user
+        """
+        user = await User.get_user_by_api_token(session, api_key)
+        if user is None:
+            self._entries.pop(api_key, None)
+            return None
+        identity = Identity(id=user.id, name=user.name)
+        self._entries[api_key] = (monotonic() + self.ttl, identity)
+        self._entries.move_to_end(api_key)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        return identity
+
+    def invalidate(self, api_key: str):
+        self._entries.pop(api_key, None)
+
+    def invalidate_user(self, user_id: int):
+        for api_key, (_, identity) in list(self._entries.items()):
+            if identity.id == user_id:
+                del self._entries[api_key]
+
+    def on_user_deleted(self, connection, pid: int, channel: str, payload: str):
+        """
+        Listener of IDENTITY_EVENTS_CHANNEL notifications
+        """
+        try:
+            self.invalidate_user(int(payload))
+        except ValueError:
+            logger.error(f"Malformed identity event: {payload}")
+
+    def stats(self) -> dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+async def prefetch_identity(request: Request):
+    """
+    Resolves api-key of request on primary, puts Identity (None for unknown api-key)
+    to request.state.user for auth_required_header
+    """
+    api_key = request.headers.get(api_key_keyword)
+    if not api_key:
+        return
+    identity = identity_cache.get(api_key)
+    if identity is None:
+        async with pooled_connection(engine) as connection:
+            async with async_session(bind=connection) as session:
+                identity = await identity_cache.load(session, api_key)
+    request.state.user = identity
+
+
+identity_cache = IdentityCache(
+    ttl=identity_cache_ttl_seconds, max_size=identity_cache_max_size
+)
@@ -0,0 +1,100 @@
+"""
+ASGI middleware reporting sql statements executed by request
+"""
+
+import json
+import logging
+from time import perf_counter
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from fake_twitter.db.instrumentation import QueryCounter, count_queries
+
+from .config import logger_name, n_plus_one_threshold
+
+QUERY_COUNT_HEADER = "X-Query-Count"
+SERVER_TIMING_HEADER = "Server-Timing"
+
+# Characters of statement shape written to N+1 log record
+logged_statement_length = 300
+
+logger = logging.getLogger(logger_name)
+
+
+def server_timing(counter: QueryCounter, app_seconds: float) -> str:
+    """
+    Server-Timing value: time of sql statements and of whole request processing
+    """
+    return (
+        f'db;dur={counter.duration * 1000:.1f};desc="{counter.count} queries", '
+        f"app;dur={app_seconds * 1000:.1f}"
+    )
+
+
+def log_request(scope: Scope, status: int, counter: QueryCounter, seconds: float):
+    """
+    One JSON log record per request with its statements totals,
+    warning record for every statement shape repeated n_plus_one_threshold times
+    """
+    request = {"method": scope["method"], "path": scope["path"]}
+    logger.info(
+        json.dumps(
+            {
+                "event": "request_sql",
+                **request,
+                "status": status,
+                "queries": counter.count,
+                "db_ms": round(counter.duration * 1000, 1),
+                "duration_ms": round(seconds * 1000, 1),
+            }
+        )
+    )
+    for shape, count in counter.repeated(n_plus_one_threshold):
+        logger.warning(
+            json.dumps(
+                {
+                    "event": "n_plus_one",
+                    **request,
+                    "count": count,
+                    "statement": shape[:logged_statement_length],
+                }
+            )
+        )
+
+
+class QueryCountMiddleware:
+    """
+    Adds X-Query-Count and Server-Timing headers with amount and time of statements
+    executed before response start, logs totals of whole request after it ends.
+
+    Plain ASGI middleware, so streaming responses are passed through untouched
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        counter = count_queries()
+        started = perf_counter()
+        status = 500
+
+        async def send_with_query_count(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append(QUERY_COUNT_HEADER, str(counter.count))
+                headers.append(
+                    SERVER_TIMING_HEADER,
+                    server_timing(counter, perf_counter() - started),
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_query_count)
+        finally:
+            log_request(scope, status, counter, perf_counter() - started)
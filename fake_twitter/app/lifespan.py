@@ -6,9 +6,15 @@ from os import getenv
 
 from sqlalchemy import select
 
-from fake_twitter.db import Admin, Base, async_session, engine
+from fake_twitter.db import Admin, async_session, engine, replica_engine
+from fake_twitter.db.notifications import IDENTITY_EVENTS_CHANNEL
+from fake_twitter.db.schema import check_schema_version
 
 from .config import logger_name
+from .identity import identity_cache
+from .live_feed import live_feed
+from .metrics import metrics_exporter
+from .views_buffer import views_buffer
 
 logger = logging.getLogger(logger_name)
 
@@ -18,20 +24,23 @@ async def basic_lifespan(*args, **kwargs):
     """
     Basic lifespan function.
 
-    Creates database if it doesn't exist
+    Checks that database schema is migrated to latest revision
+    (migrations are applied by alembic before start)
 
     Checks if there is admin
 
     If not - initiates creation of new one
 
-    If there is admin - yields to app process
+    If there is admin - starts background flushing of buffered tweet views,
+    listening to live feed and identity events, writing metrics snapshots and yields to app process
 
-    Before shutdown closes session and disposes database engine
+    Before shutdown closes live feed subscriptions, writes last metrics snapshot
+    and buffered views,
+    closes session and disposes database engines
     """
     logger.debug("Starting application")
-    async with engine.begin() as conn:
-        logger.debug("Creating database if not exists")
-        await conn.run_sync(Base.metadata.create_all)
+    logger.debug("Checking database schema version")
+    await check_schema_version()
     async with async_session() as session:
         async with session.begin():
             logger.debug("Checking if there is admin")
@@ -46,8 +55,17 @@ async def basic_lifespan(*args, **kwargs):
                 session.add(admin)
                 logger.debug("Created admin")
                 await session.commit()
+    views_buffer.start()
+    live_feed.add_channel(IDENTITY_EVENTS_CHANNEL, identity_cache.on_user_deleted)
+    live_feed.start()
+    metrics_exporter.start()
     logger.debug("Application started working")
     yield
     logger.debug("Shutting down app")
+    await live_feed.stop()
+    await metrics_exporter.stop()
+    await views_buffer.stop()
     await session.close()
     await engine.dispose()
+    if replica_engine is not engine:
+        await replica_engine.dispose()
@@ -0,0 +1,149 @@
+"""
+Live feed: broadcast of feed events to server-sent events subscribers
+
+Every worker keeps one dedicated LISTEN connection to postgres
+and fans received notifications out to bounded per-client queues.
+Other modules can listen to their channels on the same connection
+Client which does not keep up is dropped (it can reconnect and re-read the feed)
+instead of buffering events for it without limit
+"""
+
+import asyncio
+import json
+import logging
+from typing import Callable
+
+import asyncpg
+
+from fake_twitter.db.notifications import FEED_EVENTS_CHANNEL
+
+from .config import (
+    POSTGRES_DIRECT_URL,
+    live_feed_queue_size,
+    live_feed_reconnect_seconds,
+    logger_name,
+)
+
+logger = logging.getLogger(logger_name)
+
+
+class Subscription:
+    """
+    Queue of encoded server-sent events of single client
+    """
+
+    def __init__(self, max_size: int):
+        self.queue: asyncio.Queue[bytes | None] = asyncio.Queue(maxsize=max_size)
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+        try:
+            # wakes up waiting client, otherwise it sees closed after queued events
+            self.queue.put_nowait(None)
+        except asyncio.QueueFull:
+            pass
+
+
+class LiveFeed:
+    """
+    Per-worker listener of FEED_EVENTS_CHANNEL notifications
+    """
+
+    def __init__(self, queue_size: int, reconnect_interval: float):
+        self.queue_size = queue_size
+        self.reconnect_interval = reconnect_interval
+        self.dropped = 0
+        self._subscriptions: set[Subscription] = set()
+        self._channels: dict[str, Callable] = {
+            FEED_EVENTS_CHANNEL: self._on_notification
+        }
+        self._task: asyncio.Task | None = None
+
+    def add_channel(self, channel: str, callback: Callable):
+        """
+        Listens to channel too, callback gets (connection, pid, channel, payload).
+        Has to be called before start
+        """
+        self._channels[channel] = callback
+
+    def subscribe(self) -> Subscription:
+        subscription = Subscription(self.queue_size)
+        self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self._subscriptions.discard(subscription)
+
+    def broadcast(self, event: str, data: str):
+        """
+        Puts server-sent event to queues of all subscribers, dropping slow ones
+        """
+        message = f"event: {event}\ndata: {data}\n\n".encode()
+        for subscription in list(self._subscriptions):
+            try:
+                subscription.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                logger.warning("Dropping slow live feed subscriber")
+                self.dropped += 1
+                self._subscriptions.discard(subscription)
+                subscription.close()
+
+    def _on_notification(self, connection, pid: int, channel: str, payload: str):
+        try:
+            event = json.loads(payload)["event"]
+        except (ValueError, KeyError, TypeError):
+            logger.error(f"Malformed feed event: {payload}")
+            return
+        self.broadcast(event, payload)
+
+    async def _listen(self):
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(f"postgresql:{POSTGRES_DIRECT_URL}")
+                lost = asyncio.Event()
+                connection.add_termination_listener(lambda _: lost.set())
+                for channel, callback in self._channels.items():
+                    await connection.add_listener(channel, callback)
+                logger.debug("Listening to feed events")
+                await lost.wait()
+                logger.error("Feed events connection lost, reconnecting")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Can not listen to feed events, retrying")
+            finally:
+                if connection is not None:
+                    await connection.close()
+            await asyncio.sleep(self.reconnect_interval)
+
+    def start(self):
+        """
+        Starts listening in background
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        """
+        Stops listening and closes all subscriptions
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for subscription in self._subscriptions:
+            subscription.close()
+        self._subscriptions.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {"subscribers": len(self._subscriptions), "dropped": self.dropped}
+
+
+live_feed = LiveFeed(
+    queue_size=live_feed_queue_size, reconnect_interval=live_feed_reconnect_seconds
+)
@@ -0,0 +1,402 @@
+"""
+Prometheus metrics of requests, database pools and caches
+
+Every worker counts in its own memory without locks (requests of worker are served
+by one event loop thread) and periodically writes snapshot of its metrics to its own file
+in metrics_dir. GET /metrics merges snapshots of all workers: counters are summed
+over every snapshot (so totals do not drop when worker restarts), gauges only over
+snapshots of running workers.
+
+Snapshots not updated for retention window (of stopped workers) are folded into
+one compacted snapshot and removed, so number of files read by GET /metrics stays bounded
+"""
+
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import re
+from bisect import bisect_left
+from pathlib import Path
+from time import perf_counter, time
+from typing import Iterable
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from fake_twitter.db import engine, replica_engine
+from fake_twitter.db.pool import pool_stats
+
+from .config import (
+    latency_buckets,
+    logger_name,
+    metrics_dir,
+    metrics_flush_seconds,
+    metrics_retention_seconds,
+)
+from .identity import identity_cache
+from .live_feed import live_feed
+from .response_cache import feed_cache
+
+logger = logging.getLogger(logger_name)
+
+# name -> (type, help) of exposed metric families
+FAMILIES = {
+    "http_requests_total": ("counter", "Requests served, by route template and status"),
+    "http_request_duration_seconds": (
+        "histogram",
+        "Time from request start to response end, by route template",
+    ),
+    "http_requests_in_flight": ("gauge", "Requests being served"),
+    "db_pool_size": ("gauge", "Connections kept open by pools"),
+    "db_pool_checked_out": ("gauge", "Connections in use"),
+    "db_pool_overflow": ("gauge", "Connections opened above pool size"),
+    "db_pool_checkouts_total": ("counter", "Connections taken from pool"),
+    "db_pool_wait_seconds_total": ("counter", "Time spent waiting for connection"),
+    "db_pool_timeouts_total": ("counter", "Waits for connection which timed out"),
+    "cache_hits_total": ("counter", "Cache hits"),
+    "cache_misses_total": ("counter", "Cache misses"),
+    "cache_entries": ("gauge", "Entries in cache"),
+    "live_feed_subscribers": ("gauge", "Connected live feed clients"),
+    "live_feed_dropped_total": ("counter", "Live feed clients dropped as too slow"),
+}
+
+# {tweet_id:int} -> {tweet_id}
+_convertor = re.compile(r"\{(\w+):\w+\}")
+
+# (name, labels, value), labels are sorted (name, value) pairs
+Sample = tuple[str, tuple[tuple[str, str], ...], float]
+
+
+class RequestMetrics:
+    """
+    Requests counters and latency histograms of current worker
+    """
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.in_flight = 0
+        self._requests: dict[tuple[str, str, int], int] = {}
+        # (method, route) -> [requests in every bucket..., above last bucket], sum
+        self._durations: dict[tuple[str, str], tuple[list[int], list[float]]] = {}
+
+    def observe(self, method: str, route: str, status: int, seconds: float):
+        key = (method, route, status)
+        self._requests[key] = self._requests.get(key, 0) + 1
+        counts, total = self._durations.setdefault(
+            (method, route), ([0] * (len(self.buckets) + 1), [0.0])
+        )
+        counts[bisect_left(self.buckets, seconds)] += 1
+        total[0] += seconds
+
+    def samples(self) -> Iterable[Sample]:
+        for (method, route, status), count in self._requests.items():
+            labels = (("method", method), ("route", route), ("status", str(status)))
+            yield "http_requests_total", labels, count
+        name = "http_request_duration_seconds"
+        for (method, route), (counts, total) in self._durations.items():
+            labels = (("method", method), ("route", route))
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                yield f"{name}_bucket", (("le", str(bound)), *labels), cumulative
+            yield f"{name}_count", labels, cumulative
+            yield f"{name}_sum", labels, total[0]
+
+
+request_metrics = RequestMetrics(buckets=latency_buckets)
+
+
+def worker_samples() -> tuple[list[Sample], list[Sample]]:
+    """
+    Counters and gauges of current worker
+    """
+    counters = list(request_metrics.samples())
+    gauges: list[Sample] = [("http_requests_in_flight", (), request_metrics.in_flight)]
+    pools = {"primary": engine}
+    if replica_engine is not engine:
+        pools["replica"] = replica_engine
+    for pool_name, pool_engine in pools.items():
+        labels = (("pool", pool_name),)
+        stats = pool_stats(pool_engine)
+        gauges += [
+            ("db_pool_size", labels, stats["size"]),
+            ("db_pool_checked_out", labels, stats["checked_out"]),
+            ("db_pool_overflow", labels, stats["overflow"]),
+        ]
+        counters += [
+            ("db_pool_checkouts_total", labels, stats["checkouts"]),
+            (
+                "db_pool_wait_seconds_total",
+                labels,
+                stats["wait_avg_ms"] * stats["checkouts"] / 1000,
+            ),
+            ("db_pool_timeouts_total", labels, stats["timeouts"]),
+        ]
+    for cache_name, cache in (("feed", feed_cache), ("identity", identity_cache)):
+        labels = (("cache", cache_name),)
+        stats = cache.stats()
+        counters += [
+            ("cache_hits_total", labels, stats["hits"]),
+            ("cache_misses_total", labels, stats["misses"]),
+        ]
+        gauges.append(("cache_entries", labels, stats["entries"]))
+    live_feed_stats = live_feed.stats()
+    gauges.append(("live_feed_subscribers", (), live_feed_stats["subscribers"]))
+    counters.append(("live_feed_dropped_total", (), live_feed_stats["dropped"]))
+    return counters, gauges
+
+
+class MetricsExporter:
+    """
+    Writes snapshots of metrics of current worker, merges snapshots of all workers
+    """
+
+    compacted_name = "compacted.data"
+    lock_name = "compaction.lock"
+
+    def __init__(self, directory: str, flush_interval: float, retention: float):
+        self.directory = Path(directory)
+        self.flush_interval = flush_interval
+        self.retention = retention
+        # pid is reused after restart of worker, start time is not
+        self.path = self.directory / f"{os.getpid()}-{int(time() * 1000)}.json"
+        self._task: asyncio.Task | None = None
+
+    def _write(self, snapshot: dict, path: Path | None = None):
+        path = path or self.path
+        self.directory.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_suffix(".tmp")
+        temporary.write_text(json.dumps(snapshot))
+        # readers see either previous or new snapshot, never partially written one
+        temporary.replace(path)
+
+    async def flush(self, running: bool = True):
+        """
+        Writes snapshot of current worker (without gauges if worker is stopping)
+        """
+        counters, gauges = worker_samples()
+        snapshot = {
+            "updated": time(),
+            "counters": counters,
+            "gauges": gauges if running else [],
+        }
+        await asyncio.to_thread(self._write, snapshot)
+
+    def _read_snapshots(self) -> list[tuple[str, dict]]:
+        snapshots = []
+        for path in self.directory.glob("*.json"):
+            try:
+                snapshots.append((path.name, json.loads(path.read_text())))
+            except (OSError, ValueError):
+                # file of worker removed or replaced while being read
+                continue
+        return snapshots
+
+    def _read_compacted(self) -> dict:
+        """
+        Counters of removed snapshots and names of snapshots already counted in them
+        """
+        try:
+            return json.loads((self.directory / self.compacted_name).read_text())
+        except FileNotFoundError:
+            return {"counters": [], "merged": []}
+
+    def _compact(self):
+        """
+        Folds counters of snapshots not updated for retention window into compacted
+        snapshot and removes them. Done by one worker at a time, others skip it.
+
+        Compacted snapshot is written before removal and lists merged snapshots,
+        so they are never counted twice, even if removal fails
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.directory / self.lock_name, "a") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return
+            compacted = self._read_compacted()
+            snapshots = self._read_snapshots()
+            existing = {name for name, _ in snapshots}
+            merged = [name for name in compacted["merged"] if name in existing]
+            counters = {
+                (name, tuple(map(tuple, labels))): value
+                for name, labels, value in compacted["counters"]
+            }
+            expired_before = time() - self.retention
+            expired = [
+                name
+                for name, snapshot in snapshots
+                if name not in merged and snapshot["updated"] < expired_before
+            ]
+            if expired:
+                for name, snapshot in snapshots:
+                    if name not in expired:
+                        continue
+                    for sample_name, labels, value in snapshot["counters"]:
+                        key = (sample_name, tuple(map(tuple, labels)))
+                        counters[key] = counters.get(key, 0) + value
+                merged += expired
+                self._write(
+                    {
+                        "counters": [[*key, value] for key, value in counters.items()],
+                        "merged": merged,
+                    },
+                    self.directory / self.compacted_name,
+                )
+            # including snapshots merged before, whose removal failed
+            for name in merged:
+                (self.directory / name).unlink(missing_ok=True)
+
+    def _read_all(self) -> tuple[dict, dict]:
+        counters: dict[tuple, float] = {}
+        gauges: dict[tuple, float] = {}
+        stale_before = time() - 3 * self.flush_interval
+        # snapshots are read before compacted one: snapshot merged in between
+        # is listed in it and skipped, so it is counted exactly once
+        snapshots = self._read_snapshots()
+        compacted = self._read_compacted()
+        merged_names = set(compacted["merged"])
+        for name, labels, value in compacted["counters"]:
+            counters[(name, tuple(map(tuple, labels)))] = value
+        for name, snapshot in snapshots:
+            if name in merged_names:
+                continue
+            merged = [(counters, snapshot["counters"])]
+            if snapshot["updated"] >= stale_before:
+                merged.append((gauges, snapshot["gauges"]))
+            for totals, samples in merged:
+                for name, labels, value in samples:
+                    key = (name, tuple(map(tuple, labels)))
+                    totals[key] = totals.get(key, 0) + value
+        return counters, gauges
+
+    async def collect(self) -> str:
+        """
+        Metrics of all workers in Prometheus text format
+        """
+        await self.flush()
+        try:
+            await asyncio.to_thread(self._compact)
+        except OSError:
+            logger.exception("Metrics snapshots compaction failed")
+        counters, gauges = await asyncio.to_thread(self._read_all)
+        return render({**counters, **gauges})
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Metrics snapshot write failed")
+
+    def start(self):
+        """
+        Starts periodic writing of snapshots in background
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_periodically())
+
+    async def stop(self):
+        """
+        Stops periodic writing, keeps counters of worker in last snapshot
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.flush(running=False)
+        except Exception:
+            logger.exception("Metrics snapshot write failed")
+
+
+def _family(name: str) -> str:
+    for suffix in ("_bucket", "_count", "_sum"):
+        if name.endswith(suffix) and name.removesuffix(suffix) in FAMILIES:
+            return name.removesuffix(suffix)
+    return name
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render(samples: dict[tuple, float]) -> str:
+    """
+    Samples in Prometheus text exposition format, grouped by metric family
+    (order of samples inside family is kept, so histogram buckets stay ascending)
+    """
+    families: dict[str, list[str]] = {name: [] for name in FAMILIES}
+    for (name, labels), value in samples.items():
+        rendered_labels = ",".join(f'{key}="{_escape(str(v))}"' for key, v in labels)
+        line = f"{name}{{{rendered_labels}}} {value}" if labels else f"{name} {value}"
+        families.setdefault(_family(name), []).append(line)
+    lines = []
+    for name, family_lines in families.items():
+        if not family_lines:
+            continue
+        metric_type, help_text = FAMILIES[name]
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"]
+        lines += family_lines
+    return "\n".join(lines) + "\n"
+
+
+def route_template(scope: Scope) -> str:
+    """
+    Path template of endpoint which served request ("other" for docs and static files)
+    """
+    route_path = getattr(scope.get("route"), "path", None)
+    if not route_path:
+        return "other" if "endpoint" in scope else "unmatched"
+    # route of included router may have path without prefix of router,
+    # prefix is taken from request path
+    path_parts = scope["path"].split("/")
+    prefix = "/".join(path_parts[: max(len(path_parts) - route_path.count("/"), 1)])
+    return _convertor.sub(r"{\1}", prefix + route_path)
+
+
+class MetricsMiddleware:
+    """
+    Counts requests and their latency by route template (not by path,
+    so amount of series does not grow with ids in urls)
+
+    Plain ASGI middleware, so streaming responses are passed through untouched
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = perf_counter()
+        status = 500
+
+        async def send_with_status(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        request_metrics.in_flight += 1
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            request_metrics.in_flight -= 1
+            request_metrics.observe(
+                scope["method"], route_template(scope), status, perf_counter() - started
+            )
+
+
+metrics_exporter = MetricsExporter(
+    directory=metrics_dir,
+    flush_interval=metrics_flush_seconds,
+    retention=metrics_retention_seconds,
+)
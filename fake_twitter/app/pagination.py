@@ -0,0 +1,53 @@
+"""
+Keyset (cursor) pagination helpers
+"""
+
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from datetime import datetime
+from typing import Any, Callable, Sequence
+
+from fastapi import HTTPException
+from sqlalchemy import ColumnElement, literal, tuple_
+
+
+def encode_cursor(key: Sequence[Any]) -> str:
+    """
+    Packs sort key of the last returned row into opaque url-safe string
+    """
+    values = [
+        value.isoformat() if isinstance(value, datetime) else value for value in key
+    ]
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *converters: Callable[[Any], Any]) -> tuple[Any, ...]:
+    """
+    Unpacks cursor created by encode_cursor.
+
+    Every sort key value is passed through matching converter.
+    Raises 400 Bad request if cursor is malformed
+    """
+    try:
+        raw = urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(converters):
+            raise ValueError
+        return tuple(converter(value) for converter, value in zip(converters, values))
+    except (BinasciiError, UnicodeDecodeError, TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_before(
+    columns: Sequence[ColumnElement[Any]], key: Sequence[Any]
+) -> ColumnElement[bool]:
+    """
+    Row comparison (col_1, col_2, ...) < (key_1, key_2, ...) for DESC keyset pagination.
+
+    Key values are bound with types of matching columns
+    """
+    return tuple_(*columns) < tuple_(
+        *(literal(value, column.type) for column, value in zip(columns, key))
+    )
@@ -0,0 +1,68 @@
+"""
+In-process cache of encoded responses
+
+Entries are stored together with data version they were built from
+and are valid only while version did not change
+"""
+
+from collections import OrderedDict
+from typing import Hashable
+
+from .config import feed_cache_max_bytes
+
+
+class ResponseCache:
+    """
+    LRU cache of response bodies limited by total size in bytes
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[Hashable, tuple[Hashable, bytes]] = OrderedDict()
+
+    def get(self, key: Hashable, version: Hashable) -> bytes | None:
+        """
+        Cached body of response built from data of given version
+        """
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != version:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Hashable, version: Hashable, body: bytes):
+        """
+        Stores response body, evicting least recently used entries if needed
+        """
+        self._remove(key)
+        if len(body) > self.max_bytes:
+            return
+        self._entries[key] = (version, body)
+        self.size += len(body)
+        while self.size > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _remove(self, key: Hashable):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= len(entry[1])
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "size_bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+feed_cache = ResponseCache(max_bytes=feed_cache_max_bytes)
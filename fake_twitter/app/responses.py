@@ -0,0 +1,22 @@
+"""
+Fast responses for trusted internal data
+
+Payloads built by read models already have shape of response schemas,
+so they are encoded straight to bytes without pydantic validation
+"""
+
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from pydantic_core import to_json
+
+
+class TrustedJSONResponse(JSONResponse):
+    """
+    JSON response which skips validation. Accepts already encoded body as well
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return to_json(content)
@@ -0,0 +1,77 @@
+"""
+Routing of request sessions between primary database and read replica
+
+GET requests are served by replica, everything else by primary.
+Successful writing request sets cookie pinning client's GET requests to primary
+for read_your_writes_seconds, so he sees his changes despite replication lag.
+Cookie comes back to any worker, unlike state kept in process
+"""
+
+from math import ceil
+from time import time
+
+from fastapi import Request
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from fake_twitter.db import engine, replica_engine
+
+from .config import read_your_writes_seconds
+
+READ_METHODS = frozenset(("GET", "HEAD"))
+# unix time until which client reads from primary
+PRIMARY_COOKIE = "read_primary_until"
+
+
+def pinned_to_primary(request: Request) -> bool:
+    try:
+        until = float(request.cookies.get(PRIMARY_COOKIE, ""))
+    except ValueError:
+        return False
+    now = time()
+    # forged cookie can not pin client for longer than window
+    return now < until <= now + read_your_writes_seconds
+
+
+def engine_for(request: Request) -> AsyncEngine:
+    """
+    Engine which should serve request
+    """
+    if replica_engine is engine or request.method not in READ_METHODS:
+        return engine
+    if pinned_to_primary(request):
+        return engine
+    return replica_engine
+
+
+def primary_cookie() -> str:
+    return (
+        f"{PRIMARY_COOKIE}={time() + read_your_writes_seconds:.3f}; "
+        f"Max-Age={ceil(read_your_writes_seconds)}; Path=/; HttpOnly; SameSite=Lax"
+    )
+
+
+class ReadYourWritesMiddleware:
+    """
+    Sets primary pin cookie on successful responses of writing requests
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] in READ_METHODS
+            or replica_engine is engine
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message: Message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                MutableHeaders(scope=message).append("set-cookie", primary_cookie())
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
@@ -1,4 +1,4 @@
-from .admin_user_crud import AdminSchema, CreatedUserSchema
+from .admin_user_crud import AdminCredentialsSchema, AdminSchema, CreatedUserSchema
 from .profile import ProfileResultSchema
 from .repost import RepostOutSchema
 from .result import (
@@ -6,21 +6,34 @@ from .result import (
     DefaultPositiveResult,
     IntegrityErrorResponse,
     NotFoundErrorResponse,
+    ResultFeedPageSchema,
     ResultFeedSchema,
     ResultMediaSchema,
     ResultTweetCreationSchema,
     ResultTweetSchema,
+    ResultTweetsBatchSchema,
+    ResultUsersPageSchema,
     UnAuthenticatedErrorResponse,
     UnAuthorizedErrorResponse,
 )
-from .tweet import FeedOutSchema, NewTweetSchema, TweetOutSchema
+from .stats import StatsResultSchema
+from .tweet import (
+    FeedOutSchema,
+    NewTweetSchema,
+    TweetOutSchema,
+    TweetsBatchItemSchema,
+    TweetsBatchSchema,
+    TweetViewsOutSchema,
+)
 from .upload_file import FileExtensionValidator, FileSizeValidator
 from .user import UserBaseOutSchema
 
 __all__ = [
     "NewTweetSchema",
     "AdminSchema",
+    "AdminCredentialsSchema",
     "TweetOutSchema",
+    "TweetViewsOutSchema",
     "UserBaseOutSchema",
     "RepostOutSchema",
     "FeedOutSchema",
@@ -29,7 +42,12 @@ __all__ = [
     "BadResultSchema",
     "DefaultPositiveResult",
     "ResultFeedSchema",
+    "ResultFeedPageSchema",
     "ResultTweetSchema",
+    "ResultTweetsBatchSchema",
+    "ResultUsersPageSchema",
+    "TweetsBatchSchema",
+    "TweetsBatchItemSchema",
     "NotFoundErrorResponse",
     "UnAuthorizedErrorResponse",
     "UnAuthenticatedErrorResponse",
@@ -38,4 +56,5 @@ __all__ = [
     "FileSizeValidator",
     "FileExtensionValidator",
     "ResultMediaSchema",
+    "StatsResultSchema",
 ]
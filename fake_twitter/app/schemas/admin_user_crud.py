@@ -25,7 +25,7 @@ class UserDataSchemaCRUD(BaseModel):
     )
 
 
-class AdminSchema(BaseModel):
+class AdminCredentialsSchema(BaseModel):
     """
     Schema for admin's credentials validation
     """
@@ -39,6 +39,12 @@ class AdminSchema(BaseModel):
         examples=["123", "321"],
     )
 
+
+class AdminSchema(AdminCredentialsSchema):
+    """
+    Schema for admin's credentials and user's data validation
+    """
+
     user_data: UserDataSchemaCRUD = Field(title="New user's data")
 
 
@@ -2,10 +2,12 @@
 Schemas for validation of user's profile info
 """
 
+from typing import Optional
 
 from pydantic import Field
 
 from .result import DefaultPositiveResult
+from .tweet import TweetOutSchema
 from .user import UserBaseOutSchema
 
 
@@ -14,36 +16,59 @@ class ProfileOutSchema(UserBaseOutSchema):
     Schema for profile data response
     """
 
+    followers_count: int = Field(title="Amount of user's followers", examples=[2])
+    following_count: int = Field(title="Amount of users followed by user", examples=[2])
     following: list[UserBaseOutSchema] = Field(
-        title="List of user's followed users",
+        title="First page of user's followed users (newest users first)",
         examples=[
             [
-                {
-                    "id": 2,
-                    "name": "John",
-                },
                 {
                     "id": 3,
                     "name": "Jane",
                 },
+                {
+                    "id": 2,
+                    "name": "John",
+                },
             ],
         ],
     )
+    following_next_cursor: Optional[str] = Field(
+        title="Cursor of the next page of /api/users/{user_id}/following. "
+        "Null if there are no more users",
+        default=None,
+        examples=["WzQyXQ", None],
+    )
     followers: list[UserBaseOutSchema] = Field(
-        title="List of user's followers",
+        title="First page of user's followers (newest users first)",
         examples=[
             [
-                {
-                    "id": 4,
-                    "name": "John",
-                },
                 {
                     "id": 5,
                     "name": "Jane",
                 },
+                {
+                    "id": 4,
+                    "name": "John",
+                },
             ],
         ],
     )
+    followers_next_cursor: Optional[str] = Field(
+        title="Cursor of the next page of /api/users/{user_id}/followers. "
+        "Null if there are no more users",
+        default=None,
+        examples=["WzQyXQ", None],
+    )
+    tweets: list[TweetOutSchema] = Field(
+        title="First page of user's tweets (latest > earliest)",
+    )
+    tweets_next_cursor: Optional[str] = Field(
+        title="Cursor of the next page of /api/users/{user_id}/tweets. "
+        "Null if there are no more tweets",
+        default=None,
+        examples=["WyIyMDI0LTAyLTA0VDA5OjMwOjE0KzAwOjAwIiwxXQ", None],
+    )
 
 
 class ProfileResultSchema(DefaultPositiveResult):
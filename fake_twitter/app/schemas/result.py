@@ -4,11 +4,12 @@ Schemas for validation of different results output
 
 
 from dataclasses import dataclass
-from typing import Any, Sequence
+from typing import Any, Optional, Sequence
 
 from pydantic import BaseModel, Field
 
-from .tweet import FeedOutSchema, TweetOutSchema
+from .tweet import FeedOutSchema, TweetsBatchItemSchema, TweetViewsOutSchema
+from .user import UserBaseOutSchema
 
 
 class DefaultPositiveResult(BaseModel):
@@ -37,10 +38,37 @@ class ResultFeedSchema(DefaultPositiveResult, FeedOutSchema):
     ...
 
 
+class ResultFeedPageSchema(ResultFeedSchema):
+    """Schema for successful result response adding feed page and cursor of the next page"""
+
+    next_cursor: Optional[str] = Field(
+        title="Cursor of the next page. Null if there are no more tweets",
+        default=None,
+        examples=["WzAsIjIwMjQtMDItMDRUMDk6MzA6MTQrMDA6MDAiLDFd", None],
+    )
+
+
+class ResultUsersPageSchema(DefaultPositiveResult):
+    """Schema for successful result response adding page of users and cursor of the next page"""
+
+    users: list[UserBaseOutSchema] = Field()
+    next_cursor: Optional[str] = Field(
+        title="Cursor of the next page. Null if there are no more users",
+        default=None,
+        examples=["WzQyXQ", None],
+    )
+
+
 class ResultTweetSchema(DefaultPositiveResult):
     """Schema for successful result response adding tweet data"""
 
-    tweet: TweetOutSchema = Field()
+    tweet: TweetViewsOutSchema = Field()
+
+
+class ResultTweetsBatchSchema(DefaultPositiveResult):
+    """Schema for successful result response adding tweets in order of requested ids"""
+
+    items: list[TweetsBatchItemSchema] = Field()
 
 
 class BadResultSchema(DefaultPositiveResult):
@@ -0,0 +1,70 @@
+"""
+Schemas for validation of service statistics output
+"""
+
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+from .result import DefaultPositiveResult
+
+
+class CacheStatsSchema(BaseModel):
+    """
+    Schema for response cache statistics of current worker
+    """
+
+    entries: int = Field(title="Amount of cached responses")
+    size_bytes: int = Field(title="Total size of cached responses")
+    max_bytes: int = Field(title="Cache size limit")
+    hits: int = Field(title="Requests served from cache")
+    misses: int = Field(title="Requests not found in cache")
+    evictions: int = Field(title="Responses evicted to fit size limit")
+
+
+class LiveFeedStatsSchema(BaseModel):
+    """
+    Schema for live feed statistics of current worker
+    """
+
+    subscribers: int = Field(title="Connected server-sent events clients")
+    dropped: int = Field(title="Clients dropped for not keeping up with events")
+
+
+class IdentityCacheStatsSchema(BaseModel):
+    """
+    Schema for api-key cache statistics of current worker
+    """
+
+    entries: int = Field(title="Amount of cached api-keys")
+    hits: int = Field(title="Api-keys resolved from cache")
+    misses: int = Field(title="Api-keys looked up in database")
+
+
+class DbPoolStatsSchema(BaseModel):
+    """
+    Schema for database connection pool statistics of current worker
+    """
+
+    size: int = Field(title="Connections kept open by pool")
+    checked_out: int = Field(title="Connections in use")
+    idle: int = Field(title="Open connections waiting for use")
+    overflow: int = Field(title="Connections opened above pool size")
+    checkouts: int = Field(title="Connections given to requests")
+    wait_avg_ms: float = Field(title="Average wait of request for connection")
+    wait_max_ms: float = Field(title="Longest wait of request for connection")
+    timeouts: int = Field(title="Requests failed waiting for connection")
+
+
+class StatsResultSchema(DefaultPositiveResult):
+    """
+    Schema for statistics response, paired with default positive response {"result": True}
+    """
+
+    feed_cache: CacheStatsSchema = Field(title="Global feed cache statistics")
+    live_feed: LiveFeedStatsSchema = Field(title="Live feed statistics")
+    identity_cache: IdentityCacheStatsSchema = Field(title="Api-key cache statistics")
+    db_pool: DbPoolStatsSchema = Field(title="Database connection pool statistics")
+    db_replica_pool: Optional[DbPoolStatsSchema] = Field(
+        default=None, title="Read replica connection pool statistics"
+    )
@@ -3,10 +3,12 @@ Schemas for validation of Tweet CRUD
 """
 
 
-from typing import Optional
+from typing import Annotated, Optional
 
 from pydantic import BaseModel, Field
 
+from fake_twitter.app.config import max_tweets_batch_size
+
 from .user import UserBaseOutSchema
 
 
@@ -20,6 +22,15 @@ class NewTweetSchema(BaseModel):
     )
 
 
+class TweetsBatchSchema(BaseModel):
+    ids: list[Annotated[int, Field(ge=1, le=2**31 - 1)]] = Field(
+        title="Ids of requested tweets",
+        min_length=1,
+        max_length=max_tweets_batch_size,
+        examples=[[1, 2, 22]],
+    )
+
+
 class TweetOutSchema(BaseModel):
     id: int = Field(
         title="Tweet id",
@@ -65,6 +76,13 @@ class TweetOutSchema(BaseModel):
     # )
 
 
+class TweetViewsOutSchema(TweetOutSchema):
+    views: int = Field(
+        title="Tweet's views, including not yet written to database",
+        examples=[0, 1, 2, 3],
+    )
+
+
 class FeedOutSchema(BaseModel):
     tweets: list[TweetOutSchema] = Field(
         title="Tweets list. If /personal - tweets are sorted by user's follows",
@@ -99,3 +117,11 @@ class FeedOutSchema(BaseModel):
             ]
         ],
     )
+
+
+class TweetsBatchItemSchema(BaseModel):
+    id: int = Field(title="Requested tweet id", examples=[1, 2, 22])
+    found: bool = Field(title="Whether tweet exists")
+    tweet: Optional[TweetViewsOutSchema] = Field(
+        title="Tweet data. Null if tweet is not found", default=None
+    )
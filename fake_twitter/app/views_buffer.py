@@ -0,0 +1,112 @@
+"""
+Buffered tweet views counter
+
+Views are aggregated in memory per tweet id and periodically written
+to database with single multi-row UPDATE ... FROM (VALUES ...).
+Endpoints returning views add pending views of worker to flushed ones
+"""
+
+import asyncio
+import logging
+
+from sqlalchemy import Integer, column, update, values
+
+from fake_twitter.db import Tweet, async_session, views_version
+from fake_twitter.db.ranking import add_event, event_score
+
+from .config import hot_weights, logger_name, views_flush_seconds
+
+logger = logging.getLogger(logger_name)
+
+
+class ViewsBuffer:
+    """
+    In-process buffer of tweet views increments
+    """
+
+    def __init__(self, flush_interval: float):
+        self.flush_interval = flush_interval
+        self._deltas: dict[int, int] = {}
+        self._task: asyncio.Task | None = None
+
+    def add(self, tweet_id: int, amount: int = 1):
+        """
+        Adds views to tweet. Written to database on next flush
+        """
+        self._deltas[tweet_id] = self._deltas.get(tweet_id, 0) + amount
+
+    def pending(self, tweet_id: int) -> int:
+        """
+        Views of tweet not yet written to database
+        """
+        return self._deltas.get(tweet_id, 0)
+
+    async def flush(self):
+        """
+        Writes all buffered views to database with one statement
+        """
+        if not self._deltas:
+            return
+        deltas, self._deltas = self._deltas, {}
+        # sorted ids keep row lock order the same between workers
+        deltas_table = values(
+            column("id", Integer), column("delta", Integer), name="views_deltas"
+        ).data(sorted(deltas.items()))
+        try:
+            async with async_session() as session:
+                async with session.begin():
+                    await session.execute(
+                        update(Tweet)
+                        .where(Tweet.id == deltas_table.c.id)
+                        .values(
+                            views=Tweet.views + deltas_table.c.delta,
+                            hot_score=add_event(
+                                Tweet.hot_score,
+                                event_score(deltas_table.c.delta * hot_weights["view"]),
+                            ),
+                        )
+                    )
+        except Exception:
+            logger.exception("Views flush failed, keeping views for next attempt")
+            for tweet_id, delta in deltas.items():
+                self.add(tweet_id, delta)
+            raise
+        logger.debug(f"Flushed views of {len(deltas)} tweets")
+        # only views ordered feed pages depend on views
+        async with async_session() as session:
+            await views_version.bump(session)
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception:
+                # already logged by flush, views are kept for next attempt
+                continue
+
+    def start(self):
+        """
+        Starts periodic flushing in background
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_periodically())
+
+    async def stop(self):
+        """
+        Stops periodic flushing and writes everything left in buffer
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.flush()
+        except Exception:
+            logger.error(f"Views of {len(self._deltas)} tweets were lost on shutdown")
+
+
+views_buffer = ViewsBuffer(flush_interval=views_flush_seconds)
@@ -0,0 +1,7 @@
+"""
+Benchmarks. Run as modules against configured database, e.g.:
+
+python -m fake_twitter.benchmarks.feed_serialization
+
+Synthetic data is created inside a transaction which is rolled back at the end
+"""
@@ -0,0 +1,141 @@
+"""
+Benchmark of feed page serialization:
+ORM objects + to_safe_json + validated schema vs SQL read model + trusted encoding
+
+Usage: python -m fake_twitter.benchmarks.feed_serialization [--tweets 10000] [--page 100]
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+from time import perf_counter
+
+from sqlalchemy import ARRAY, Integer, bindparam, event, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from fake_twitter.app.responses import TrustedJSONResponse
+from fake_twitter.app.schemas import ResultFeedSchema
+from fake_twitter.db import Like, Tweet, engine
+from fake_twitter.db.read_models import tweets_select
+
+FEED_ORDER = (Tweet.views.desc(), Tweet.created_at.desc(), Tweet.id.desc())
+
+
+async def seed(session: AsyncSession, users: int, tweets: int, likes: int):
+    """
+    Creates synthetic users, tweets and likes
+    """
+    user_ids = (
+        (
+            await session.execute(
+                text(
+                    "INSERT INTO users (name, api_key, active) "
+                    "SELECT 'bench_user_' || i, 'bench_key_' || i, true "
+                    "FROM generate_series(1, :users) i RETURNING id"
+                ),
+                {"users": users},
+            )
+        )
+        .scalars()
+        .all()
+    )
+    ids_param = bindparam("user_ids", type_=ARRAY(Integer))
+    await session.execute(
+        text(
+            "INSERT INTO tweets (content, views, user_id) "
+            "SELECT 'bench tweet ' || i, (random() * 1000)::int, "
+            "(:user_ids)[1 + i % :users] FROM generate_series(1, :tweets) i"
+        ).bindparams(ids_param),
+        {"user_ids": user_ids, "users": users, "tweets": tweets},
+    )
+    await session.execute(
+        text(
+            "INSERT INTO likes (tweet_id, user_id) "
+            "SELECT tweets.id, (:user_ids)[1 + (tweets.id + k) % :users] "
+            "FROM tweets, generate_series(1, :likes) k "
+            "WHERE tweets.content LIKE 'bench tweet %'"
+        ).bindparams(ids_param),
+        {"user_ids": user_ids, "users": users, "likes": min(likes, users)},
+    )
+    await session.execute(text("ANALYZE"))
+
+
+async def orm_page(session: AsyncSession, page: int) -> bytes:
+    session.expunge_all()
+    q = await session.execute(
+        select(Tweet)
+        .options(
+            selectinload(Tweet.tweet_author),
+            selectinload(Tweet.tweet_likes).selectinload(Like.user),
+            selectinload(Tweet.images_objects),
+        )
+        .order_by(*FEED_ORDER)
+        .limit(page)
+    )
+    tweets = q.scalars().all()
+    result = ResultFeedSchema(tweets=[await tweet.to_safe_json() for tweet in tweets])
+    return result.model_dump_json().encode()
+
+
+async def read_model_page(session: AsyncSession, page: int) -> bytes:
+    q = await session.execute(tweets_select().order_by(*FEED_ORDER).limit(page))
+    return TrustedJSONResponse({"result": True, "tweets": q.scalars().all()}).body
+
+
+async def measure(name: str, page_func, session: AsyncSession, page: int, repeat: int):
+    statements = 0
+
+    def count_statement(*args):
+        nonlocal statements
+        statements += 1
+
+    timings = []
+    result = None
+    event.listen(engine.sync_engine, "before_cursor_execute", count_statement)
+    try:
+        for _ in range(repeat):
+            started = perf_counter()
+            result = await page_func(session, page)
+            timings.append((perf_counter() - started) * 1000)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", count_statement)
+    print(
+        f"{name:<12} median {statistics.median(timings):9.2f} ms | "
+        f"min {min(timings):9.2f} ms | statements per page {statements / repeat:.0f}"
+    )
+    return result
+
+
+async def main(args: argparse.Namespace):
+    async with engine.connect() as connection:
+        transaction = await connection.begin()
+        session = AsyncSession(bind=connection, expire_on_commit=False)
+        try:
+            await seed(session, args.users, args.tweets, args.likes)
+            print(
+                f"{args.tweets} tweets, {args.users} users, "
+                f"{args.likes} likes per tweet, page of {args.page}"
+            )
+            orm = await measure("orm", orm_page, session, args.page, args.repeat)
+            read_model = await measure(
+                "read model", read_model_page, session, args.page, args.repeat
+            )
+            assert [tweet["id"] for tweet in json.loads(orm)["tweets"]] == [
+                tweet["id"] for tweet in json.loads(read_model)["tweets"]
+            ], "Read model returned other tweets than ORM"
+        finally:
+            await session.close()
+            await transaction.rollback()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--tweets", type=int, default=10000)
+    parser.add_argument("--likes", type=int, default=20, help="likes per tweet")
+    parser.add_argument("--page", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,128 @@
+"""
+Benchmark of tweets search:
+full-text search over GIN index vs ILIKE scan of content
+
+Usage: python -m fake_twitter.benchmarks.tweet_search [--tweets 1000000] [--page 20]
+"""
+
+import argparse
+import asyncio
+import statistics
+from time import perf_counter
+
+from sqlalchemy import ARRAY, String, bindparam, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from fake_twitter.db import Tweet, engine
+from fake_twitter.db.read_models import tweets_search_select, tweets_select
+
+WORDS = (
+    "python postgres fastapi twitter index search query cache async feed "
+    "cat dog coffee morning rain weekend music football code bug deploy "
+    "release vacation pizza book movie train airport sunset mountain river"
+).split()
+
+# last one matches nothing: worst case for a scan
+QUERIES = [
+    "postgres",
+    "coffee morning",
+    '"sunset mountain"',
+    "deploy -bug",
+    "kubernetes",
+]
+
+
+async def seed(session: AsyncSession, users: int, tweets: int):
+    """
+    Creates synthetic users and tweets of 10 random words each
+    """
+    await session.execute(
+        text(
+            "INSERT INTO users (name, api_key, active) "
+            "SELECT 'bench_user_' || i, 'bench_key_' || i, true "
+            "FROM generate_series(1, :users) i"
+        ),
+        {"users": users},
+    )
+    await session.execute(
+        text(
+            "INSERT INTO tweets (content, views, user_id) "
+            "SELECT ("
+            "  SELECT string_agg((:words)[1 + floor(random() * :words_count)::int], ' ') "
+            "  FROM generate_series(1, 10) WHERE i > 0"
+            "), 0, (SELECT min(id) FROM users WHERE name LIKE 'bench_user_%') "
+            "+ i % :users FROM generate_series(1, :tweets) i"
+        ).bindparams(bindparam("words", type_=ARRAY(String))),
+        {"words": WORDS, "words_count": len(WORDS), "users": users, "tweets": tweets},
+    )
+    await session.execute(text("ANALYZE tweets"))
+
+
+async def full_text_page(session: AsyncSession, query: str, page: int) -> list:
+    q = await session.execute(tweets_search_select(query, page))
+    return q.all()
+
+
+async def ilike_page(session: AsyncSession, query: str, page: int) -> list:
+    # what was possible before: substring scan of tweets by first word of query
+    word = query.strip('"').split()[0]
+    q = await session.execute(
+        tweets_select()
+        .where(Tweet.content.ilike(f"%{word}%"))
+        .order_by(Tweet.id.desc())
+        .limit(page)
+    )
+    return q.all()
+
+
+async def measure(name: str, page_func, session: AsyncSession, page: int, repeat: int):
+    for query in QUERIES:
+        timings = []
+        rows = []
+        for _ in range(repeat):
+            started = perf_counter()
+            rows = await page_func(session, query, page)
+            timings.append((perf_counter() - started) * 1000)
+        print(
+            f"{name:<10} {query!r:<20} median {statistics.median(timings):9.2f} ms | "
+            f"min {min(timings):9.2f} ms | rows {len(rows)}"
+        )
+
+
+async def explain(session: AsyncSession, query: str, page: int):
+    compiled = tweets_search_select(query, page).compile(dialect=engine.dialect)
+    connection = await session.connection()
+    plan = await connection.exec_driver_sql(
+        f"EXPLAIN (ANALYZE, COSTS OFF) {compiled}",
+        tuple(compiled.params[name] for name in compiled.positiontup),
+    )
+    print("\n".join(row[0] for row in plan))
+
+
+async def main(args: argparse.Namespace):
+    async with engine.connect() as connection:
+        transaction = await connection.begin()
+        session = AsyncSession(bind=connection, expire_on_commit=False)
+        try:
+            started = perf_counter()
+            await seed(session, args.users, args.tweets)
+            print(
+                f"{args.tweets} tweets of {args.users} users seeded "
+                f"in {perf_counter() - started:.1f} s, page of {args.page}"
+            )
+            await measure("full text", full_text_page, session, args.page, args.repeat)
+            await measure("ilike", ilike_page, session, args.page, args.repeat)
+            await explain(session, QUERIES[0], args.page)
+        finally:
+            await session.close()
+            await transaction.rollback()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--tweets", type=int, default=1_000_000)
+    parser.add_argument("--page", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=10)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,107 @@
+"""
+Benchmark of user lookup by api-key:
+exact match over unique index of api_key vs ILIKE scan of users
+
+Fails (exit code 1) if exact lookup is not planned as index scan
+
+Usage: python -m fake_twitter.benchmarks.user_lookup [--users 1000000]
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+from time import perf_counter
+
+from sqlalchemy import Select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from fake_twitter.db import User, engine
+
+
+async def seed(session: AsyncSession, users: int):
+    """
+    Creates synthetic users with api-keys looking like uuid4
+    """
+    await session.execute(
+        text(
+            "INSERT INTO users (name, api_key, active) "
+            "SELECT 'bench_user_' || i, gen_random_uuid()::text, true "
+            "FROM generate_series(1, :users) i"
+        ),
+        {"users": users},
+    )
+    await session.execute(text("ANALYZE users"))
+
+
+def exact_select(api_key: str) -> Select:
+    # lookup of auth wrapper (identity cache miss)
+    return User.lean_select().filter_by(api_key=api_key, active=True)
+
+
+def ilike_select(api_key: str) -> Select:
+    # what /users/me did before
+    return User.lean_select().filter(User.api_key.ilike(api_key))
+
+
+async def measure(
+    name: str, select_func, session: AsyncSession, api_keys: list[str], repeat: int
+):
+    timings = []
+    for _ in range(repeat):
+        for api_key in api_keys:
+            started = perf_counter()
+            found = (await session.execute(select_func(api_key))).scalar_one()
+            timings.append((perf_counter() - started) * 1000)
+            session.expunge(found)
+    print(
+        f"{name:<6} median {statistics.median(timings):9.3f} ms | "
+        f"max {max(timings):9.3f} ms | lookups {len(timings)}"
+    )
+
+
+async def explain(session: AsyncSession, query: Select) -> list[str]:
+    compiled = query.compile(dialect=engine.dialect)
+    connection = await session.connection()
+    plan = await connection.exec_driver_sql(
+        f"EXPLAIN (ANALYZE, COSTS OFF) {compiled}",
+        tuple(compiled.params[name] for name in compiled.positiontup),
+    )
+    return [row[0] for row in plan]
+
+
+async def main(args: argparse.Namespace) -> bool:
+    async with engine.connect() as connection:
+        transaction = await connection.begin()
+        session = AsyncSession(bind=connection, expire_on_commit=False)
+        try:
+            started = perf_counter()
+            await seed(session, args.users)
+            print(f"{args.users} users seeded in {perf_counter() - started:.1f} s")
+            sampled = await session.execute(
+                text(
+                    "SELECT api_key FROM users WHERE name LIKE 'bench_user_%' "
+                    "ORDER BY random() LIMIT :lookups"
+                ),
+                {"lookups": args.lookups},
+            )
+            api_keys = list(sampled.scalars())
+            await measure("exact", exact_select, session, api_keys, args.repeat)
+            await measure("ilike", ilike_select, session, api_keys, 1)
+            plan = await explain(session, exact_select(api_keys[0]))
+            print("\n".join(plan))
+        finally:
+            await session.close()
+            await transaction.rollback()
+    await engine.dispose()
+    return "Index Scan" in plan[0]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=10)
+    if not asyncio.run(main(parser.parse_args())):
+        print("Exact lookup is not an index scan", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,5 @@
+"""
+Maintenance commands. Run as modules, e.g.:
+
+python -m fake_twitter.commands.reconcile_counters
+"""
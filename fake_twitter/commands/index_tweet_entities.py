@@ -0,0 +1,51 @@
+"""
+Command to extract #hashtags and @mentions of existing tweets
+
+Tweets are processed in batches by id, every batch in its own transaction,
+so command can be interrupted and started again
+
+Usage: python -m fake_twitter.commands.index_tweet_entities [--batch-size 1000]
+"""
+
+import argparse
+import asyncio
+import logging
+
+from sqlalchemy import select
+
+from fake_twitter.app.config import logger_name
+from fake_twitter.db import Tweet, async_session, engine
+from fake_twitter.db.extraction import index_tweets
+
+logger = logging.getLogger(logger_name)
+
+
+async def index_tweet_entities(batch_size: int):
+    last_id = 0
+    indexed = 0
+    while True:
+        async with async_session() as session:
+            async with session.begin():
+                tweets = (
+                    await session.execute(
+                        select(Tweet.id, Tweet.content)
+                        .where(Tweet.id > last_id)
+                        .order_by(Tweet.id)
+                        .limit(batch_size)
+                    )
+                ).all()
+                if not tweets:
+                    break
+                await index_tweets(session, tweets)
+        last_id = tweets[-1].id
+        indexed += len(tweets)
+        logger.info(f"Indexed {indexed} tweets, last Tweet.id={last_id}")
+    logger.warning(f"Indexed hashtags and mentions of {indexed} tweets")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(index_tweet_entities(parser.parse_args().batch_size))
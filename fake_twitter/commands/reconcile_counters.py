@@ -0,0 +1,27 @@
+"""
+Command to repair drift of denormalized counters of tweets (likes_count, reposts_count)
+and users (followers_count, following_count)
+
+Usage: python -m fake_twitter.commands.reconcile_counters
+"""
+
+import asyncio
+import logging
+
+from fake_twitter.app.config import logger_name
+from fake_twitter.db import Tweet, User, engine
+
+logger = logging.getLogger(logger_name)
+
+
+async def reconcile_counters():
+    fixed = await Tweet.reconcile_counters()
+    logger.warning(f"Reconciled counters of {fixed} tweets")
+    fixed = await User.reconcile_counters()
+    logger.warning(f"Reconciled counters of {fixed} users")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(reconcile_counters())
@@ -1,5 +1,18 @@
-from .base import Base, async_session, engine
-from .models import Admin, Follow, Image, Like, Repost, Tweet, User
+from .base import Base, async_session, engine, replica_engine
+from .models import (
+    Admin,
+    Follow,
+    Hashtag,
+    Image,
+    Like,
+    Mention,
+    Repost,
+    TimelineEntry,
+    Tweet,
+    TweetHashtag,
+    User,
+)
+from .versions import feed_version, views_version
 
 __all__ = [
     "User",
@@ -10,6 +23,13 @@ __all__ = [
     "Follow",
     "Base",
     "Admin",
+    "TimelineEntry",
+    "Hashtag",
+    "TweetHashtag",
+    "Mention",
     "engine",
+    "replica_engine",
     "async_session",
+    "feed_version",
+    "views_version",
 ]
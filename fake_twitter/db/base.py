@@ -1,14 +1,52 @@
 """
 Module of base sqlalchemy settings
 """
-from os import getenv
+from uuid import uuid4
 
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import declarative_base
 
-from fake_twitter.app.config import POSTGRES_URL
+from fake_twitter.app.config import (
+    POSTGRES_REPLICA_URL,
+    POSTGRES_URL,
+    db_max_overflow,
+    db_pool_pre_ping,
+    db_pool_recycle,
+    db_pool_size,
+    db_pool_timeout,
+    pgbouncer_mode,
+)
+
+connect_args = {}
+if pgbouncer_mode:
+    # pgbouncer may run every transaction on other server connection:
+    # no statements cache, unique names of prepared statements
+    connect_args = {
+        "statement_cache_size": 0,
+        "prepared_statement_cache_size": 0,
+        "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+    }
+
+
+def make_engine(url: str) -> AsyncEngine:
+    return create_async_engine(
+        f"postgresql+asyncpg:{url}",
+        pool_size=db_pool_size,
+        max_overflow=db_max_overflow,
+        pool_timeout=db_pool_timeout,
+        pool_recycle=db_pool_recycle,
+        pool_pre_ping=db_pool_pre_ping,
+        connect_args=connect_args,
+    )
+
 
-engine = create_async_engine(f"postgresql+asyncpg:{POSTGRES_URL}")
+engine = make_engine(POSTGRES_URL)
+# GET requests are served by replica, primary engine if there is no replica
+replica_engine = make_engine(POSTGRES_REPLICA_URL) if POSTGRES_REPLICA_URL else engine
 Base = declarative_base()
 async_session = async_sessionmaker(
     engine,
@@ -0,0 +1,105 @@
+"""
+Extraction of #hashtags and @mentions from tweets content
+into hashtags / tweet_hashtags and mentions tables
+"""
+
+import re
+from typing import Sequence
+
+from sqlalchemy import Integer, String, column, func, select, values
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .base import async_session
+from .models import Hashtag, Mention, Tweet, TweetHashtag, User
+
+HASHTAG_RE = re.compile(r"(?<!\w)#(\w+)")
+MAX_HASHTAG_LENGTH = Hashtag.name.type.length
+MENTION_RE = re.compile(r"(?<!\w)@(\w{3,50})")
+
+
+def parse_hashtags(content: str) -> set[str]:
+    """
+    Normalized (casefolded) tags of content.
+
+    Tags longer than hashtags.name column (after casefold, which can lengthen them)
+    are not indexed
+    """
+    tags = (tag.casefold() for tag in HASHTAG_RE.findall(content))
+    return {tag for tag in tags if len(tag) <= MAX_HASHTAG_LENGTH}
+
+
+def parse_mentions(content: str) -> set[str]:
+    """
+    Mentioned names of content as written
+    """
+    return set(MENTION_RE.findall(content))
+
+
+async def index_tweets(session: AsyncSession, tweets: Sequence[tuple[int, str]]):
+    """
+    Adds (id, content) tweets to hashtags and mentions indexes.
+
+    Idempotent: already indexed tweets are skipped
+    """
+    tweet_tags = {tweet_id: parse_hashtags(content) for tweet_id, content in tweets}
+    tweet_mentions = {tweet_id: parse_mentions(content) for tweet_id, content in tweets}
+    tags = set().union(*tweet_tags.values())
+    if tags:
+        await session.execute(
+            insert(Hashtag).on_conflict_do_nothing(index_elements=["name"]),
+            [{"name": tag} for tag in sorted(tags)],
+        )
+        tag_ids = dict(
+            (
+                await session.execute(
+                    select(Hashtag.name, Hashtag.id).where(Hashtag.name.in_(tags))
+                )
+            ).all()
+        )
+        await session.execute(
+            insert(TweetHashtag).on_conflict_do_nothing(),
+            [
+                {"hashtag_id": tag_ids[tag], "tweet_id": tweet_id}
+                for tweet_id, tweet_tag_names in tweet_tags.items()
+                for tag in tweet_tag_names
+            ],
+        )
+    mentioned = [
+        (tweet_id, name)
+        for tweet_id, names in tweet_mentions.items()
+        for name in sorted(names)
+    ]
+    if mentioned:
+        mentioned_table = values(
+            column("tweet_id", Integer), column("name", String), name="mentioned"
+        ).data(mentioned)
+        # names are unique in upper case, compared as in users.unique_username index
+        await session.execute(
+            insert(Mention)
+            .from_select(
+                ["user_id", "tweet_id"],
+                select(User.id, mentioned_table.c.tweet_id)
+                .join(
+                    mentioned_table,
+                    func.upper(User.name)
+                    == func.upper(mentioned_table.c.name.collate("C")),
+                )
+                .distinct(),
+            )
+            .on_conflict_do_nothing()
+        )
+
+
+async def index_tweet(tweet_id: int):
+    """
+    Extracts hashtags and mentions of single tweet (new tweet background task)
+    """
+    async with async_session() as session:
+        async with session.begin():
+            tweets = (
+                await session.execute(
+                    select(Tweet.id, Tweet.content).where(Tweet.id == tweet_id)
+                )
+            ).all()
+            await index_tweets(session, tweets)
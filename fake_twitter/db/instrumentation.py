@@ -0,0 +1,84 @@
+"""
+Counting and timing of sql statements executed while serving a request
+"""
+
+import re
+from collections import Counter
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Optional
+
+from sqlalchemy import event
+
+from .base import engine, replica_engine
+
+# Lists of bound parameters (expanded IN) are one parameter in statement shape
+_parameters_list = re.compile(r"\$\d+(?:::[\w ]+)?(?:, \$\d+(?:::[\w ]+)?)*")
+
+
+def statement_shape(statement: str) -> str:
+    """
+    Statement with every list of bound parameters replaced by "?"
+    """
+    return _parameters_list.sub("?", statement)
+
+
+class QueryCounter:
+    """
+    Amount, total duration (seconds) and texts of statements executed
+    in context where counter was started
+    """
+
+    __slots__ = ("count", "duration", "statements")
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements: Counter[str] = Counter()
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """
+        Statement shapes executed at least threshold times (likely N+1 queries)
+        """
+        shapes: Counter[str] = Counter()
+        for statement, count in self.statements.items():
+            shapes[statement_shape(statement)] += count
+        return [
+            (shape, count)
+            for shape, count in shapes.most_common()
+            if count >= threshold
+        ]
+
+
+_query_counter: ContextVar[Optional[QueryCounter]] = ContextVar(
+    "query_counter", default=None
+)
+
+
+def count_queries() -> QueryCounter:
+    """
+    Starts counting statements of current context (and tasks created from it)
+    """
+    counter = QueryCounter()
+    _query_counter.set(counter)
+    return counter
+
+
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    counter = _query_counter.get()
+    if counter is not None:
+        counter.count += 1
+        counter.statements[statement] += 1
+        conn.info.setdefault("query_started", []).append(perf_counter())
+
+
+def _time_query(conn, cursor, statement, parameters, context, executemany):
+    counter = _query_counter.get()
+    started = conn.info.get("query_started")
+    if counter is not None and started:
+        counter.duration += perf_counter() - started.pop()
+
+
+for _engine in {engine, replica_engine}:
+    event.listen(_engine.sync_engine, "before_cursor_execute", _count_query)
+    event.listen(_engine.sync_engine, "after_cursor_execute", _time_query)
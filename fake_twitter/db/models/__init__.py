@@ -1,9 +1,24 @@
 from .admin import Admin
 from .follow import Follow
+from .hashtag import Hashtag, TweetHashtag
 from .image import Image
 from .like import Like
+from .mention import Mention
 from .repost import Repost
+from .timeline import TimelineEntry
 from .tweet import Tweet
 from .user import User
 
-__all__ = ["User", "Tweet", "Follow", "Like", "Repost", "Image", "Admin"]
+__all__ = [
+    "User",
+    "Tweet",
+    "Follow",
+    "Like",
+    "Repost",
+    "Image",
+    "Admin",
+    "TimelineEntry",
+    "Hashtag",
+    "TweetHashtag",
+    "Mention",
+]
@@ -4,9 +4,10 @@ Admin sqlalchemy model
 
 from sqlalchemy import Column, String, select
 from sqlalchemy.dialects.postgresql import TIMESTAMP
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.sql import func
 
-from fake_twitter.db import Base, async_session
+from fake_twitter.db import Base
 
 
 class Admin(Base):
@@ -28,9 +29,8 @@ class Admin(Base):
     )
 
     @classmethod
-    async def is_admin(cls, login: str, password: str):
-        async with async_session() as session:
-            user = await session.execute(
-                select(cls).filter_by(login=login, password=password)
-            )
-        return bool(user.unique().scalar_one_or_none())
+    async def is_admin(cls, session: AsyncSession, login: str, password: str):
+        user = await session.execute(
+            select(cls).filter_by(login=login, password=password)
+        )
+        return bool(user.scalar_one_or_none())
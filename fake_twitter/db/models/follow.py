@@ -2,7 +2,7 @@
 Follow sqlalchemy model
 """
 
-from sqlalchemy import Column, ForeignKey, func
+from sqlalchemy import Column, ForeignKey, Index, func
 from sqlalchemy.dialects.postgresql import TIMESTAMP
 
 from fake_twitter.db import Base
@@ -20,3 +20,7 @@ class Follow(Base):
     created_at = Column(
         TIMESTAMP(timezone=True, precision=0), server_default=func.current_timestamp()
     )
+
+    # users followed by user, ordered by their id (primary key starts with followed_user
+    # and serves followers of user)
+    following_index = Index("follows_following_index", follower_user, followed_user)
@@ -0,0 +1,32 @@
+"""
+Hashtag sqlalchemy models
+
+Inverted index of tweets by #tags, filled by fake_twitter.db.extraction
+"""
+
+from sqlalchemy import Column, ForeignKey, Index, Integer, String
+
+from fake_twitter.db import Base
+
+
+class Hashtag(Base):
+    __tablename__ = "hashtags"
+
+    id: Column[int] = Column(Integer, primary_key=True)
+    # normalized (casefolded) tag without #
+    name = Column(String(100), nullable=False, unique=True)
+
+
+class TweetHashtag(Base):
+    __tablename__ = "tweet_hashtags"
+
+    # primary key (hashtag_id, tweet_id) covers tag pages, newest tweets first
+    hashtag_id: Column[int] = Column(
+        ForeignKey("hashtags.id", ondelete="CASCADE"), primary_key=True
+    )
+    tweet_id: Column[int] = Column(
+        ForeignKey("tweets.id", ondelete="CASCADE"), primary_key=True
+    )
+
+    # deletion of tweet
+    tweet_index = Index("tweet_hashtags_tweet_index", tweet_id)
@@ -2,7 +2,7 @@
 Image sqlalchemy model
 """
 
-from sqlalchemy import Column, ForeignKey, Integer, String
+from sqlalchemy import Column, ForeignKey, Index, Integer, String
 
 from fake_twitter.db import Base
 
@@ -17,3 +17,6 @@ class Image(Base):
     tweet_id: Column[int] = Column(
         ForeignKey("tweets.id", ondelete="CASCADE"),
     )
+
+    # images of tweet
+    tweet_index = Index("images_tweet_index", tweet_id)
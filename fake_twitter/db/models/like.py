@@ -4,7 +4,7 @@ Like sqlalchemy model
 
 from typing import Any
 
-from sqlalchemy import Column, ForeignKey
+from sqlalchemy import Column, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import TIMESTAMP
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -25,10 +25,13 @@ class Like(Base):
         TIMESTAMP(timezone=True, precision=0), server_default=func.current_timestamp()
     )
 
+    # likes of user (primary key starts with tweet_id)
+    user_index = Index("likes_user_index", user_id)
+
     user = relationship(
         "User",
         back_populates="user_likes",
-        lazy="selectin",
+        lazy="select",
         cascade="save-update, merge",
     )
 
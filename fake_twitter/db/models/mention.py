@@ -0,0 +1,24 @@
+"""
+Mention sqlalchemy model
+
+Inverted index of tweets by @mentioned users, filled by fake_twitter.db.extraction
+"""
+
+from sqlalchemy import Column, ForeignKey, Index
+
+from fake_twitter.db import Base
+
+
+class Mention(Base):
+    __tablename__ = "mentions"
+
+    # primary key (user_id, tweet_id) covers mention pages, newest tweets first
+    user_id: Column[int] = Column(
+        ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    tweet_id: Column[int] = Column(
+        ForeignKey("tweets.id", ondelete="CASCADE"), primary_key=True
+    )
+
+    # deletion of tweet
+    tweet_index = Index("mentions_tweet_index", tweet_id)
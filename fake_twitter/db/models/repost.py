@@ -31,12 +31,12 @@ class Repost(Base):
     user = relationship(
         "User",
         back_populates="user_tweet_repost",
-        lazy="selectin",
+        lazy="select",
     )
     reposted_tweet = relationship(
         "Tweet",
         back_populates="user_tweet_repost",
-        lazy="selectin",
+        lazy="select",
     )
 
     def to_json(self) -> dict[str, Any]:
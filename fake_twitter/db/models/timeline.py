@@ -0,0 +1,107 @@
+"""
+Timeline entry sqlalchemy model
+
+Materialized home timelines: every tweet is fanned out to followers of its author on write
+"""
+
+from sqlalchemy import Column, ForeignKey, Index, delete, exists, select
+from sqlalchemy.dialects.postgresql import TIMESTAMP, insert
+
+from fake_twitter.app.config import timeline_backfill_size
+from fake_twitter.db import Base, async_session
+
+from .follow import Follow
+from .tweet import Tweet
+
+
+class TimelineEntry(Base):
+    __tablename__ = "timeline_entries"
+
+    user_id: Column[int] = Column(
+        ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    tweet_id: Column[int] = Column(
+        ForeignKey("tweets.id", ondelete="CASCADE"), primary_key=True
+    )
+    author_id: Column[int] = Column(
+        ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    created_at = Column(TIMESTAMP(timezone=True, precision=0), nullable=False)
+
+    # timeline range scan: (user_id, created_at, tweet_id) DESC
+    timeline_order_index = Index(
+        "timeline_entries_order_index", user_id, created_at, tweet_id
+    )
+
+    @classmethod
+    async def fan_out_tweet(cls, tweet_id: int):
+        """
+        Adds tweet to timelines of all followers of its author
+        """
+        async with async_session() as session:
+            async with session.begin():
+                await session.execute(
+                    insert(cls)
+                    .from_select(
+                        ["user_id", "tweet_id", "author_id", "created_at"],
+                        select(
+                            Follow.follower_user,
+                            Tweet.id,
+                            Tweet.user_id,
+                            Tweet.created_at,
+                        )
+                        .join(Follow, Follow.followed_user == Tweet.user_id)
+                        .where(Tweet.id == tweet_id),
+                    )
+                    .on_conflict_do_nothing()
+                )
+
+    @classmethod
+    async def backfill(cls, follower_id: int, followed_id: int):
+        """
+        Adds latest tweets of followed user to follower's timeline.
+
+        Does nothing if follow no longer exists
+        """
+        async with async_session() as session:
+            async with session.begin():
+                await session.execute(
+                    insert(cls)
+                    .from_select(
+                        ["user_id", "tweet_id", "author_id", "created_at"],
+                        select(
+                            Follow.follower_user,
+                            Tweet.id,
+                            Tweet.user_id,
+                            Tweet.created_at,
+                        )
+                        .join(Follow, Follow.followed_user == Tweet.user_id)
+                        .where(
+                            Follow.follower_user == follower_id,
+                            Follow.followed_user == followed_id,
+                        )
+                        .order_by(Tweet.created_at.desc())
+                        .limit(timeline_backfill_size),
+                    )
+                    .on_conflict_do_nothing()
+                )
+
+    @classmethod
+    async def prune(cls, follower_id: int, followed_id: int):
+        """
+        Removes tweets of followed user from follower's timeline.
+
+        Does nothing if user was followed again
+        """
+        async with async_session() as session:
+            async with session.begin():
+                await session.execute(
+                    delete(cls).where(
+                        cls.user_id == follower_id,
+                        cls.author_id == followed_id,
+                        ~exists().where(
+                            Follow.follower_user == follower_id,
+                            Follow.followed_user == followed_id,
+                        ),
+                    )
+                )
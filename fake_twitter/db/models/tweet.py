@@ -4,48 +4,91 @@ Tweet sqlalchemy model
 
 from typing import Any
 
-from sqlalchemy import Column, ForeignKey, Integer, String
-from sqlalchemy.dialects.postgresql import TIMESTAMP
-from sqlalchemy.ext.hybrid import hybrid_property
-from sqlalchemy.orm import relationship
+from sqlalchemy import (
+    Column,
+    Computed,
+    Double,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    select,
+    text,
+    update,
+)
+from sqlalchemy.dialects.postgresql import TIMESTAMP, TSVECTOR
+from sqlalchemy.orm import deferred, relationship
 from sqlalchemy.sql import func
 
-from fake_twitter.app.config import static_request_path
-from fake_twitter.db import Base
+from fake_twitter.app.config import search_config, static_request_path
+from fake_twitter.db import Base, async_session
+from fake_twitter.db.ranking import creation_score_ddl
+
+from .like import Like
+from .repost import Repost
 
 
 class Tweet(Base):
     __tablename__ = "tweets"
+    __table_args__ = (
+        Index("tweets_search_index", "search_vector", postgresql_using="gin"),
+    )
     id: Column[int] = Column(Integer, primary_key=True)
     content = Column(String(280), nullable=False)
     views = Column(Integer, nullable=False, default=0)
+    # denormalized counters, kept up to date by like/repost handlers
+    likes_count = Column(Integer, nullable=False, default=0, server_default="0")
+    reposts_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # bumped on every change of tweet's response data (likes), used for ETags
+    version = Column(Integer, nullable=False, default=0, server_default="0")
+    # time-decayed popularity, see fake_twitter.db.ranking
+    hot_score = Column(
+        Double, nullable=False, server_default=text(creation_score_ddl())
+    )
     user_id: Column[int] = Column(
         ForeignKey("users.id", ondelete="CASCADE"), nullable=False
     )
     created_at = Column(
         TIMESTAMP(timezone=True, precision=0), server_default=func.current_timestamp()
     )
+    # full-text search document, maintained by postgres, not loaded with tweet
+    search_vector = deferred(
+        Column(
+            TSVECTOR,
+            Computed(f"to_tsvector('{search_config}', content)", persisted=True),
+            nullable=False,
+        )
+    )
+
+    # feed keyset pagination: (views, created_at, id) DESC
+    feed_order_index = Index("tweets_feed_order_index", views, created_at, id)
+    # hot feed keyset pagination: (hot_score, id) DESC
+    hot_order_index = Index("tweets_hot_order_index", hot_score, id)
+    # tweets of user, latest first
+    author_order_index = Index("tweets_user_created_index", user_id, created_at, id)
+    # latest tweets (timeline backfill, exports by date)
+    created_index = Index("tweets_created_index", created_at)
 
     # relationships
     tweet_likes = relationship(
         "Like",
         backref="tweet",
-        lazy="selectin",
+        lazy="select",
         cascade="all, delete-orphan",
     )
     user_tweet_repost = relationship(
         "Repost",
         back_populates="reposted_tweet",
-        lazy="selectin",
+        lazy="select",
         cascade="all, delete-orphan",
     )
     tweet_author = relationship(
-        "User", back_populates="tweets", lazy="selectin", foreign_keys="Tweet.user_id"
+        "User", back_populates="tweets", lazy="select", foreign_keys="Tweet.user_id"
     )
     images_objects = relationship(
         "Image",
         backref="tweet",
-        lazy="selectin",
+        lazy="select",
         cascade="all, delete-orphan",
     )
 
@@ -82,10 +125,26 @@ class Tweet(Base):
             result.update(html_extra)
         return result
 
-    @hybrid_property
-    def likes_count(self):
-        return len(self.tweet_likes)
+    @classmethod
+    async def reconcile_counters(cls) -> int:
+        """
+        Repairs drift of likes_count and reposts_count.
 
-    # @hybrid_property
-    # def reposts_count(self):
-    #     return len(self.user_tweet_repost)
+        Returns amount of fixed tweets
+        """
+        likes = select(func.count()).where(Like.tweet_id == cls.id).scalar_subquery()
+        reposts = (
+            select(func.count()).where(Repost.tweet_id == cls.id).scalar_subquery()
+        )
+        async with async_session() as session:
+            async with session.begin():
+                result = await session.execute(
+                    update(cls)
+                    .where((cls.likes_count != likes) | (cls.reposts_count != reposts))
+                    .values(
+                        likes_count=likes,
+                        reposts_count=reposts,
+                        version=cls.version + 1,
+                    )
+                )
+        return result.rowcount
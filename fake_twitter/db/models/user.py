@@ -10,16 +10,22 @@ from sqlalchemy import (
     Column,
     Index,
     Integer,
+    Select,
     String,
+    Update,
+    case,
     select,
+    update,
 )
 from sqlalchemy.dialects.postgresql import TIMESTAMP
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.ext.associationproxy import association_proxy
 from sqlalchemy.orm import backref, relationship
 from sqlalchemy.sql import func
 
 from fake_twitter.db import Base, async_session
 
+from .follow import Follow
 from .tweet import Tweet
 
 
@@ -41,6 +47,11 @@ class User(Base):
         unique=True,
     )
     active = Column(Boolean, nullable=False, default=True)
+    # bumped on every change of user's profile data (follows), used for ETags
+    version = Column(Integer, nullable=False, default=0, server_default="0")
+    # denormalized amounts of follows, changed together with version
+    followers_count = Column(Integer, nullable=False, default=0, server_default="0")
+    following_count = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(
         TIMESTAMP(timezone=True), server_default=func.current_timestamp()
     )
@@ -50,17 +61,19 @@ class User(Base):
         unique=True,
     )
 
+    # relationships are not loaded with user, queries that need them
+    # ask for them with loader options (selectinload)
     followed = relationship(
         "User",
         secondary="follows",
         primaryjoin="Follow.follower_user == User.id",
         secondaryjoin="Follow.followed_user == User.id",
-        backref=backref("followers", lazy="joined"),
-        lazy="selectin",
+        backref=backref("followers", lazy="select"),
+        lazy="select",
     )
     tweets = relationship(
         "Tweet",
-        lazy="joined",
+        lazy="select",
         cascade="all, delete-orphan",
         foreign_keys="Tweet.user_id",
         back_populates="tweet_author",
@@ -77,7 +90,7 @@ class User(Base):
     user_tweet_repost = relationship(
         "Repost",
         back_populates="user",
-        lazy="selectin",
+        lazy="select",
         cascade="all, delete-orphan",
     )
     reposted_tweets = association_proxy(
@@ -100,21 +113,77 @@ class User(Base):
         }
 
     @classmethod
-    async def get_user_by_api_token(cls, api_token):
-        async with async_session() as session:
-            user = await session.execute(
-                select(cls).filter_by(api_key=api_token, active=True)
-            )
-        return user.unique().scalar_one_or_none()
+    def lean_select(cls) -> Select:
+        """
+        Select of columns needed by auth and profile (id, name) as Row tuples,
+        no User objects are built or put to identity map
+        """
+        return select(cls.id, cls.name)
 
     @classmethod
-    async def get_user_by_id(cls, user_id):
-        async with async_session() as session:
-            user = await session.execute(select(cls).filter_by(id=user_id, active=True))
-        return user.unique().scalar_one_or_none()
+    async def get_user_by_api_token(cls, session: AsyncSession, api_token: str):
+        user = await session.execute(
+            cls.lean_select().filter_by(api_key=api_token, active=True)
+        )
+        return user.one_or_none()
 
     @classmethod
-    async def get_user_by_name(cls, name):
+    async def get_user_by_id(cls, session: AsyncSession, user_id: int):
+        user = await session.execute(
+            cls.lean_select().filter_by(id=user_id, active=True)
+        )
+        return user.one_or_none()
+
+    @classmethod
+    async def get_user_by_name(cls, session: AsyncSession, name: str):
+        user = await session.execute(
+            cls.lean_select().filter_by(name=name, active=True)
+        )
+        return user.one_or_none()
+
+    @classmethod
+    def follow_update(cls, follower_id: int, followed_id: int, delta: int) -> Update:
+        """
+        Update of follows counters and versions of both users of follow
+        (delta 1 - follow is added, -1 - removed)
+        """
+        return (
+            update(cls)
+            .where(cls.id.in_((follower_id, followed_id)))
+            .values(
+                version=cls.version + 1,
+                following_count=cls.following_count
+                + case((cls.id == follower_id, delta), else_=0),
+                followers_count=cls.followers_count
+                + case((cls.id == followed_id, delta), else_=0),
+            )
+        )
+
+    @classmethod
+    async def reconcile_counters(cls) -> int:
+        """
+        Repairs drift of followers_count and following_count.
+
+        Returns amount of fixed users
+        """
+        followers = (
+            select(func.count()).where(Follow.followed_user == cls.id).scalar_subquery()
+        )
+        following = (
+            select(func.count()).where(Follow.follower_user == cls.id).scalar_subquery()
+        )
         async with async_session() as session:
-            user = await session.execute(select(cls).filter_by(name=name, active=True))
-        return user.unique().scalar_one_or_none()
+            async with session.begin():
+                result = await session.execute(
+                    update(cls)
+                    .where(
+                        (cls.followers_count != followers)
+                        | (cls.following_count != following)
+                    )
+                    .values(
+                        followers_count=followers,
+                        following_count=following,
+                        version=cls.version + 1,
+                    )
+                )
+        return result.rowcount
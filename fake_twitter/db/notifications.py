@@ -0,0 +1,30 @@
+"""
+Feed and identity events published with postgres NOTIFY
+
+Events are sent inside transaction of the change, so postgres delivers them
+to listeners only after commit and never for rolled back changes
+"""
+
+import json
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+FEED_EVENTS_CHANNEL = "feed_events"
+# ids of deleted users, whose api-keys are dropped from identity caches of all workers
+IDENTITY_EVENTS_CHANNEL = "identity_events"
+
+
+async def notify_feed_event(session: AsyncSession, event: str, **data: int):
+    """
+    Publishes {"event": event, **data} to FEED_EVENTS_CHANNEL on commit
+    """
+    payload = json.dumps({"event": event, **data}, separators=(",", ":"))
+    await session.execute(select(func.pg_notify(FEED_EVENTS_CHANNEL, payload)))
+
+
+async def notify_user_deleted(session: AsyncSession, user_id: int):
+    """
+    Publishes id of deleted user to IDENTITY_EVENTS_CHANNEL on commit
+    """
+    await session.execute(select(func.pg_notify(IDENTITY_EVENTS_CHANNEL, str(user_id))))
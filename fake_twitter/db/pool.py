@@ -0,0 +1,74 @@
+"""
+Checkouts of pooled connections with statistics of pool usage of current worker
+"""
+
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from time import perf_counter
+from typing import AsyncIterator
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from .base import engine
+
+
+class PoolWaits:
+    """
+    Time spent by requests waiting for connection from pool
+    """
+
+    def __init__(self):
+        self.checkouts = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.timeouts = 0
+
+    def add(self, seconds: float):
+        self.checkouts += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+
+
+# waits for pools of primary and replica engines
+pool_waits: defaultdict[AsyncEngine, PoolWaits] = defaultdict(PoolWaits)
+
+
+@asynccontextmanager
+async def pooled_connection(
+    from_engine: AsyncEngine = engine,
+) -> AsyncIterator[AsyncConnection]:
+    """
+    Connection checked out from pool of engine, waiting for it is recorded in pool_waits
+    """
+    waits = pool_waits[from_engine]
+    started = perf_counter()
+    try:
+        connection = await from_engine.connect()
+    except PoolTimeoutError:
+        waits.timeouts += 1
+        raise
+    waits.add(perf_counter() - started)
+    try:
+        yield connection
+    finally:
+        await connection.close()
+
+
+def pool_stats(of_engine: AsyncEngine = engine) -> dict[str, int | float]:
+    """
+    Current state of pool of engine and waits for it since start of worker
+    """
+    pool = of_engine.pool
+    waits = pool_waits[of_engine]
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        # overflow of QueuePool is negative while pool is not filled up
+        "overflow": max(pool.overflow(), 0),
+        "checkouts": waits.checkouts,
+        "wait_avg_ms": waits.total_seconds * 1000 / max(waits.checkouts, 1),
+        "wait_max_ms": waits.max_seconds * 1000,
+        "timeouts": waits.timeouts,
+    }
@@ -0,0 +1,72 @@
+"""
+Time-decayed popularity ("hot") score of tweets
+
+Score of tweet is sum of weights of its events (creation, views, likes, reposts),
+every weight decaying as exp(-rate * age). All scores decay at the same rate,
+so tweets are ordered by time-independent log form of it:
+
+    hot_score = ln(sum(weight * exp(rate * (event_time - EPOCH))))
+
+Event is added to stored score in place with log-add-exp,
+so score is maintained incrementally and never recalculated
+"""
+
+from datetime import datetime, timezone
+from math import log
+
+from sqlalchemy import ColumnElement, func, literal
+from sqlalchemy.dialects.postgresql import TIMESTAMP
+
+from fake_twitter.app.config import hot_half_life_hours, hot_weights
+
+EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+DECAY_RATE = log(2) / (hot_half_life_hours * 3600)
+# exp() of postgres raises on underflow instead of returning 0
+MIN_EXPONENT = -700
+
+_EPOCH_SECONDS = EPOCH.timestamp()
+
+
+def _exp(value) -> ColumnElement[float]:
+    return func.exp(func.greatest(value, MIN_EXPONENT))
+
+
+def event_score(weight, at=None) -> ColumnElement[float]:
+    """
+    Log score of single event of given weight that happened at given time (now by default)
+    """
+    if at is None:
+        at = func.now()
+    elif isinstance(at, datetime):
+        at = literal(at, TIMESTAMP(timezone=True))
+    return func.ln(weight) + DECAY_RATE * (func.extract("epoch", at) - _EPOCH_SECONDS)
+
+
+def add_event(score, event) -> ColumnElement[float]:
+    """
+    ln(exp(score) + exp(event)) without overflow
+    """
+    return func.greatest(score, event) + func.ln(1 + _exp(-func.abs(score - event)))
+
+
+def remove_event(score, event, floor) -> ColumnElement[float]:
+    """
+    ln(exp(score) - exp(event)), never lower than floor (score of tweet creation)
+    """
+    return func.greatest(
+        score + func.ln(func.greatest(1 - _exp(event - score), 1e-12)), floor
+    )
+
+
+def creation_score_ddl() -> str:
+    """
+    Server default of tweets.hot_score: creation event happening now
+    """
+    return (
+        f"ln({hot_weights['tweet']}) + {DECAY_RATE!r} * "
+        f"(extract(epoch from now()) - {_EPOCH_SECONDS!r})"
+    )
+
+
+def creation_score(created_at) -> ColumnElement[float]:
+    return event_score(hot_weights["tweet"], created_at)
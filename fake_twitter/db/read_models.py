@@ -0,0 +1,221 @@
+"""
+Read models: tweets and profiles built in response shape by database
+
+Every row is serialized with json_build_object / json_agg over lateral joins,
+so a page of tweets is loaded in one round trip without ORM relationships
+"""
+
+from typing import Any, Optional
+
+from sqlalchemy import (
+    REAL,
+    ColumnElement,
+    Select,
+    func,
+    literal,
+    literal_column,
+    select,
+    true,
+    tuple_,
+)
+from sqlalchemy.dialects.postgresql import JSON, aggregate_order_by
+from sqlalchemy.orm import aliased
+
+from fake_twitter.app.config import search_config, static_request_path
+
+from .models import Follow, Image, Like, Tweet, User
+
+EMPTY_JSON_ARRAY = literal_column("'[]'::json")
+
+
+def user_json(user) -> ColumnElement:
+    """
+    UserBaseOutSchema shape
+    """
+    return func.json_build_object("id", user.id, "name", user.name, type_=JSON)
+
+
+def tweets_select() -> Select:
+    """
+    Select of TweetOutSchema shaped json per tweet.
+
+    Tweet and its author (User) are in FROM clause,
+    so callers can filter, order and limit by their columns
+    """
+    liker = aliased(User, name="liker")
+    likes = (
+        select(
+            func.coalesce(
+                func.json_agg(
+                    aggregate_order_by(user_json(liker), Like.created_at, Like.user_id)
+                ),
+                EMPTY_JSON_ARRAY,
+            ).label("likes")
+        )
+        .select_from(Like)
+        .join(liker, liker.id == Like.user_id)
+        .where(Like.tweet_id == Tweet.id)
+        .lateral("tweet_likes")
+    )
+    attachments = (
+        select(
+            func.coalesce(
+                func.json_agg(
+                    aggregate_order_by(
+                        func.concat(
+                            f"{static_request_path}/", Image.id, Image.file_extension
+                        ),
+                        Image.id,
+                    )
+                ),
+                EMPTY_JSON_ARRAY,
+            ).label("attachments")
+        )
+        .where(Image.tweet_id == Tweet.id)
+        .lateral("tweet_attachments")
+    )
+    return (
+        select(
+            func.json_build_object(
+                "id",
+                Tweet.id,
+                "author",
+                user_json(User),
+                "content",
+                Tweet.content,
+                "likes",
+                likes.c.likes,
+                "attachments",
+                attachments.c.attachments,
+                type_=JSON,
+            ).label("tweet")
+        )
+        .select_from(Tweet)
+        .join(User, User.id == Tweet.user_id)
+        .join(likes, true())
+        .join(attachments, true())
+    )
+
+
+def tweets_by_id_select(ids: Select) -> Select:
+    """
+    Select of TweetOutSchema shaped json and id of tweets, newest first.
+
+    ids is select of single tweet_id column (ordered and limited page of some index)
+    """
+    page = ids.subquery("page")
+    return (
+        tweets_select()
+        .add_columns(Tweet.id)
+        .join(page, page.c.tweet_id == Tweet.id)
+        .order_by(Tweet.id.desc())
+    )
+
+
+def tweets_search_select(
+    text: str, limit: int, after: Optional[tuple[float, int]] = None
+) -> Select:
+    """
+    Select of TweetOutSchema shaped json, rank and id of tweets matching
+    web search query text, ordered by (rank, id) DESC.
+
+    after is (rank, id) of the last row of previous page.
+    Page of matches is ranked from GIN index first,
+    so json is built only for returned tweets
+    """
+    ts_query = func.websearch_to_tsquery(search_config, text)
+    rank = func.ts_rank(Tweet.search_vector, ts_query, type_=REAL)
+    matches = (
+        select(rank.label("rank"), Tweet.id)
+        .where(Tweet.search_vector.bool_op("@@")(ts_query))
+        .order_by(rank.desc(), Tweet.id.desc())
+        .limit(limit)
+    )
+    if after is not None:
+        matches = matches.where(
+            tuple_(rank, Tweet.id) < tuple_(literal(after[0], REAL), after[1])
+        )
+    matches = matches.subquery("matches")
+    return (
+        tweets_select()
+        .add_columns(matches.c.rank, matches.c.id)
+        .join(matches, matches.c.id == Tweet.id)
+        .order_by(matches.c.rank.desc(), matches.c.id.desc())
+    )
+
+
+# (column of user, column of listed user) of follows lists: followers are read
+# from primary key (followed_user, follower_user), followed users
+# from follows_following_index (follower_user, followed_user)
+FOLLOW_LISTS = {
+    "followers": (Follow.followed_user, Follow.follower_user),
+    "following": (Follow.follower_user, Follow.followed_user),
+}
+
+
+def follow_users_select(
+    follow_list: str, user_id: Any, limit: int, after: Optional[int] = None
+) -> Select:
+    """
+    Select of UserBaseOutSchema shaped json and id of followers
+    or followed users of user, ordered by id DESC.
+
+    after is id of the last user of previous page.
+    user_id may be User.id of enclosing query
+    """
+    of_user, listed_user = FOLLOW_LISTS[follow_list]
+    listed = aliased(User, name=f"{follow_list}_user")
+    query = (
+        select(user_json(listed).label("user"), listed.id)
+        .select_from(Follow)
+        .join(listed, listed.id == listed_user)
+        .where(of_user == user_id)
+        .order_by(listed_user.desc())
+        .limit(limit)
+        .correlate(User)
+    )
+    if after is not None:
+        query = query.where(listed_user < after)
+    return query
+
+
+def profile_select(follows_limit: int) -> Select:
+    """
+    Select of ProfileOutSchema shaped json per user
+    with first follows_limit users of followers and following lists.
+
+    User is in FROM clause, so callers can filter by its columns
+    """
+    pages = {}
+    for follow_list in FOLLOW_LISTS:
+        page = follow_users_select(follow_list, User.id, follows_limit).subquery(
+            f"{follow_list}_page"
+        )
+        pages[follow_list] = select(
+            func.coalesce(
+                func.json_agg(aggregate_order_by(page.c.user, page.c.id.desc())),
+                EMPTY_JSON_ARRAY,
+            ).label("users")
+        ).lateral(f"user_{follow_list}")
+    return (
+        select(
+            func.json_build_object(
+                "id",
+                User.id,
+                "name",
+                User.name,
+                "followers_count",
+                User.followers_count,
+                "following_count",
+                User.following_count,
+                "following",
+                pages["following"].c.users,
+                "followers",
+                pages["followers"].c.users,
+                type_=JSON,
+            ).label("user")
+        )
+        .select_from(User)
+        .join(pages["following"], true())
+        .join(pages["followers"], true())
+    )
@@ -0,0 +1,49 @@
+"""
+Module of database schema version check
+
+Schema is created and changed by alembic migrations (fake_twitter/migrations),
+application only checks on startup that database is migrated to its version
+"""
+
+from pathlib import Path
+
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from .base import engine
+
+alembic_config_path = Path(__file__).parents[1] / "alembic.ini"
+
+
+def head_revision() -> str:
+    """
+    Latest migration revision known to application
+    """
+    config = Config(str(alembic_config_path))
+    return ScriptDirectory.from_config(config).get_current_head()
+
+
+async def current_revision(of_engine: AsyncEngine = engine) -> str | None:
+    """
+    Migration revision of database (None - database is not migrated)
+    """
+    async with of_engine.connect() as connection:
+        return await connection.run_sync(
+            lambda sync_connection: MigrationContext.configure(
+                sync_connection
+            ).get_current_revision()
+        )
+
+
+async def check_schema_version(of_engine: AsyncEngine = engine):
+    """
+    Raises RuntimeError if database schema is not at latest migration revision
+    """
+    current, head = await current_revision(of_engine), head_revision()
+    if current != head:
+        raise RuntimeError(
+            f"Database schema is at revision {current}, application expects {head}. "
+            "Run: alembic -c fake_twitter/alembic.ini upgrade head"
+        )
@@ -0,0 +1,51 @@
+"""
+Data version counters stored in rows of data_versions table
+
+Handlers bump version after committing changes, readers compare it with version
+of cached data. Version is read in the same session as data, so on read replica
+it lags behind exactly as much as the data it describes
+(sequences are not fit for it: replica sees their values ahead of primary)
+"""
+
+from sqlalchemy import BigInteger, Column, String, Table, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .base import Base
+
+data_versions = Table(
+    "data_versions",
+    Base.metadata,
+    Column("name", String(50), primary_key=True),
+    Column("value", BigInteger, nullable=False, server_default="0"),
+)
+
+
+class Version:
+    """
+    Version counter of some part of data
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._value = select(data_versions.c.value).where(data_versions.c.name == name)
+
+    async def current(self, session: AsyncSession) -> int:
+        return (await session.execute(self._value)).scalar_one()
+
+    async def bump(self, session: AsyncSession):
+        """
+        Increments version in its own short transaction,
+        so row is locked only for single update
+        """
+        await session.execute(
+            update(data_versions)
+            .where(data_versions.c.name == self.name)
+            .values(value=data_versions.c.value + 1)
+        )
+        await session.commit()
+
+
+# tweets and likes of the global feed
+feed_version = Version("feed")
+# views of tweets, bumped by every views flush
+views_version = Version("views")
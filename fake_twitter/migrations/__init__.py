@@ -0,0 +1,5 @@
+"""
+Alembic migrations of database schema. Apply with:
+
+alembic -c fake_twitter/alembic.ini upgrade head
+"""
@@ -0,0 +1,27 @@
+"""
+Operations shared by migration scripts
+"""
+
+import sqlalchemy as sa
+from alembic import context, op
+
+
+def drop_if_invalid(name: str, table: str):
+    """
+    Failed concurrent build leaves invalid index behind, it is built again
+    """
+    if context.is_offline_mode():
+        return
+    invalid = (
+        op.get_bind()
+        .execute(
+            sa.text(
+                "SELECT NOT indisvalid FROM pg_index "
+                "WHERE indexrelid = to_regclass(:name)"
+            ),
+            {"name": name},
+        )
+        .scalar()
+    )
+    if invalid:
+        op.drop_index(name, table_name=table, postgresql_concurrently=True)
@@ -0,0 +1,149 @@
+"""
+Baseline schema: users, tweets, likes, reposts, images, follows and admin
+
+Databases created by create_all before migrations already have these tables,
+so tables and indexes are created only if they do not exist
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects.postgresql import TIMESTAMP
+
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    op.create_table(
+        "admin",
+        sa.Column("login", sa.String(50), primary_key=True),
+        sa.Column("password", sa.String, nullable=False),
+        sa.Column(
+            "created_at",
+            TIMESTAMP(timezone=True, precision=1),
+            server_default=sa.func.current_timestamp(),
+        ),
+        if_not_exists=True,
+    )
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("name", sa.String(50, collation="C"), nullable=False),
+        sa.Column("api_key", sa.String, nullable=False, unique=True),
+        sa.Column("active", sa.Boolean, nullable=False),
+        sa.Column(
+            "created_at",
+            TIMESTAMP(timezone=True),
+            server_default=sa.func.current_timestamp(),
+        ),
+        sa.CheckConstraint("char_length(name) > 2", name="name_min_length"),
+        if_not_exists=True,
+    )
+    op.create_index(
+        "unique_username",
+        "users",
+        [sa.text("upper(name)")],
+        unique=True,
+        if_not_exists=True,
+    )
+    op.create_table(
+        "follows",
+        sa.Column(
+            "followed_user",
+            sa.Integer,
+            sa.ForeignKey("users.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column(
+            "follower_user",
+            sa.Integer,
+            sa.ForeignKey("users.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column(
+            "created_at",
+            TIMESTAMP(timezone=True, precision=0),
+            server_default=sa.func.current_timestamp(),
+        ),
+        if_not_exists=True,
+    )
+    op.create_table(
+        "tweets",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("content", sa.String(280), nullable=False),
+        sa.Column("views", sa.Integer, nullable=False),
+        sa.Column(
+            "user_id",
+            sa.Integer,
+            sa.ForeignKey("users.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column(
+            "created_at",
+            TIMESTAMP(timezone=True, precision=0),
+            server_default=sa.func.current_timestamp(),
+        ),
+        if_not_exists=True,
+    )
+    op.create_table(
+        "images",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("file_extension", sa.String),
+        sa.Column(
+            "tweet_id", sa.Integer, sa.ForeignKey("tweets.id", ondelete="CASCADE")
+        ),
+        if_not_exists=True,
+    )
+    op.create_table(
+        "likes",
+        sa.Column("tweet_id", sa.Integer, sa.ForeignKey("tweets.id"), primary_key=True),
+        sa.Column("user_id", sa.Integer, sa.ForeignKey("users.id"), primary_key=True),
+        sa.Column(
+            "created_at",
+            TIMESTAMP(timezone=True, precision=0),
+            server_default=sa.func.current_timestamp(),
+        ),
+        if_not_exists=True,
+    )
+    op.create_table(
+        "reposts",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column(
+            "tweet_id",
+            sa.Integer,
+            sa.ForeignKey("tweets.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column(
+            "user_id",
+            sa.Integer,
+            sa.ForeignKey("users.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column(
+            "created_at",
+            TIMESTAMP(timezone=True, precision=0),
+            server_default=sa.func.current_timestamp(),
+        ),
+        if_not_exists=True,
+    )
+    op.create_index(
+        "unique_repost_index",
+        "reposts",
+        ["tweet_id", "user_id"],
+        unique=True,
+        if_not_exists=True,
+    )
+
+
+def downgrade():
+    for table in ("reposts", "likes", "images", "tweets", "follows", "users", "admin"):
+        op.drop_table(table)
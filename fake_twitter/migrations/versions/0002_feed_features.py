@@ -0,0 +1,293 @@
+"""
+Feed features: counters, versions, hot score, search vector, timelines,
+hashtags and mentions
+
+Columns, tables and indexes are added only if they do not exist
+(newer tables were created by create_all before migrations), backfills are idempotent
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+
+from math import log
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects.postgresql import TIMESTAMP, TSVECTOR
+from sqlalchemy.schema import CreateSequence, DropSequence
+
+from fake_twitter.app.config import search_config, timeline_backfill_size
+
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# exp() of ratio of event score to creation score, kept far from double overflow
+MAX_EXPONENT = 600
+
+# Hot score parameters of fake_twitter.db.ranking, fixed here: backfilled scores
+# and default of tweets.hot_score must not change with later configuration
+HOT_HALF_LIFE_HOURS = 12
+DECAY_RATE = log(2) / (HOT_HALF_LIFE_HOURS * 3600)
+# 2024-01-01 UTC
+EPOCH_SECONDS = 1704067200.0
+HOT_WEIGHTS = {"tweet": 10.0, "view": 1.0, "like": 10.0, "repost": 20.0}
+HOT_SCORE_DEFAULT = (
+    f"ln({HOT_WEIGHTS['tweet']}) + {DECAY_RATE!r} * "
+    f"(extract(epoch from now()) - {EPOCH_SECONDS!r})"
+)
+
+tweets = sa.table(
+    "tweets",
+    sa.column("id", sa.Integer),
+    sa.column("views", sa.Integer),
+    sa.column("likes_count", sa.Integer),
+    sa.column("reposts_count", sa.Integer),
+    sa.column("hot_score", sa.Double),
+    sa.column("created_at", TIMESTAMP(timezone=True)),
+)
+likes = sa.table(
+    "likes",
+    sa.column("tweet_id", sa.Integer),
+    sa.column("created_at", TIMESTAMP(timezone=True)),
+)
+reposts = sa.table(
+    "reposts",
+    sa.column("tweet_id", sa.Integer),
+    sa.column("created_at", TIMESTAMP(timezone=True)),
+)
+
+
+def backfill_counters():
+    op.execute(
+        tweets.update().values(
+            likes_count=sa.select(sa.func.count())
+            .where(likes.c.tweet_id == tweets.c.id)
+            .scalar_subquery(),
+            reposts_count=sa.select(sa.func.count())
+            .where(reposts.c.tweet_id == tweets.c.id)
+            .scalar_subquery(),
+        )
+    )
+
+
+def event_score(weight, at):
+    return sa.func.ln(weight) + DECAY_RATE * (
+        sa.func.extract("epoch", at) - EPOCH_SECONDS
+    )
+
+
+def backfill_hot_scores():
+    """
+    Hot score of existing tweets from their creation, likes and reposts
+    (time of views is unknown, they are counted at creation)
+    """
+    created = event_score(
+        HOT_WEIGHTS["tweet"], sa.func.coalesce(tweets.c.created_at, sa.func.now())
+    )
+
+    def decayed(events, weight):
+        # sum of exp(event score - creation score) of all events of tweet
+        return (
+            sa.select(
+                sa.func.coalesce(
+                    sa.func.sum(
+                        sa.func.exp(
+                            sa.func.least(
+                                event_score(weight, events.c.created_at) - created,
+                                MAX_EXPONENT,
+                            )
+                        )
+                    ),
+                    0,
+                )
+            )
+            .where(events.c.tweet_id == tweets.c.id)
+            .scalar_subquery()
+        )
+
+    op.execute(
+        tweets.update().values(
+            hot_score=created
+            + sa.func.ln(
+                1
+                + tweets.c.views * (HOT_WEIGHTS["view"] / HOT_WEIGHTS["tweet"])
+                + decayed(likes, HOT_WEIGHTS["like"])
+                + decayed(reposts, HOT_WEIGHTS["repost"])
+            )
+        )
+    )
+
+
+def backfill_timelines():
+    """
+    Latest tweets of followed users in timelines of followers
+    """
+    op.execute(
+        sa.text(
+            "INSERT INTO timeline_entries (user_id, tweet_id, author_id, created_at) "
+            "SELECT follows.follower_user, latest.id, latest.user_id, latest.created_at "
+            "FROM follows CROSS JOIN LATERAL ("
+            "SELECT id, user_id, coalesce(created_at, now()) AS created_at "
+            "FROM tweets WHERE tweets.user_id = follows.followed_user "
+            "ORDER BY tweets.created_at DESC LIMIT :backfill_size"
+            ") AS latest ON CONFLICT DO NOTHING"
+        ).bindparams(backfill_size=timeline_backfill_size)
+    )
+
+
+def upgrade():
+    op.add_column(
+        "tweets",
+        sa.Column("likes_count", sa.Integer, nullable=False, server_default="0"),
+        if_not_exists=True,
+    )
+    op.add_column(
+        "tweets",
+        sa.Column("reposts_count", sa.Integer, nullable=False, server_default="0"),
+        if_not_exists=True,
+    )
+    op.add_column(
+        "tweets",
+        sa.Column("version", sa.Integer, nullable=False, server_default="0"),
+        if_not_exists=True,
+    )
+    op.add_column(
+        "tweets",
+        sa.Column(
+            "hot_score",
+            sa.Double,
+            nullable=False,
+            server_default=sa.text(HOT_SCORE_DEFAULT),
+        ),
+        if_not_exists=True,
+    )
+    op.add_column(
+        "tweets",
+        sa.Column(
+            "search_vector",
+            TSVECTOR,
+            sa.Computed(f"to_tsvector('{search_config}', content)", persisted=True),
+            nullable=False,
+        ),
+        if_not_exists=True,
+    )
+    op.add_column(
+        "users",
+        sa.Column("version", sa.Integer, nullable=False, server_default="0"),
+        if_not_exists=True,
+    )
+    backfill_counters()
+    backfill_hot_scores()
+    op.create_index(
+        "tweets_feed_order_index",
+        "tweets",
+        ["views", "created_at", "id"],
+        if_not_exists=True,
+    )
+    op.create_index(
+        "tweets_hot_order_index", "tweets", ["hot_score", "id"], if_not_exists=True
+    )
+    op.create_index(
+        "tweets_search_index",
+        "tweets",
+        ["search_vector"],
+        postgresql_using="gin",
+        if_not_exists=True,
+    )
+    op.execute(CreateSequence(sa.Sequence("feed_version_seq"), if_not_exists=True))
+
+    op.create_table(
+        "timeline_entries",
+        sa.Column(
+            "user_id",
+            sa.Integer,
+            sa.ForeignKey("users.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column(
+            "tweet_id",
+            sa.Integer,
+            sa.ForeignKey("tweets.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column(
+            "author_id",
+            sa.Integer,
+            sa.ForeignKey("users.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("created_at", TIMESTAMP(timezone=True, precision=0), nullable=False),
+        if_not_exists=True,
+    )
+    op.create_index(
+        "timeline_entries_order_index",
+        "timeline_entries",
+        ["user_id", "created_at", "tweet_id"],
+        if_not_exists=True,
+    )
+    backfill_timelines()
+
+    op.create_table(
+        "hashtags",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("name", sa.String(100), nullable=False, unique=True),
+        if_not_exists=True,
+    )
+    op.create_table(
+        "tweet_hashtags",
+        sa.Column(
+            "hashtag_id",
+            sa.Integer,
+            sa.ForeignKey("hashtags.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column(
+            "tweet_id",
+            sa.Integer,
+            sa.ForeignKey("tweets.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        if_not_exists=True,
+    )
+    op.create_index(
+        "tweet_hashtags_tweet_index", "tweet_hashtags", ["tweet_id"], if_not_exists=True
+    )
+    op.create_table(
+        "mentions",
+        sa.Column(
+            "user_id",
+            sa.Integer,
+            sa.ForeignKey("users.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column(
+            "tweet_id",
+            sa.Integer,
+            sa.ForeignKey("tweets.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        if_not_exists=True,
+    )
+    op.create_index(
+        "mentions_tweet_index", "mentions", ["tweet_id"], if_not_exists=True
+    )
+
+
+def downgrade():
+    for table in ("mentions", "tweet_hashtags", "hashtags", "timeline_entries"):
+        op.drop_table(table)
+    op.execute(DropSequence(sa.Sequence("feed_version_seq")))
+    for index in (
+        "tweets_search_index",
+        "tweets_hot_order_index",
+        "tweets_feed_order_index",
+    ):
+        op.drop_index(index, table_name="tweets")
+    op.drop_column("users", "version")
+    for column in ("search_vector", "hot_score", "version", "reposts_count"):
+        op.drop_column("tweets", column)
+    op.drop_column("tweets", "likes_count")
@@ -0,0 +1,47 @@
+"""
+Indexes of hot paths: tweets of user, latest tweets, likes of user,
+follows of user and images of tweet
+
+Built with CREATE INDEX CONCURRENTLY outside of transaction,
+so tables stay writable while indexes are built
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+from fake_twitter.migrations.helpers import drop_if_invalid
+
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = (
+    ("tweets_user_created_index", "tweets", ["user_id", "created_at", "id"]),
+    ("tweets_created_index", "tweets", ["created_at"]),
+    ("likes_user_index", "likes", ["user_id"]),
+    ("follows_follower_index", "follows", ["follower_user"]),
+    ("images_tweet_index", "images", ["tweet_id"]),
+)
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            drop_if_invalid(name, table)
+            op.create_index(
+                name, table, columns, postgresql_concurrently=True, if_not_exists=True
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _ in INDEXES:
+            op.drop_index(
+                name, table_name=table, postgresql_concurrently=True, if_exists=True
+            )
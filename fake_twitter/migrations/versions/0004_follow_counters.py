@@ -0,0 +1,86 @@
+"""
+Followers and following counters of users, index of followed users ordered by id
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+from fake_twitter.migrations.helpers import drop_if_invalid
+
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+users = sa.table(
+    "users",
+    sa.column("id", sa.Integer),
+    sa.column("followers_count", sa.Integer),
+    sa.column("following_count", sa.Integer),
+)
+follows = sa.table(
+    "follows",
+    sa.column("followed_user", sa.Integer),
+    sa.column("follower_user", sa.Integer),
+)
+
+
+def upgrade():
+    for column in ("followers_count", "following_count"):
+        op.add_column(
+            "users",
+            sa.Column(column, sa.Integer, nullable=False, server_default="0"),
+            if_not_exists=True,
+        )
+    op.execute(
+        users.update().values(
+            followers_count=sa.select(sa.func.count())
+            .where(follows.c.followed_user == users.c.id)
+            .scalar_subquery(),
+            following_count=sa.select(sa.func.count())
+            .where(follows.c.follower_user == users.c.id)
+            .scalar_subquery(),
+        )
+    )
+    # counters are committed before indexes are built concurrently
+    with op.get_context().autocommit_block():
+        drop_if_invalid("follows_following_index", "follows")
+        op.create_index(
+            "follows_following_index",
+            "follows",
+            ["follower_user", "followed_user"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            "follows_follower_index",
+            table_name="follows",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        drop_if_invalid("follows_follower_index", "follows")
+        op.create_index(
+            "follows_follower_index",
+            "follows",
+            ["follower_user"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            "follows_following_index",
+            table_name="follows",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    for column in ("following_count", "followers_count"):
+        op.drop_column("users", column)
@@ -0,0 +1,26 @@
+"""
+Separate version of views ordering, bumped by views flushes instead of feed version
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.schema import CreateSequence, DropSequence
+
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    op.execute(CreateSequence(sa.Sequence("views_version_seq"), if_not_exists=True))
+
+
+def downgrade():
+    op.execute(DropSequence(sa.Sequence("views_version_seq")))
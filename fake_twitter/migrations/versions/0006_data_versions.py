@@ -0,0 +1,55 @@
+"""
+Data versions in replicated table rows instead of sequences
+
+Values of sequences on replica run ahead of primary, so versions read there
+did not match replicated data
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.schema import CreateSequence, DropSequence
+
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+VERSION_NAMES = ("feed", "views")
+
+
+def upgrade():
+    op.create_table(
+        "data_versions",
+        sa.Column("name", sa.String(50), primary_key=True),
+        sa.Column("value", sa.BigInteger, nullable=False, server_default="0"),
+        if_not_exists=True,
+    )
+    for name in VERSION_NAMES:
+        op.execute(
+            sa.text(
+                f"INSERT INTO data_versions (name, value) "
+                f"SELECT '{name}', last_value FROM {name}_version_seq "
+                f"ON CONFLICT (name) DO NOTHING"
+            )
+        )
+        op.execute(DropSequence(sa.Sequence(f"{name}_version_seq"), if_exists=True))
+
+
+def downgrade():
+    for name in VERSION_NAMES:
+        op.execute(
+            CreateSequence(sa.Sequence(f"{name}_version_seq"), if_not_exists=True)
+        )
+        op.execute(
+            sa.text(
+                f"SELECT setval('{name}_version_seq', greatest(value, 1)) "
+                f"FROM data_versions WHERE name = '{name}'"
+            )
+        )
+    op.drop_table("data_versions")
@@ -0,0 +1,5 @@
+#!/bin/bash
+# Runs once on creation of database: allows streaming replication
+# connections of postgres_replica
+set -e
+echo "host replication all all scram-sha-256" >> "$PGDATA/pg_hba.conf"
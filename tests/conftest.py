@@ -8,6 +8,14 @@ TWEET_API_URL: str = f"{LOCALHOST_API_URL}/tweets"
 
 TWEET_BY_ID_API_URL: str = f"{TWEET_API_URL}/{{tweet_id}}"
 
+PERSONAL_FEED_API_URL: str = f"{TWEET_API_URL}/feed"
+
+SEARCH_API_URL: str = f"{TWEET_API_URL}/search"
+
+TWEETS_BATCH_API_URL: str = f"{TWEET_API_URL}/batch"
+
+STREAM_API_URL: str = f"{TWEET_API_URL}/stream"
+
 LIKE_API_URL: str = f"{TWEET_BY_ID_API_URL}/likes"
 
 # REPOST_API_URL: str = f"{TWEET_BY_ID_API_URL}/repost"
@@ -16,10 +24,26 @@ USER_BY_ID_API_URL: str = f"{USER_API_URL}/{{user_id}}"
 
 FOLLOW_API_URL: str = f"{USER_BY_ID_API_URL}/follow"
 
+FOLLOWERS_API_URL: str = f"{USER_BY_ID_API_URL}/followers"
+
+FOLLOWING_API_URL: str = f"{USER_BY_ID_API_URL}/following"
+
 MEDIA_API_URL: str = f"{LOCALHOST_API_URL}/medias"
 
+TAG_API_URL: str = f"{LOCALHOST_API_URL}/tags/{{tag}}"
+
+MENTIONS_API_URL: str = f"{USER_BY_ID_API_URL}/mentions"
+
+USER_TWEETS_API_URL: str = f"{USER_BY_ID_API_URL}/tweets"
+
 ADMIN_API_URL: str = f"{LOCALHOST_API_URL}/admin/user"
 
+ADMIN_STATS_API_URL: str = f"{LOCALHOST_API_URL}/admin/stats"
+
+ADMIN_EXPORT_TWEETS_API_URL: str = f"{LOCALHOST_API_URL}/admin/export/tweets"
+
+METRICS_URL: str = "http://fake_twitter:8000/metrics"
+
 ADMIN_CREDENTIALS: dict = {
     "login": getenv("ADMIN_LOGIN"),
     "password": getenv("ADMIN_PASSWORD"),
@@ -1,7 +1,20 @@
+import json
+
 import pytest
 import requests
 
-from .conftest import ADMIN_API_URL, ADMIN_CREDENTIALS, USER_1, USER_2, USER_3
+from .conftest import (
+    ADMIN_API_URL,
+    ADMIN_CREDENTIALS,
+    ADMIN_EXPORT_TWEETS_API_URL,
+    ADMIN_STATS_API_URL,
+    API_KEYWORD,
+    METRICS_URL,
+    PERSONAL_FEED_API_URL,
+    USER_1,
+    USER_2,
+    USER_3,
+)
 
 USERS_ID_LIST = []
 
@@ -104,11 +117,16 @@ def test_create_delete_user_invalid_credentials(
     ],
 )
 def test_delete_user(user_data, exp_code, exp_result):
+    headers = {API_KEYWORD: user_data.get("api_key")}
+    # api-key of user gets cached
+    assert requests.get(PERSONAL_FEED_API_URL, headers=headers).status_code == 200
     user_data.update({"id": USERS_ID_LIST.pop(0)})
     query = {**ADMIN_CREDENTIALS, "user_data": user_data}
     delete_user_response = requests.delete(ADMIN_API_URL, json=query)
     assert delete_user_response.status_code == exp_code
     assert delete_user_response.json().get("result") is exp_result
+    # cached api-key is invalidated by deletion
+    assert requests.get(PERSONAL_FEED_API_URL, headers=headers).status_code == 401
 
 
 @pytest.mark.parametrize(
@@ -125,3 +143,66 @@ def test_delete_user_invalid_data(invalid_user_data, exp_code, exp_result):
     invalid_data_response = requests.delete(ADMIN_API_URL, json=query)
     assert invalid_data_response.status_code == exp_code
     assert invalid_data_response.json().get("result") is exp_result
+
+
+@pytest.mark.parametrize(
+    "credentials, exp_code, exp_result",
+    [
+        (ADMIN_CREDENTIALS, 200, True),
+        ({**ADMIN_CREDENTIALS, "password": "definitely wrong"}, 401, False),
+    ],
+)
+def test_get_stats(credentials, exp_code, exp_result):
+    stats_response = requests.post(ADMIN_STATS_API_URL, json=credentials)
+    stats_response_data = stats_response.json()
+    assert stats_response.status_code == exp_code
+    assert stats_response_data.get("result") is exp_result
+    if stats_response.status_code == 200:
+        assert {"hits", "misses", "size_bytes"} <= stats_response_data[
+            "feed_cache"
+        ].keys()
+        assert {"hits", "misses"} <= stats_response_data["identity_cache"].keys()
+        assert {
+            "checked_out",
+            "idle",
+            "overflow",
+            "wait_max_ms",
+        } <= stats_response_data["db_pool"].keys()
+
+
+@pytest.mark.parametrize(
+    "credentials, exp_code",
+    [
+        ((ADMIN_CREDENTIALS["login"], ADMIN_CREDENTIALS["password"]), 200),
+        ((ADMIN_CREDENTIALS["login"], "definitely wrong"), 401),
+        (None, 401),
+    ],
+)
+def test_get_metrics(credentials, exp_code):
+    metrics_response = requests.get(METRICS_URL, auth=credentials)
+    assert metrics_response.status_code == exp_code
+    if metrics_response.status_code == 200:
+        assert "# TYPE http_request_duration_seconds histogram" in metrics_response.text
+        assert 'route="/api/admin/stats"' in metrics_response.text
+        assert 'db_pool_checked_out{pool="primary"}' in metrics_response.text
+
+
+@pytest.mark.parametrize(
+    "credentials, exp_code",
+    [
+        (ADMIN_CREDENTIALS, 200),
+        ({**ADMIN_CREDENTIALS, "password": "definitely wrong"}, 401),
+    ],
+)
+def test_export_tweets(credentials, exp_code):
+    with requests.post(
+        ADMIN_EXPORT_TWEETS_API_URL, json=credentials, stream=True
+    ) as export_response:
+        assert export_response.status_code == exp_code
+        if export_response.status_code != 200:
+            assert export_response.json().get("result") is False
+            return
+        assert export_response.headers["content-type"] == "application/x-ndjson"
+        for line in export_response.iter_lines():
+            tweet = json.loads(line)
+            assert {"id", "author", "content", "likes", "views"} <= tweet.keys()
@@ -1,9 +1,13 @@
+import json
+from time import sleep
 from types import NoneType
 
 import pytest
 import requests
 from .conftest import (
     FOLLOW_API_URL,
+    FOLLOWERS_API_URL,
+    FOLLOWING_API_URL,
     LIKE_API_URL,
     MEDIA_API_URL,
     TWEET_1,
@@ -21,8 +25,15 @@ from .conftest import (
     INVALID_SIZE_MEDIA_FILE_PATH,
     INVALID_EXTENSION_MEDIA_FILE_PATH,
     INVALID_API_KEY,
+    PERSONAL_FEED_API_URL,
+    SEARCH_API_URL,
+    STREAM_API_URL,
+    TWEETS_BATCH_API_URL,
+    TAG_API_URL,
+    MENTIONS_API_URL,
     TWEET_BY_ID_API_URL,
     USER_BY_ID_API_URL,
+    USER_TWEETS_API_URL,
 )
 
 
@@ -251,6 +262,218 @@ def test_get_tweets(api_key, exp_code, exp_result, user_setup):
             )
 
 
+def test_get_tweets_cache(user_setup):
+    headers = {API_KEYWORD: USER_1["api_key"]}
+    cache_statuses = [
+        requests.get(TWEET_API_URL, params={"limit": 5}, headers=headers).headers.get(
+            "X-Cache"
+        )
+        for _ in range(3)
+    ]
+    assert "HIT" in cache_statuses
+    requests.post(LIKE_API_URL.format(tweet_id=TWEET_1["id"]), headers=headers)
+    liked_response = requests.get(TWEET_API_URL, params={"limit": 5}, headers=headers)
+    assert liked_response.headers.get("X-Cache") == "MISS"
+    requests.delete(LIKE_API_URL.format(tweet_id=TWEET_1["id"]), headers=headers)
+
+
+def test_conditional_get(user_setup):
+    headers = {API_KEYWORD: USER_1["api_key"]}
+    for url in (
+        TWEET_API_URL,
+        TWEET_BY_ID_API_URL.format(tweet_id=TWEET_1["id"]),
+        USER_BY_ID_API_URL.format(user_id="me"),
+    ):
+        response = requests.get(url, headers=headers)
+        etag = response.headers.get("ETag")
+        assert response.status_code == 200
+        assert etag and etag.startswith("W/")
+        cached_response = requests.get(url, headers={**headers, "If-None-Match": etag})
+        assert cached_response.status_code == 304
+        assert cached_response.headers.get("ETag") == etag
+    tweet_url = TWEET_BY_ID_API_URL.format(tweet_id=TWEET_1["id"])
+    etag = requests.get(tweet_url, headers=headers).headers["ETag"]
+    requests.post(LIKE_API_URL.format(tweet_id=TWEET_1["id"]), headers=headers)
+    liked_response = requests.get(tweet_url, headers={**headers, "If-None-Match": etag})
+    assert liked_response.status_code == 200
+    assert liked_response.headers["ETag"] != etag
+    requests.delete(LIKE_API_URL.format(tweet_id=TWEET_1["id"]), headers=headers)
+
+
+def test_stream_feed_events(user_setup):
+    headers = {API_KEYWORD: USER_1["api_key"]}
+    with requests.get(
+        STREAM_API_URL, headers=headers, stream=True, timeout=10
+    ) as stream_response:
+        assert stream_response.status_code == 200
+        assert stream_response.headers["content-type"].startswith("text/event-stream")
+        requests.post(LIKE_API_URL.format(tweet_id=TWEET_1["id"]), headers=headers)
+        received_event = None
+        for line in stream_response.iter_lines(decode_unicode=True):
+            if line.startswith("data: "):
+                received_event = json.loads(line.removeprefix("data: "))
+                if received_event["event"] == "like":
+                    break
+    requests.delete(LIKE_API_URL.format(tweet_id=TWEET_1["id"]), headers=headers)
+    assert received_event == {
+        "event": "like",
+        "tweet_id": TWEET_1["id"],
+        "user_id": USER_1["id"],
+    }
+
+
+@pytest.mark.parametrize("sort", ["views", "hot"])
+def test_get_tweets_paginated(sort, user_setup):
+    received_ids = []
+    params = {"limit": 1, "sort": sort}
+    while True:
+        page_response = requests.get(
+            TWEET_API_URL, params=params, headers={API_KEYWORD: USER_1["api_key"]}
+        )
+        page_data = page_response.json()
+        assert page_response.status_code == 200
+        assert page_data.get("result") is True
+        assert len(page_data["tweets"]) <= 1
+        received_ids.extend(tweet["id"] for tweet in page_data["tweets"])
+        if not page_data["next_cursor"]:
+            break
+        params = {"limit": 1, "sort": sort, "cursor": page_data["next_cursor"]}
+    assert len(received_ids) == len(set(received_ids))
+    assert TWEET_1["id"] in received_ids
+    assert TWEET_2["id"] in received_ids
+
+
+def get_hot_feed_ids(headers: dict) -> list[int]:
+    tweet_ids = []
+    params = {"limit": 100, "sort": "hot"}
+    while True:
+        page_data = requests.get(TWEET_API_URL, params=params, headers=headers).json()
+        tweet_ids.extend(tweet["id"] for tweet in page_data["tweets"])
+        if not page_data["next_cursor"]:
+            return tweet_ids
+        params = {**params, "cursor": page_data["next_cursor"]}
+
+
+def test_get_tweets_hot_order(user_setup):
+    headers = {API_KEYWORD: USER_1["api_key"]}
+    older_id, newer_id = (
+        requests.post(
+            TWEET_API_URL,
+            json={"tweet_data": f"hot order {n}", "tweet_media_ids": []},
+            headers=headers,
+        ).json()["tweet_id"]
+        for n in range(2)
+    )
+
+    def newer_is_hotter() -> bool:
+        hot_ids = get_hot_feed_ids(headers)
+        return hot_ids.index(newer_id) < hot_ids.index(older_id)
+
+    try:
+        # same popularity: score of older tweet has decayed more
+        assert newer_is_hotter()
+        requests.post(LIKE_API_URL.format(tweet_id=older_id), headers=headers)
+        assert not newer_is_hotter()
+        for user in (USER_1, USER_2):
+            requests.post(
+                LIKE_API_URL.format(tweet_id=newer_id),
+                headers={API_KEYWORD: user["api_key"]},
+            )
+        assert newer_is_hotter()
+    finally:
+        for tweet_id in (older_id, newer_id):
+            requests.delete(
+                TWEET_BY_ID_API_URL.format(tweet_id=tweet_id), headers=headers
+            )
+
+
+def test_get_tweets_legacy_frontend_page(user_setup):
+    legacy_response = requests.get(
+        TWEET_API_URL,
+        params={"offset": 0, "limit": 1000},
+        headers={API_KEYWORD: USER_1["api_key"]},
+    )
+    legacy_data = legacy_response.json()
+    assert legacy_response.status_code == 200
+    assert legacy_data.get("result") is True
+    assert "next_cursor" not in legacy_data
+    received_ids = [tweet["id"] for tweet in legacy_data["tweets"]]
+    assert TWEET_1["id"] in received_ids
+    assert TWEET_2["id"] in received_ids
+
+
+@pytest.mark.parametrize(
+    "params, exp_code",
+    [
+        ({"limit": 0}, 422),
+        ({"limit": 1001}, 422),
+        ({"limit": 1, "cursor": "definitely not a cursor"}, 400),
+        ({"limit": 1, "sort": "cold"}, 422),
+    ],
+)
+def test_get_tweets_paginated_invalid_params(params, exp_code, user_setup):
+    page_response = requests.get(
+        TWEET_API_URL, params=params, headers={API_KEYWORD: USER_1["api_key"]}
+    )
+    assert page_response.status_code == exp_code
+    assert page_response.json().get("result") is False
+
+
+def test_get_tweets_batch(user_setup):
+    requested_ids = [TWEET_2["id"], INVALID_TWEET["id"], TWEET_1["id"], TWEET_2["id"]]
+    batch_response = requests.post(
+        TWEETS_BATCH_API_URL,
+        json={"ids": requested_ids},
+        headers={API_KEYWORD: USER_1["api_key"]},
+    )
+    batch_data = batch_response.json()
+    assert batch_response.status_code == 200
+    assert batch_data.get("result") is True
+    assert [item["id"] for item in batch_data["items"]] == requested_ids
+    assert [item["found"] for item in batch_data["items"]] == [True, False, True, True]
+    assert batch_data["items"][1]["tweet"] is None
+    assert batch_data["items"][2]["tweet"]["content"] == TWEET_1["tweet_data"]
+
+
+@pytest.mark.parametrize(
+    "api_key, ids, exp_code",
+    [
+        (INVALID_API_KEY, [1], 401),
+        (USER_1["api_key"], [], 422),
+        (USER_1["api_key"], list(range(1, 1002)), 422),
+        (USER_1["api_key"], [2**31], 422),
+    ],
+)
+def test_get_tweets_batch_invalid_data(api_key, ids, exp_code, user_setup):
+    batch_response = requests.post(
+        TWEETS_BATCH_API_URL, json={"ids": ids}, headers={API_KEYWORD: api_key}
+    )
+    assert batch_response.status_code == exp_code
+    assert batch_response.json().get("result") is False
+
+
+def test_search_tweets(user_setup):
+    found_tweets = []
+    params = {"q": TWEET_1["tweet_data"], "limit": 2}
+    while True:
+        page_response = requests.get(
+            SEARCH_API_URL, params=params, headers={API_KEYWORD: USER_1["api_key"]}
+        )
+        page_data = page_response.json()
+        assert page_response.status_code == 200
+        assert page_data.get("result") is True
+        found_tweets.extend(page_data["tweets"])
+        if not page_data["next_cursor"]:
+            break
+        params = {**params, "cursor": page_data["next_cursor"]}
+    found_ids = [tweet["id"] for tweet in found_tweets]
+    assert len(found_ids) == len(set(found_ids))
+    assert TWEET_1["id"] in found_ids
+    assert TWEET_2["id"] not in found_ids
+    for tweet in found_tweets:
+        assert TWEET_1["tweet_data"].lower() in tweet["content"].lower()
+
+
 @pytest.mark.parametrize(
     "api_key, tweet, exp_code, exp_result",
     [
@@ -280,6 +503,17 @@ def test_get_tweet_by_id(api_key, tweet, exp_code, exp_result, user_setup):
         )
 
 
+def test_get_tweet_views_not_flushed(user_setup):
+    headers = {API_KEYWORD: USER_1["api_key"]}
+    tweet_url = TWEET_BY_ID_API_URL.format(tweet_id=TWEET_1["id"])
+    # kept-alive connection stays with one worker, which adds views it buffered
+    # to flushed ones, whether flush happens between reads or not
+    client = requests.Session()
+    first_views = client.get(tweet_url, headers=headers).json()["tweet"]["views"]
+    second_views = client.get(tweet_url, headers=headers).json()["tweet"]["views"]
+    assert second_views > first_views
+
+
 @pytest.mark.parametrize(
     "api_key, tweet, exp_code, exp_result",
     [
@@ -320,6 +554,7 @@ def test_post_follow_valid_data(
     )
     pre_followed_user_data = pre_followed_user_response.json()
     assert pre_followed_user_data["user"]["followers"] == []
+    assert pre_followed_user_data["user"]["followers_count"] == 0
     new_follow_response = requests.post(
         FOLLOW_API_URL.format(user_id=followed_user["id"]),
         headers={API_KEYWORD: follower["api_key"]},
@@ -333,6 +568,21 @@ def test_post_follow_valid_data(
     )
     followed_user_data = followed_user_response.json()
     assert followed_user_data["user"]["followers"][0]["id"] == follower["id"]
+    assert followed_user_data["user"]["followers_count"] == 1
+    followers_response = requests.get(
+        FOLLOWERS_API_URL.format(user_id=followed_user["id"]),
+        headers={API_KEYWORD: follower["api_key"]},
+    )
+    assert [user["id"] for user in followers_response.json()["users"]] == [
+        follower["id"]
+    ]
+    following_response = requests.get(
+        FOLLOWING_API_URL.format(user_id=follower["id"]),
+        headers={API_KEYWORD: follower["api_key"]},
+    )
+    assert followed_user["id"] in [
+        user["id"] for user in following_response.json()["users"]
+    ]
 
 
 @pytest.mark.parametrize(
@@ -356,6 +606,125 @@ def test_post_follow_invalid_data(
     assert response_data.get("result") is exp_result
 
 
+def get_personal_feed_ids(user: dict, attempts: int = 10) -> list[int]:
+    """Timelines are filled in background, so waiting for tweets a little"""
+    tweet_ids = []
+    for _ in range(attempts):
+        feed_response = requests.get(
+            PERSONAL_FEED_API_URL, headers={API_KEYWORD: user["api_key"]}
+        )
+        assert feed_response.status_code == 200
+        tweet_ids = [tweet["id"] for tweet in feed_response.json()["tweets"]]
+        if tweet_ids:
+            break
+        sleep(0.2)
+    return tweet_ids
+
+
+def test_get_personal_feed(user_setup):
+    assert TWEET_2["id"] in get_personal_feed_ids(USER_1)
+    invalid_key_response = requests.get(
+        PERSONAL_FEED_API_URL, headers={API_KEYWORD: INVALID_API_KEY}
+    )
+    assert invalid_key_response.status_code == 401
+
+
+def test_query_count(user_setup):
+    user_data = {"name": "query_count_test", "api_key": "query_count_test_header"}
+    create_response = requests.post(
+        ADMIN_API_URL, json={**ADMIN_CREDENTIALS, "user_data": user_data}
+    )
+    user_data.update({"id": create_response.json()["created_user_data"]["id"]})
+    headers = {API_KEYWORD: user_data["api_key"]}
+    try:
+        # api-key lookup without relationships + timeline page
+        first_response = requests.get(PERSONAL_FEED_API_URL, headers=headers)
+        assert first_response.headers["X-Query-Count"] == "2"
+        # api-key is cached now
+        second_response = requests.get(PERSONAL_FEED_API_URL, headers=headers)
+        assert second_response.headers["X-Query-Count"] == "1"
+        assert 'desc="1 queries"' in second_response.headers["Server-Timing"]
+    finally:
+        requests.delete(
+            ADMIN_API_URL, json={**ADMIN_CREDENTIALS, "user_data": user_data}
+        )
+
+
+def test_read_your_writes(user_setup):
+    headers = {API_KEYWORD: USER_1["api_key"]}
+    # session keeps cookie pinning reads after own writes to primary
+    client = requests.Session()
+    tweet_id = client.post(
+        TWEET_API_URL,
+        json={"tweet_data": "read your writes", "tweet_media_ids": []},
+        headers=headers,
+    ).json()["tweet_id"]
+    tweet_url = TWEET_BY_ID_API_URL.format(tweet_id=tweet_id)
+    # reads right after own writes are served by primary, not by lagging replica
+    assert client.get(tweet_url, headers=headers).status_code == 200
+    client.delete(tweet_url, headers=headers)
+    assert client.get(tweet_url, headers=headers).status_code == 404
+
+
+def test_get_tag_and_mention_tweets(user_setup):
+    headers = {API_KEYWORD: USER_1["api_key"]}
+    tweet_data = {
+        "tweet_data": f"Hello @{USER_2['name']} #FakeTwitterTest",
+        "tweet_media_ids": [],
+    }
+    tweet_id = requests.post(TWEET_API_URL, json=tweet_data, headers=headers).json()[
+        "tweet_id"
+    ]
+    tag_ids, mention_ids = [], []
+    # hashtags and mentions are extracted in background
+    for _ in range(10):
+        tag_response = requests.get(
+            TAG_API_URL.format(tag="faketwittertest"), headers=headers
+        )
+        mention_response = requests.get(
+            MENTIONS_API_URL.format(user_id=USER_2["id"]), headers=headers
+        )
+        assert tag_response.status_code == 200
+        assert mention_response.status_code == 200
+        tag_ids = [tweet["id"] for tweet in tag_response.json()["tweets"]]
+        mention_ids = [tweet["id"] for tweet in mention_response.json()["tweets"]]
+        if tweet_id in tag_ids and tweet_id in mention_ids:
+            break
+        sleep(0.2)
+    assert tweet_id in tag_ids
+    assert tweet_id in mention_ids
+    requests.delete(TWEET_BY_ID_API_URL.format(tweet_id=tweet_id), headers=headers)
+
+
+def test_get_user_tweets(user_setup):
+    headers = {API_KEYWORD: USER_2["api_key"]}
+    tweet_ids = [
+        requests.post(
+            TWEET_API_URL,
+            json={"tweet_data": f"User tweets page {number}", "tweet_media_ids": []},
+            headers=headers,
+        ).json()["tweet_id"]
+        for number in range(3)
+    ]
+    profile = requests.get(
+        USER_BY_ID_API_URL.format(user_id=USER_2["id"]), headers=headers
+    ).json()["user"]
+    assert [tweet["id"] for tweet in profile["tweets"]][:3] == tweet_ids[::-1]
+    user_tweets_url = USER_TWEETS_API_URL.format(user_id=USER_2["id"])
+    first_page = requests.get(
+        user_tweets_url, params={"limit": 2}, headers=headers
+    ).json()
+    assert [tweet["id"] for tweet in first_page["tweets"]] == tweet_ids[:0:-1]
+    second_page = requests.get(
+        user_tweets_url,
+        params={"limit": 2, "cursor": first_page["next_cursor"]},
+        headers=headers,
+    ).json()
+    assert second_page["tweets"][0]["id"] == tweet_ids[0]
+    for tweet_id in tweet_ids:
+        requests.delete(TWEET_BY_ID_API_URL.format(tweet_id=tweet_id), headers=headers)
+
+
 @pytest.mark.parametrize(
     "follower, followed_user, exp_code, exp_result",
     [
@@ -378,6 +747,20 @@ def test_delete_follow(follower, followed_user, exp_code, exp_result, user_setup
         )
         deleted_follow_user_data = deleted_follow_user_response.json()
         assert deleted_follow_user_data["user"]["followers"] == []
+        author_ids = []
+        # timeline entries of unfollowed user are removed in background
+        for _ in range(10):
+            feed_response = requests.get(
+                PERSONAL_FEED_API_URL, headers={API_KEYWORD: follower["api_key"]}
+            )
+            assert feed_response.status_code == 200
+            author_ids = [
+                tweet["author"]["id"] for tweet in feed_response.json()["tweets"]
+            ]
+            if followed_user["id"] not in author_ids:
+                break
+            sleep(0.2)
+        assert followed_user["id"] not in author_ids
 
 
 @pytest.mark.parametrize(